@@ -0,0 +1,115 @@
+"""Benchmark the SDK's generic record conformance against the compiled conformer.
+
+Usage:
+
+    python benchmarks/conform_records.py [RECORD_COUNT]
+"""
+
+from __future__ import annotations
+
+import copy
+import sys
+import time
+import typing as t
+
+from singer_sdk.helpers._catalog import pop_deselected_record_properties
+from singer_sdk.helpers._typing import conform_record_data_types
+
+from tap_facebook.tap import TapFacebook
+
+CONFIG = {
+    "access_token": "token",
+    "account_id": "123",
+    "start_date": "2024-01-01T00:00:00Z",
+}
+
+ACTIONS = [
+    {"action_type": "link_click", "value": "120"},
+    {"action_type": "landing_page_view", "value": "80"},
+    {"action_type": "purchase", "value": "3"},
+]
+
+RECORDS = {
+    "adsinsights_default": {
+        "account_id": "123",
+        "ad_id": "1",
+        "adset_id": "2",
+        "campaign_id": "3",
+        "date_start": "2024-01-01",
+        "date_stop": "2024-01-01",
+        "impressions": "10234",
+        "reach": "8123",
+        "clicks": "321",
+        "spend": "45.67",
+        "cpm": "4.46",
+        "ctr": "3.13",
+        "frequency": "1.26",
+        "actions": ACTIONS,
+        "unique_actions": ACTIONS,
+        "video_p25_watched_actions": ACTIONS,
+        "video_p50_watched_actions": ACTIONS,
+        "video_30_sec_watched_actions": ACTIONS,
+    },
+    "adsets": {
+        "id": "1",
+        "account_id": "123",
+        "campaign_id": "3",
+        "name": "adset",
+        "status": "ACTIVE",
+        "daily_budget": 1000,
+        "targeting": {
+            "age_max": 65,
+            "age_min": 18,
+            "custom_audiences": [{"id": "4", "name": "audience"}],
+            "publisher_platforms": ["facebook", "instagram"],
+        },
+        "promoted_object": {"pixel_id": "5", "custom_event_type": "PURCHASE"},
+    },
+}
+
+
+def _rate(count: int, func: t.Callable[[], None]) -> float:
+    start = time.perf_counter()
+    func()
+    return count / (time.perf_counter() - start)
+
+
+def main(count: int) -> None:
+    """Print records/s of generic and compiled conformance for ``count`` records."""
+    tap = TapFacebook(config=CONFIG)
+
+    for stream_name, record in RECORDS.items():
+        stream = tap.streams[stream_name]
+        conformer = stream.record_conformer
+
+        rows = [copy.deepcopy(record) for _ in range(count)]
+
+        def before(rows: list[dict] = rows, stream: t.Any = stream) -> None:  # noqa: ANN401
+            for row in rows:
+                pop_deselected_record_properties(row, stream.schema, stream.mask)
+                conform_record_data_types(
+                    stream_name=stream.name,
+                    record=row,
+                    schema=stream.effective_schema,
+                    level=stream.TYPE_CONFORMANCE_LEVEL,
+                    logger=stream.logger,
+                )
+
+        before_rate = _rate(count, before)
+
+        rows = [copy.deepcopy(record) for _ in range(count)]
+
+        def after(rows: list[dict] = rows, conformer: t.Any = conformer) -> None:  # noqa: ANN401
+            for row in rows:
+                conformer.conform(row)
+
+        after_rate = _rate(count, after)
+        print(  # noqa: T201
+            f"{stream_name:20} before: {before_rate:>12,.0f} records/s  "
+            f"after: {after_rate:>12,.0f} records/s  "
+            f"({after_rate / before_rate:.2f}x)",
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,129 @@
+"""Benchmark the default and msgspec-based JSON paths on insights-shaped pages.
+
+Usage:
+
+    python benchmarks/json_messages.py [RECORD_COUNT]
+"""
+
+from __future__ import annotations
+
+import contextlib
+import datetime as dt
+import json
+import os
+import sys
+import time
+import typing as t
+
+from facebook_business.adobjects.adsinsights import AdsInsights
+from singer_sdk import singerlib as singer
+from singer_sdk.singerlib.encoding import SimpleSingerWriter
+
+from tap_facebook.fastjson import FastSingerWriter, decode_json, export_value
+
+PAGE_SIZE = 100
+
+
+def _actions(scale: int) -> list[dict]:
+    return [
+        {"action_type": action_type, "value": str(scale * weight)}
+        for weight, action_type in enumerate(
+            ("link_click", "landing_page_view", "post_engagement", "page_engagement", "purchase"),
+            start=1,
+        )
+    ]
+
+
+def _insights_row(index: int) -> dict:
+    return {
+        "account_id": "123",
+        "ad_id": str(index),
+        "adset_id": "2",
+        "campaign_id": "3",
+        "ad_name": f"Ad {index}",
+        "date_start": "2024-01-01",
+        "date_stop": "2024-01-01",
+        "impressions": "10234",
+        "reach": "8123",
+        "clicks": "321",
+        "spend": "45.67",
+        "cpm": "4.46",
+        "ctr": "3.13",
+        "frequency": "1.26",
+        "actions": _actions(index),
+        "action_values": _actions(index * 3),
+        "video_p25_watched_actions": _actions(1),
+        "video_p50_watched_actions": _actions(1),
+        "video_30_sec_watched_actions": _actions(1),
+    }
+
+
+def _page(start: int) -> bytes:
+    return json.dumps(
+        {
+            "data": [_insights_row(i) for i in range(start, start + PAGE_SIZE)],
+            "paging": {"cursors": {"after": "abc"}, "next": "https://graph.facebook.com/next"},
+        },
+    ).encode()
+
+
+def _rate(count: int, func: t.Callable[[], None]) -> float:
+    start = time.perf_counter()
+    func()
+    return count / (time.perf_counter() - start)
+
+
+def _print(name: str, before: float, after: float) -> None:
+    print(  # noqa: T201
+        f"{name:8} before: {before:>12,.0f} records/s  "
+        f"after: {after:>12,.0f} records/s  ({after / before:.2f}x)",
+    )
+
+
+def main(count: int) -> None:
+    """Print records/s of default and msgspec decoding and writing for ``count`` records."""
+    pages = [_page(start) for start in range(0, count, PAGE_SIZE)]
+
+    def decode_before() -> None:
+        for page in pages:
+            # facebook_business parses each page twice, once to check for errors and
+            # once in the cursor, and builds an AdsInsights object for every row.
+            json.loads(page)
+            for row in json.loads(page)["data"]:
+                obj = AdsInsights()
+                obj._set_data(row)  # noqa: SLF001
+                obj.export_all_data()
+
+    def decode_after() -> None:
+        for page in pages:
+            # The error check still parses the page with the json module.
+            json.loads(page)
+            export_value(decode_json(page, use_decimal=False)["data"])
+
+    _print("decode", _rate(count, decode_before), _rate(count, decode_after))
+
+    now = dt.datetime.now(tz=dt.timezone.utc)
+    messages = [
+        singer.RecordMessage(stream="adsinsights_default", record=row, time_extracted=now)
+        for page in pages
+        for row in json.loads(page)["data"]
+    ]
+
+    def write(writer: SimpleSingerWriter | FastSingerWriter) -> None:
+        with (
+            open(os.devnull, "w") as devnull,  # noqa: PTH123
+            contextlib.redirect_stdout(devnull),
+        ):
+            for message in messages:
+                writer.write_message(message)
+            devnull.buffer.flush()
+
+    _print(
+        "write",
+        _rate(count, lambda: write(SimpleSingerWriter())),
+        _rate(count, lambda: write(FastSingerWriter())),
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
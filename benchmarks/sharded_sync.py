@@ -0,0 +1,129 @@
+"""Benchmark sharded syncs of an insights stream against a local mock Graph API.
+
+Usage:
+
+    python benchmarks/sharded_sync.py [DAYS] [PROCESSES ...]
+
+Each day of the default insights report is served as a single page of rows. Worker
+processes import this module, so the Graph API URL is patched in them too.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import datetime as dt
+import json
+import multiprocessing
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from facebook_business.session import FacebookSession
+
+from tap_facebook.tap import TapFacebook
+
+ROWS_PER_DAY = 500
+MOCK_URL_ENV = "TAP_FACEBOOK_BENCHMARK_GRAPH_URL"
+
+if MOCK_URL_ENV in os.environ:
+    FacebookSession.GRAPH = os.environ[MOCK_URL_ENV]
+
+
+def _insights_row(index: int) -> dict:
+    actions = [
+        {"action_type": action_type, "value": str(index * weight)}
+        for weight, action_type in enumerate(("link_click", "post_engagement", "purchase"), 1)
+    ]
+    return {
+        "account_id": "123",
+        "ad_id": str(index),
+        "adset_id": "2",
+        "campaign_id": "3",
+        "date_start": "2024-01-01",
+        "date_stop": "2024-01-01",
+        "impressions": "10234",
+        "clicks": "321",
+        "spend": "45.67",
+        "cpm": "4.46",
+        "actions": actions,
+        "action_values": actions,
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    insights = json.dumps({"data": [_insights_row(i) for i in range(ROWS_PER_DAY)]}).encode()
+    account = json.dumps({"id": "act_123", "account_id": "123"}).encode()
+
+    def do_GET(self) -> None:
+        body = self.account
+        if "/insights" in self.path:
+            query = parse_qs(urlparse(self.path).query)
+            since = json.loads(query["time_range"][0])["since"]
+            body = self.insights.replace(b"2024-01-01", since.encode())
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_: object) -> None:
+        pass
+
+
+def _serve(port: int) -> None:
+    ThreadingHTTPServer(("127.0.0.1", port), _Handler).serve_forever()
+
+
+def _sync(days: int, processes: int) -> float:
+    end = dt.date(2024, 3, 1)
+    config = {
+        "access_token": "token",
+        "account_id": "123",
+        "start_date": (end - dt.timedelta(days=days - 1)).isoformat(),
+        "end_date": end.isoformat(),
+        "fast_json": True,
+        "sync_processes": processes,
+    }
+    tap = TapFacebook(config=config)
+    catalog = tap.catalog.to_dict()
+    for entry in catalog["streams"]:
+        for metadata in entry["metadata"]:
+            if not metadata["breadcrumb"]:
+                metadata["metadata"]["selected"] = entry["tap_stream_id"] == "adsinsights_default"
+    tap = TapFacebook(config=config, catalog=catalog)
+
+    start = time.perf_counter()
+    with (
+        open(os.devnull, "w") as devnull,  # noqa: PTH123
+        contextlib.redirect_stdout(devnull),
+    ):
+        tap.run_sync()
+    return days * ROWS_PER_DAY / (time.perf_counter() - start)
+
+
+def main(days: int, processes: list[int]) -> None:
+    """Print records/s of syncing ``days`` of insights with each number of processes."""
+    port = 18765
+    os.environ[MOCK_URL_ENV] = FacebookSession.GRAPH = f"http://127.0.0.1:{port}"
+    server = multiprocessing.get_context("spawn").Process(target=_serve, args=(port,), daemon=True)
+    server.start()
+    time.sleep(1)
+    try:
+        baseline = None
+        for count in processes:
+            rate = _sync(days, count)
+            baseline = baseline or rate
+            print(  # noqa: T201
+                f"processes: {count:>3}  {rate:>12,.0f} records/s  ({rate / baseline:.2f}x)",
+            )
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 60,
+        [int(arg) for arg in sys.argv[2:]] or [1, 2, 4],
+    )
@@ -0,0 +1,129 @@
+"""Benchmark per-record versus batched numeric coercion.
+
+Usage:
+
+    python benchmarks/transform_records.py [RECORD_COUNT]
+"""
+
+from __future__ import annotations
+
+import decimal
+import sys
+import time
+import typing as t
+from functools import partial
+
+from tap_facebook.tap import TapFacebook
+from tap_facebook.transform import iter_batches
+
+CONFIG = {
+    "access_token": "token",
+    "account_id": "123",
+    "start_date": "2024-01-01T00:00:00Z",
+    "numeric_insights_fields": True,
+}
+
+
+def _per_record_ad_account(row: dict) -> dict:
+    """The per-record coercion previously done in ``AdAccountsStream.post_process``."""
+    row["amount_spent"] = int(row["amount_spent"]) if "amount_spent" in row else None
+    row["balance"] = int(row["balance"]) if "balance" in row else None
+    row["min_campaign_group_spend_cap"] = (
+        int(row["min_campaign_group_spend_cap"]) if "min_campaign_group_spend_cap" in row else None
+    )
+    row["spend_cap"] = int(row["spend_cap"]) if "spend_cap" in row else None
+    return row
+
+
+def _per_record_schema_walk(row: dict, schema: dict) -> dict:
+    """Coerce a single record by looking up every field's type in the schema."""
+    for name, value in row.items():
+        if not isinstance(value, str):
+            continue
+        property_type = schema["properties"].get(name, {}).get("type", [])
+        if "integer" in property_type:
+            row[name] = int(value)
+        elif "number" in property_type:
+            row[name] = decimal.Decimal(value)
+    return row
+
+
+def _ad_account_row(index: int) -> dict:
+    return {
+        "id": f"act_{index}",
+        "account_id": str(index),
+        "name": f"Account {index}",
+        "amount_spent": "123456",
+        "balance": "789",
+        "min_campaign_group_spend_cap": "10000",
+        "currency": "USD",
+    }
+
+
+def _insights_row(index: int) -> dict:
+    return {
+        "account_id": "123",
+        "ad_id": str(index),
+        "date_start": "2024-01-01",
+        "date_stop": "2024-01-01",
+        "impressions": "10234",
+        "reach": "8123",
+        "clicks": "321",
+        "unique_clicks": "300",
+        "inline_link_clicks": "120",
+        "spend": "45.67",
+        "cpm": "4.46",
+        "cpc": "0.14",
+        "cpp": "5.62",
+        "ctr": "3.13",
+        "frequency": "1.26",
+        "unique_ctr": "2.93",
+        "actions": [{"action_type": "link_click", "value": "120"}],
+    }
+
+
+def _rate(count: int, func: t.Callable[[], None]) -> float:
+    start = time.perf_counter()
+    func()
+    return count / (time.perf_counter() - start)
+
+
+def main(count: int) -> None:
+    """Print records/s of per-record and batched coercion for ``count`` records."""
+    tap = TapFacebook(config=CONFIG)
+    page_size = 100
+
+    for stream_name, factory, per_record in (
+        ("adaccounts", _ad_account_row, _per_record_ad_account),
+        (
+            "adsinsights_default",
+            _insights_row,
+            partial(_per_record_schema_walk, schema=tap.streams["adsinsights_default"].schema),
+        ),
+    ):
+        transformer = tap.streams[stream_name].record_transformer
+
+        rows = [factory(i) for i in range(count)]
+
+        def before(rows: list[dict] = rows, per_record: t.Callable = per_record) -> None:
+            for row in rows:
+                per_record(row)
+
+        before_rate = _rate(count, before)
+
+        pages = list(iter_batches((factory(i) for i in range(count)), page_size))
+
+        def after(pages: list[list[dict]] = pages, transformer: t.Any = transformer) -> None:  # noqa: ANN401
+            for page in pages:
+                transformer.transform(page)
+
+        after_rate = _rate(count, after)
+        print(  # noqa: T201
+            f"{stream_name:20} before: {before_rate:>12,.0f} records/s  "
+            f"after: {after_rate:>12,.0f} records/s  "
+            f"({after_rate / before_rate:.2f}x)",
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,170 @@
+"""Batch file writers used when the tap emits BATCH messages."""
+
+from __future__ import annotations
+
+import typing as t
+from uuid import uuid4
+
+from singer_sdk.batch import BaseBatcher, lazy_chunked_generator
+from singer_sdk.singerlib.json import serialize_json
+
+from tap_facebook.transform import schema_types
+
+if t.TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    import pyarrow as pa
+    from singer_sdk.helpers._batch import BatchConfig
+
+Convert = t.Callable[[t.Any], t.Any]
+
+_SCALAR_TYPES = {
+    "string": "string",
+    "integer": "int64",
+    "number": "float64",
+    "boolean": "bool_",
+}
+
+
+def _to_float(value: t.Any) -> t.Any:  # noqa: ANN401
+    return float(value) if value is not None and value.__class__ is not float else value
+
+
+def _to_json(value: t.Any) -> str | None:  # noqa: ANN401
+    return None if value is None else serialize_json(value)
+
+
+def _arrow_list(item_schema: dict) -> tuple[pa.DataType, Convert | None] | None:
+    import pyarrow as pa  # noqa: PLC0415
+
+    if (item := _arrow_field(item_schema)) is None:
+        return None
+    item_type, convert_item = item
+    if convert_item is None:
+        return pa.list_(item_type), None
+
+    def convert_list(values: list | None) -> list | None:
+        return None if values is None else [convert_item(value) for value in values]
+
+    return pa.list_(item_type), convert_list
+
+
+def _arrow_struct(properties: dict) -> tuple[pa.DataType, Convert | None] | None:
+    import pyarrow as pa  # noqa: PLC0415
+
+    fields = {}
+    for name, field_schema in properties.items():
+        if (field := _arrow_field(field_schema)) is None:
+            return None
+        fields[name] = field
+    struct_type = pa.struct([(name, arrow_type) for name, (arrow_type, _) in fields.items()])
+    converters = {name: convert for name, (_, convert) in fields.items() if convert}
+    if not converters:
+        return struct_type, None
+
+    def convert_object(value: dict | None) -> dict | None:
+        if value is None:
+            return None
+        return {
+            name: converters[name](field) if name in converters else field
+            for name, field in value.items()
+        }
+
+    return struct_type, convert_object
+
+
+def _arrow_field(property_schema: dict) -> tuple[pa.DataType, Convert | None] | None:
+    """Map a JSON schema to an Arrow type and a converter for its values.
+
+    Returns:
+        The Arrow type and an optional value converter, or None if the schema has
+        no unambiguous Arrow equivalent.
+    """
+    import pyarrow as pa  # noqa: PLC0415
+
+    types = schema_types(property_schema) - {"null"}
+    json_type = types.pop() if len(types) == 1 else None
+
+    if json_type in _SCALAR_TYPES:
+        arrow_type = getattr(pa, _SCALAR_TYPES[json_type])()
+        return arrow_type, _to_float if json_type == "number" else None
+    if json_type == "array" and isinstance(property_schema.get("items"), dict):
+        return _arrow_list(property_schema["items"])
+    if json_type == "object" and property_schema.get("properties"):
+        return _arrow_struct(property_schema["properties"])
+    return None
+
+
+class ParquetBatcher(BaseBatcher):
+    """Write batches of records to Parquet files with a schema fixed by the stream.
+
+    The SDK's Parquet batcher infers an Arrow schema from each chunk of records, so
+    columns that happen to be missing or null in one file get a different type, or
+    disappear, compared to the next. Here the Arrow schema is derived once from the
+    stream's JSON schema instead. Properties without an unambiguous Arrow type are
+    written as JSON-encoded strings.
+    """
+
+    def __init__(
+        self,
+        tap_name: str,
+        stream_name: str,
+        batch_config: BatchConfig,
+        *,
+        schema: dict,
+    ) -> None:
+        """Initialize the batcher.
+
+        Args:
+            tap_name: The name of the tap.
+            stream_name: The name of the stream.
+            batch_config: The batch configuration.
+            schema: The JSON schema of the records, pruned of deselected properties.
+        """
+        import pyarrow as pa  # noqa: PLC0415
+
+        super().__init__(tap_name, stream_name, batch_config)
+        self.columns: list[tuple[str, pa.DataType, Convert | None]] = []
+        for name, property_schema in schema.get("properties", {}).items():
+            arrow_type, convert = _arrow_field(property_schema) or (pa.string(), _to_json)
+            self.columns.append((name, arrow_type, convert))
+        self.schema = pa.schema([(name, arrow_type) for name, arrow_type, _ in self.columns])
+
+    def _to_table(self, records: list[dict]) -> pa.Table:
+        import pyarrow as pa  # noqa: PLC0415
+
+        arrays = []
+        for name, arrow_type, convert in self.columns:
+            values = [record.get(name) for record in records]
+            if convert is not None:
+                values = [convert(value) for value in values]
+            try:
+                arrays.append(pa.array(values, type=arrow_type))
+            except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                msg = f"Cannot write column '{name}' of stream '{self.stream_name}': {e}"
+                raise ValueError(msg) from e
+        return pa.Table.from_arrays(arrays, schema=self.schema)
+
+    def get_batches(self, records: Iterator[dict]) -> Iterator[list[str]]:
+        """Yield manifest of batches.
+
+        Args:
+            records: The records to batch.
+
+        Yields:
+            A list of file paths (called a manifest).
+        """
+        import pyarrow.parquet as pq  # noqa: PLC0415
+
+        sync_id = f"{self.tap_name}--{self.stream_name}-{uuid4()}"
+        storage = self.batch_config.storage
+        prefix = storage.prefix or ""
+        compression = "gzip" if self.batch_config.encoding.compression == "gzip" else "snappy"
+        for i, chunk in enumerate(
+            lazy_chunked_generator(records, self.batch_config.batch_size),
+            start=1,
+        ):
+            filename = f"{prefix}{sync_id}-{i}.parquet"
+            with storage.open(filename, "wb") as f:
+                pq.write_table(self._to_table(list(chunk)), f, compression=compression)
+            yield [storage.get_url(filename)]
@@ -0,0 +1,244 @@
+"""Local on-disk cache used to avoid re-requesting unchanged API results."""
+
+from __future__ import annotations
+
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+import typing as t
+from pathlib import Path
+
+if t.TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+# Once over ``max_bytes``, the cache is trimmed to this fraction of it, so that the
+# next writes do not each trigger another eviction.
+EVICTION_TARGET_RATIO = 0.9
+
+
+def fingerprint(value: t.Any) -> str:  # noqa: ANN401
+    """Return a stable identifier of a JSON-serializable value.
+
+    Args:
+        value: The value, whose dicts are serialized with sorted keys.
+
+    Returns:
+        The hex digest of the value's SHA-256 hash.
+    """
+    payload = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class DiskCache:
+    """Content-addressed store of gzip-compressed blobs with TTL and LRU eviction.
+
+    Entries are addressed by the SHA-256 digest of their key parts. The modification
+    time of an entry records when it was written and is used for TTL expiry, while
+    the access time is bumped on every hit and drives least-recently-used eviction
+    once the cache grows beyond ``max_bytes``. The total size of the entries is
+    counted once when the cache is opened and kept up to date as entries are
+    written, so writes only scan the directory when they push it over the limit.
+    """
+
+    suffix = ".gz"
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        *,
+        ttl_seconds: float | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            directory: Directory holding the cache entries. Created if missing.
+            ttl_seconds: Maximum age of an entry before it is treated as stale.
+            max_bytes: Maximum total size of the cache on disk.
+        """
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._total_bytes = 0
+        self.evict()
+
+    @staticmethod
+    def make_key(*parts: t.Any) -> str:  # noqa: ANN401
+        """Return the content address for the given key parts.
+
+        Args:
+            parts: JSON-serializable values identifying the entry.
+
+        Returns:
+            A hex digest.
+        """
+        return fingerprint(parts)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{self.suffix}"
+
+    def _is_expired(self, path: Path, now: float) -> bool:
+        if self.ttl_seconds is None:
+            return False
+        return now - path.stat().st_mtime > self.ttl_seconds
+
+    def _fresh_path(self, key: str) -> Path | None:
+        """Return the path of a fresh entry, marking it as recently used."""
+        path = self._path(key)
+        now = time.time()
+        try:
+            if self._is_expired(path, now):
+                size = path.stat().st_size
+                path.unlink()
+                self._total_bytes -= size
+                return None
+            os.utime(path, (now, path.stat().st_mtime))
+        except FileNotFoundError:
+            return None
+        return path
+
+    def get(self, key: str) -> bytes | None:
+        """Return the decompressed entry for ``key``, or None on a miss.
+
+        Args:
+            key: The entry key, as returned by `make_key`.
+
+        Returns:
+            The cached bytes, if present and fresh.
+        """
+        path = self._fresh_path(key)
+        if path is None:
+            return None
+        try:
+            return gzip.decompress(path.read_bytes())
+        except (FileNotFoundError, gzip.BadGzipFile, EOFError):
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        """Compress and store ``data`` under ``key``.
+
+        Args:
+            key: The entry key, as returned by `make_key`.
+            data: The bytes to store.
+        """
+        self.put_compressed(key, gzip.compress(data))
+
+    @contextlib.contextmanager
+    def _open_for_write(self, key: str) -> Iterator[t.BinaryIO]:
+        """Open a temporary file that replaces the entry for ``key`` on success.
+
+        Readers never see partial entries, and nothing is stored if the block
+        raises or, in a generator, is abandoned.
+        """
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                yield tmp
+            size = Path(tmp_name).stat().st_size
+            with contextlib.suppress(FileNotFoundError):
+                size -= path.stat().st_size
+            Path(tmp_name).replace(path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        self._total_bytes += size
+        if self.max_bytes is not None and self._total_bytes > self.max_bytes:
+            self.evict(int(self.max_bytes * EVICTION_TARGET_RATIO))
+
+    def put_compressed(self, key: str, compressed: bytes) -> None:
+        """Store already gzip-compressed ``compressed`` bytes under ``key``.
+
+        Args:
+            key: The entry key, as returned by `make_key`.
+            compressed: Gzip-compressed bytes.
+        """
+        with self._open_for_write(key) as tmp:
+            tmp.write(compressed)
+
+    def iter_lines(self, key: str) -> Iterator[dict] | None:
+        """Return an iterator over the rows of a cached JSONL entry.
+
+        The entry is decompressed as it is read, so memory use does not depend on
+        its size. It is checked for corruption before the iterator is returned,
+        so a damaged entry is a miss rather than a partial result.
+
+        Args:
+            key: The entry key, as returned by `make_key`.
+
+        Returns:
+            An iterator over the decoded rows, if the entry is present and fresh.
+        """
+        path = self._fresh_path(key)
+        if path is None:
+            return None
+        try:
+            with gzip.open(path) as f:
+                while f.read(1024 * 1024):
+                    pass
+        except (FileNotFoundError, gzip.BadGzipFile, EOFError):
+            return None
+        return self._read_lines(path)
+
+    @staticmethod
+    def _read_lines(path: Path) -> Iterator[dict]:
+        with gzip.open(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def write_through(self, key: str, rows: Iterable[dict]) -> Iterator[dict]:
+        """Yield ``rows`` while compressing them into a JSONL cache entry.
+
+        The entry is only stored once ``rows`` has been fully consumed, so partial
+        results are never cached. Rows are compressed straight to disk.
+
+        Args:
+            key: The entry key, as returned by `make_key`.
+            rows: The rows to pass through.
+
+        Yields:
+            Each row, unchanged.
+        """
+        with (
+            self._open_for_write(key) as tmp,
+            gzip.GzipFile(fileobj=tmp, mode="wb") as compressor,
+        ):
+            for row in rows:
+                compressor.write(json.dumps(row, default=str).encode())
+                compressor.write(b"\n")
+                yield row
+
+    def evict(self, target_bytes: int | None = None) -> None:
+        """Remove expired entries and trim the cache to ``target_bytes``.
+
+        Args:
+            target_bytes: The size to trim the cache to. Defaults to ``max_bytes``.
+        """
+        now = time.time()
+        entries = []
+        for path in self.directory.glob(f"*/*{self.suffix}"):
+            with contextlib.suppress(FileNotFoundError):
+                if self._is_expired(path, now):
+                    path.unlink()
+                    continue
+                stat = path.stat()
+                entries.append((stat.st_atime, stat.st_size, path))
+
+        self._total_bytes = sum(size for _, size, _ in entries)
+        if target_bytes is None:
+            target_bytes = self.max_bytes
+        if target_bytes is None:
+            return
+
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if self._total_bytes <= target_bytes:
+                break
+            path.unlink(missing_ok=True)
+            self._total_bytes -= size
@@ -0,0 +1,30 @@
+"""Checkpointing of resumable stream state."""
+
+from __future__ import annotations
+
+import typing as t
+
+from singer_sdk.streams.core import Stream
+
+from tap_facebook.cache import fingerprint
+
+
+class CheckpointMixin(Stream):
+    """Stream mixin emitting state mid-sync, to resume interrupted requests."""
+
+    def _write_checkpoint_state(self) -> None:
+        """Emit a STATE message immediately, regardless of record activity."""
+        self._is_state_flushed = False
+        self._write_state_message()
+
+    @staticmethod
+    def _get_fingerprint(**parts: t.Any) -> str:  # noqa: ANN401
+        """Return a stable identifier of a request, saved in the state to resume it.
+
+        Args:
+            parts: JSON-serializable values defining the request.
+
+        Returns:
+            A hex digest of the parts.
+        """
+        return fingerprint(parts)
@@ -3,9 +3,17 @@
 from __future__ import annotations
 
 import abc
+import collections
+import decimal
+import itertools
 import json
+import math
+import threading
+import time
 import typing as t
+from functools import cached_property
 from http import HTTPStatus
+from operator import itemgetter
 from urllib.parse import urlparse
 
 import pendulum
@@ -14,12 +22,37 @@ from singer_sdk.exceptions import FatalAPIError, RetriableAPIError
 from singer_sdk.helpers.jsonpath import extract_jsonpath
 from singer_sdk.streams import RESTStream
 
+from tap_facebook.cache import DiskCache
+from tap_facebook.checkpoint import CheckpointMixin
+from tap_facebook.concurrency import page_size, prefetch
+from tap_facebook.conform import CompiledConformerMixin
+from tap_facebook.planning import record_timings, scale_timings
+from tap_facebook.ratelimit import get_rate_limiter
+from tap_facebook.transform import RecordTransformer
+
 if t.TYPE_CHECKING:
     import requests
-    from singer_sdk.helpers.types import Context
-
-
-class FacebookStream(RESTStream):
+    from singer_sdk.helpers.types import Context, Record
+
+    from tap_facebook.ratelimit import SharedTokenBucket
+
+# The state key holding the pagination cursor of a listing that has not completed.
+RESUME_CURSOR_KEY = "resume_cursor"
+# Saved cursors are discarded after this long, since the Graph API does not
+# guarantee that they stay valid.
+RESUME_CURSOR_MAX_AGE_SECONDS = 60 * 60
+# While paginating, STATE is emitted after every this many pages.
+RESUME_CURSOR_STATE_PAGES = 20
+# The state key recording the last listing of every effective status.
+STATUS_SWEEP_KEY = "status_sweep"
+# Objects looked up by id are requested this many at a time, the most the Graph API
+# accepts in a single ``ids`` request.
+LOOKUP_CHUNK_SIZE = 50
+# The number of lookup requests in flight at once.
+LOOKUP_CONCURRENCY = 4
+
+
+class FacebookStream(CheckpointMixin, CompiledConformerMixin, RESTStream):
     """facebook stream class."""
 
     # add account id in the url
@@ -36,6 +69,27 @@ class FacebookStream(RESTStream):
 
     tolerated_http_errors: list[int] = []  # noqa: RUF012
 
+    # Numeric properties that the API returns as strings, coerced a page at a time.
+    numeric_string_fields: tuple[str, ...] = ()
+    # Properties emitted as null when the API omits them from a record.
+    fill_missing_fields: tuple[str, ...] = ()
+
+    # Whether pages are stored in the HTTP cache and revalidated with their ETag.
+    # Enabled for streams whose objects rarely change.
+    conditional_requests = False
+
+    # Whether objects can be looked up by id, from the ``lookup_ids`` setting,
+    # instead of listing the whole collection.
+    supports_lookup = False
+
+    # Whether the current request resumed from a saved cursor and has not yet
+    # received a page.
+    _resuming = False
+
+    # The number of requests sent, including retries, recorded with the timings of
+    # every sync.
+    _requests_sent = 0
+
     @property
     def authenticator(self) -> BearerTokenAuthenticator:
         """Return a new authenticator object.
@@ -48,6 +102,411 @@ class FacebookStream(RESTStream):
             token=self.config["access_token"],
         )
 
+    @cached_property
+    def _decoded_responses(self) -> threading.local:
+        """The last response decoded by each thread, with its decoded body.
+
+        Pages are fetched ahead of emission in background threads with a
+        ``max_buffer_mb`` budget.
+        """
+        return threading.local()
+
+    @cached_property
+    def _requests_sent_lock(self) -> threading.Lock:
+        """Guards the request count, which background threads increment too."""
+        return threading.Lock()
+
+    @cached_property
+    def record_transformer(self) -> RecordTransformer:
+        """The coercion plan of the numeric fields that the API returns as strings."""
+        return RecordTransformer(
+            self.schema,
+            fields=self.numeric_string_fields,
+            fill_missing=self.fill_missing_fields,
+        )
+
+    def decode_response(self, response: requests.Response) -> t.Any:  # noqa: ANN401
+        """Decode the JSON body of a response, once per response.
+
+        Both the records and the next page token are read from the decoded body, so
+        the last response decoded by each thread is kept. With ``fast_json`` enabled
+        the body is decoded with msgspec, into the same objects.
+
+        Args:
+            response: The HTTP ``requests.Response`` object.
+
+        Returns:
+            The decoded body.
+        """
+        decoded = self._decoded_responses
+        if getattr(decoded, "response", None) is response:
+            return decoded.payload
+        if self.config.get("fast_json"):
+            from tap_facebook.fastjson import decode_json  # noqa: PLC0415
+
+            payload = decode_json(response.content)
+        else:
+            payload = response.json(parse_float=decimal.Decimal)
+        decoded.response, decoded.payload = response, payload
+        return payload
+
+    @cached_property
+    def _http_cache(self) -> DiskCache | None:
+        """Local cache of pages revalidated with their ETag, if enabled in config."""
+        cache_dir = self.config.get("http_cache_dir")
+        if not cache_dir or not self.conditional_requests:
+            return None
+        return DiskCache(
+            cache_dir,
+            max_bytes=self.config["http_cache_max_size_mb"] * 1024 * 1024,
+        )
+
+    @cached_property
+    def _rate_limiter(self) -> SharedTokenBucket | None:
+        """The rate limit budget shared with other tap processes, if enabled in config."""
+        return get_rate_limiter(self.config)
+
+    def _request(
+        self,
+        prepared_request: requests.PreparedRequest,
+        context: Context | None,
+    ) -> requests.Response:
+        """Send a request, replaying the cached page if the API reports it unchanged.
+
+        Every request, including retries, first waits for the shared rate limit
+        budget.
+
+        Args:
+            prepared_request: The request to send.
+            context: Stream partition or context dictionary.
+
+        Returns:
+            The response, with the cached body if its status was 304 Not Modified.
+        """
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+        with self._requests_sent_lock:
+            self._requests_sent += 1
+        cache = self._http_cache
+        if cache is None:
+            return super()._request(prepared_request, context)
+
+        key = DiskCache.make_key(prepared_request.url)
+        entry = cache.get(key)
+        if entry is not None:
+            etag, _, body = entry.partition(b"\n")
+            prepared_request.headers["If-None-Match"] = etag.decode()
+        response = super()._request(prepared_request, context)
+        if response.status_code == HTTPStatus.NOT_MODIFIED and entry is not None:
+            response.status_code = HTTPStatus.OK
+            response._content = body  # noqa: SLF001
+        elif response.status_code == HTTPStatus.OK and "ETag" in response.headers:
+            cache.put(key, response.headers["ETag"].encode() + b"\n" + response.content)
+        return response
+
+    def _get_cursor_fingerprint(self, context: Context | None) -> str:
+        """Return an identifier of the listing that pagination cursors belong to."""
+        return self._get_fingerprint(
+            url=self.get_url(context),
+            params=self.get_url_params(context, None),
+        )
+
+    def _get_resume_cursor(self, context: Context | None) -> str | None:
+        """Return the saved cursor of an interrupted listing, if it is still valid."""
+        state = self.get_context_state(context)
+        cursor = state.get(RESUME_CURSOR_KEY)
+        if cursor is None:
+            return None
+        if time.time() - cursor["saved_at"] > RESUME_CURSOR_MAX_AGE_SECONDS:
+            self.logger.info("Discarding the saved cursor of '%s', it has expired.", self.name)
+        elif cursor["fingerprint"] != self._get_cursor_fingerprint(context):
+            self.logger.info("Discarding the saved cursor of '%s', the request changed.", self.name)
+        else:
+            self.logger.info("Resuming '%s' from a saved cursor.", self.name)
+            self._resuming = True
+            return cursor["after"]
+        state.pop(RESUME_CURSOR_KEY)
+        return None
+
+    @property
+    def checkpoints_listings(self) -> bool:
+        """Whether state can be emitted before a listing has been fully emitted.
+
+        BATCH files are only emitted once they are complete, after the state has
+        moved past the records they hold, so batch syncs only emit state at the end.
+        """
+        return not self.get_batch_config(self.config)
+
+    def _save_resume_cursor(self, context: Context | None, after: str) -> None:
+        """Save the cursor of the next page, once the previous pages are emitted."""
+        state = self.get_context_state(context)
+        pages = state.get(RESUME_CURSOR_KEY, {}).get("pages", 0) + 1
+        state[RESUME_CURSOR_KEY] = {
+            "after": after,
+            "fingerprint": self._get_cursor_fingerprint(context),
+            "saved_at": int(time.time()),
+            "pages": pages,
+        }
+        if pages % RESUME_CURSOR_STATE_PAGES == 0:
+            self._write_checkpoint_state()
+
+    def prepare_request(
+        self,
+        context: Context | None,
+        next_page_token: t.Any | None,  # noqa: ANN401
+    ) -> requests.PreparedRequest:
+        """Prepare a request, resuming or checkpointing the listing's cursor.
+
+        Pages are only requested once every record of the previous page has been
+        emitted, so the token of the next page is where an interrupted listing can
+        resume.
+
+        Args:
+            context: Stream partition or context dictionary.
+            next_page_token: Token, page number or any request argument to request
+                the next page of data.
+
+        Returns:
+            Build a request with the stream's URL, path, query parameters,
+            HTTP headers and authenticator.
+        """
+        # Partitioned listings may be paged concurrently, and are not resumable.
+        if context is None and self.checkpoints_listings:
+            if next_page_token is None:
+                next_page_token = self._get_resume_cursor(context)
+            elif self.next_page_token_jsonpath:
+                self._save_resume_cursor(context, next_page_token)
+        return super().prepare_request(context, next_page_token)
+
+    def _request_listing(self, context: Context | None) -> t.Iterator[dict]:
+        """Request records, restarting the listing if a saved cursor is rejected."""
+        self._resuming = False
+        try:
+            yield from super().request_records(context)
+        except FatalAPIError:
+            if not self._resuming:
+                raise
+            self.logger.warning(
+                "The saved cursor of '%s' was rejected, restarting the listing.",
+                self.name,
+            )
+            self.get_context_state(context).pop(RESUME_CURSOR_KEY, None)
+            self._resuming = False
+            yield from super().request_records(context)
+
+    def request_pages(self, context: Context | None) -> t.Iterator[tuple[list[dict], int]]:
+        """Request the pages of a listing, without emitting anything.
+
+        Unlike `request_records`, this is safe to run in a background thread.
+
+        Args:
+            context: Stream partition or context dictionary.
+
+        Yields:
+            The records of each page, with their estimated size in memory.
+        """
+        paginator = self.get_new_paginator()
+        decorated_request = self.request_decorator(self._request)
+        while not paginator.finished:
+            prepared_request = self.prepare_request(
+                context,
+                next_page_token=paginator.current_value,
+            )
+            response = decorated_request(prepared_request, context)
+            records = list(self.parse_response(response))
+            if not records and not paginator.continue_if_empty(response):
+                return
+            yield records, page_size(records)
+            paginator.advance(response)
+
+    def get_lookup_id(self, key: str) -> str:
+        """Return the Graph API id of an object named in the ``lookup_ids`` setting.
+
+        Args:
+            key: The configured key of the object.
+
+        Returns:
+            The object's id.
+        """
+        return key
+
+    @cached_property
+    def lookup_ids(self) -> list[str]:
+        """The ids of the objects to look up instead of listing the collection."""
+        if not self.supports_lookup:
+            return []
+        keys = (self.config.get("lookup_ids") or {}).get(self.name) or []
+        return list(dict.fromkeys(self.get_lookup_id(key) for key in keys))
+
+    def _request_lookup(self, ids: list[str]) -> t.Iterator[tuple[list[dict], int]]:
+        """Request a chunk of objects by id, in a single request.
+
+        Like `request_pages`, this is safe to run in a background thread.
+        """
+        version: str = self.config["api_version"]
+        prepared_request = self.build_prepared_request(
+            method="GET",
+            url=f"https://graph.facebook.com/{version}/",
+            params={"ids": ",".join(ids), "fields": ",".join(self.columns)},  # type: ignore[attr-defined]
+            headers=self.http_headers,
+        )
+        response = self.request_decorator(self._request)(prepared_request, None)
+        payload = self.decode_response(response)
+        missing = [object_id for object_id in ids if object_id not in payload]
+        if missing:
+            self.logger.warning("Objects of '%s' not found: %s", self.name, missing)
+        records = self.record_transformer.transform(
+            [payload[object_id] for object_id in ids if object_id in payload],
+        )
+        yield records, page_size(records)
+
+    def request_lookups(self, ids: list[str]) -> t.Iterator[dict]:
+        """Request objects by id, in chunks sent concurrently.
+
+        Up to `LOOKUP_CONCURRENCY` chunks are requested ahead of emission, sharing
+        the ``max_buffer_mb`` budget. Without a budget, each chunk is requested as
+        it is emitted.
+
+        Args:
+            ids: The ids of the objects.
+
+        Yields:
+            The objects, in the order of their ids.
+        """
+        chunks = [
+            ids[start : start + LOOKUP_CHUNK_SIZE]
+            for start in range(0, len(ids), LOOKUP_CHUNK_SIZE)
+        ]
+        max_bytes = int(self.config.get("max_buffer_mb", 0) * 1024 * 1024) // LOOKUP_CONCURRENCY
+        concurrency = LOOKUP_CONCURRENCY if max_bytes else 1
+        pending: collections.deque[t.Iterator[tuple[list[dict], int]]] = collections.deque()
+        for chunk in chunks:
+            pages = self._request_lookup(chunk)
+            if max_bytes:
+                pages = prefetch(pages, max_bytes=max_bytes, size=itemgetter(1))
+            pending.append(pages)
+            if len(pending) >= concurrency:
+                for records, _ in pending.popleft():
+                    yield from records
+        while pending:
+            for records, _ in pending.popleft():
+                yield from records
+
+    def _increment_stream_state(
+        self,
+        latest_record: Record,
+        *,
+        context: Context | None = None,
+    ) -> None:
+        """Advance the bookmark, unless the records were looked up by id.
+
+        Looked up objects are not a listing, so they leave the bookmark unchanged.
+
+        Args:
+            latest_record: The record just emitted.
+            context: Stream partition or context dictionary.
+        """
+        if self.lookup_ids:
+            return
+        super()._increment_stream_state(latest_record, context=context)
+
+    def plan_sync(self) -> dict:
+        """Estimate the work of the next sync, without requesting any data.
+
+        Returns:
+            The number of listings, and the expected requests, rate limit tokens and
+            seconds, scaled from the last sync. Looked up objects need one request
+            per chunk.
+        """
+        if self.lookup_ids:
+            requests: float | None = math.ceil(len(self.lookup_ids) / LOOKUP_CHUNK_SIZE)
+            seconds = None
+        else:
+            requests, seconds = scale_timings(self.stream_state, 1)
+        return {
+            "listings": len(self.partitions) if self.partitions else 1,
+            "requests": requests,
+            "rate_limit_tokens": requests,
+            "seconds": seconds,
+        }
+
+    @property
+    def _has_timestamp_replication_key(self) -> bool:
+        """Whether the replication key is a timestamp, rather than an id.
+
+        Most timestamps are declared as plain strings in the schemas, but the Graph
+        API names all of them ``*_time``.
+        """
+        if not self.replication_key:
+            return False
+        return self.is_timestamp_replication_key or self.replication_key.endswith("_time")
+
+    def get_end_timestamp(self) -> pendulum.DateTime | None:
+        """Return the exclusive upper bound of the replication key, from ``end_date``.
+
+        Like the insights streams, the whole day of ``end_date`` is synced.
+
+        Returns:
+            The start of the day after ``end_date``, or None if it is not set or the
+            replication key is not a timestamp.
+        """
+        end_date = self.config.get("end_date")
+        if not end_date or not self._has_timestamp_replication_key:
+            return None
+        end = t.cast("pendulum.DateTime", pendulum.parse(end_date))
+        return end.start_of("day").add(days=1)
+
+    def request_records(self, context: Context | None) -> t.Iterable[dict]:
+        """Request records, stopping once the replication key passes ``end_date``.
+
+        Listings are sorted by the replication key, so the first record past the end
+        means that no later page is needed. Objects named in ``lookup_ids`` are
+        looked up by id instead of listing the collection. Complete listings record
+        their timings in the state, to plan later syncs.
+
+        Args:
+            context: Stream partition or context dictionary.
+
+        Yields:
+            An item for every record in the response.
+        """
+        if self.lookup_ids:
+            yield from self.request_lookups(self.lookup_ids)
+            return
+        started = time.monotonic()
+        requests_sent = self._requests_sent
+        end = self.get_end_timestamp()
+        for record in self._request_listing(context):
+            value = record.get(self.replication_key) if end is not None else None
+            if value is not None and pendulum.parse(value) >= end:  # type: ignore[operator]
+                self.logger.info("Reached the end date of '%s', stopping.", self.name)
+                break
+            yield record
+        state = self.get_context_state(context)
+        state.pop(RESUME_CURSOR_KEY, None)
+        if context is None:
+            record_timings(
+                state,
+                units=1,
+                requests=self._requests_sent - requests_sent,
+                started=started,
+            )
+
+    def parse_response(self, response: requests.Response) -> t.Iterable[Record]:
+        """Parse a page of records and coerce their numeric fields as a batch.
+
+        Args:
+            response: The HTTP ``requests.Response`` object.
+
+        Returns:
+            The page's records.
+        """
+        self._resuming = False
+        records = extract_jsonpath(self.records_jsonpath, input=self.decode_response(response))
+        if not self.record_transformer:
+            return records
+        return self.record_transformer.transform(list(records))
+
     def get_next_page_token(
         self,
         response: requests.Response,
@@ -67,7 +526,7 @@ class FacebookStream(RESTStream):
 
         all_matches = extract_jsonpath(
             self.next_page_token_jsonpath,
-            response.json(),
+            self.decode_response(response),
         )
         return next(iter(all_matches), None)
 
@@ -123,6 +582,9 @@ class FacebookStream(RESTStream):
                 response.status_code == HTTPStatus.BAD_REQUEST
                 and "request limit reached" in str(response.content).lower()
             ):
+                # Pause the other processes sharing the budget too.
+                if self._rate_limiter is not None:
+                    self._rate_limiter.drain()
                 raise RetriableAPIError(msg, response)
 
             raise FatalAPIError(msg)
@@ -146,11 +608,93 @@ class FacebookStream(RESTStream):
 
 
 class IncrementalFacebookStream(FacebookStream, metaclass=abc.ABCMeta):
+    # Backfill slices are partitions of the same listing, and share its bookmark.
+    state_partitioning_keys: t.ClassVar[list[str]] = []
+
+    # The pages of each backfill slice, keyed by its bounds.
+    _slice_pages: dict[tuple[int, int | None], t.Iterator[tuple[list[dict], int]]] | None = None
+    # When the backfill slices started, as returned by `time.monotonic`.
+    _slices_started = 0.0
+
     @property
     @abc.abstractmethod
     def filter_entity(self) -> str:
         """The entity to filter on."""
 
+    @cached_property
+    def partitions(self) -> list[dict] | None:
+        """Split the first sync of the stream into ``backfill_slices`` time ranges.
+
+        Each slice holds the exclusive bounds of its range, as Unix timestamps. The
+        last slice is only bounded by ``end_date``.
+
+        Returns:
+            The slices, or None if the stream is synced as a single listing.
+        """
+        slices = self.config.get("backfill_slices", 1)
+        start_date = self.config.get("start_date")
+        if slices <= 1 or not start_date or "replication_key_value" in self.stream_state:
+            return None
+        start = int(pendulum.parse(start_date).timestamp())  # type: ignore[union-attr]
+        end = self.get_end_timestamp()
+        stop = int((end or pendulum.now("UTC")).timestamp())
+        bounds = [start + (stop - start) * index // slices for index in range(slices + 1)]
+        return [
+            {
+                # Each slice after the first starts at its bound, inclusive.
+                "since": since if index == 0 else since - 1,
+                "until": until if end or index < slices - 1 else None,
+            }
+            for index, (since, until) in enumerate(itertools.pairwise(bounds))
+        ]
+
+    @cached_property
+    def status_sweep_started_at(self) -> pendulum.DateTime | None:
+        """The start of this sync if it lists every status despite ``effective_status``.
+
+        Objects that leave the configured statuses, such as archived ads, are only
+        synced by these sweeps, every ``status_sweep_interval_hours``.
+        """
+        if not self.config.get("effective_status"):
+            return None
+        interval = self.config.get("status_sweep_interval_hours")
+        if interval is None:
+            return None
+        now = pendulum.now("UTC")
+        sweep = self.stream_state.get(STATUS_SWEEP_KEY)
+        if sweep:
+            synced_at = t.cast("pendulum.DateTime", pendulum.parse(sweep["synced_at"]))
+            if synced_at.add(hours=interval) > now:
+                return None
+        self.logger.info("Listing '%s' objects of every effective status.", self.name)
+        return now
+
+    def _get_filter_bounds(self, context: Context | None) -> tuple[int, int | None]:
+        """Return the exclusive bounds of the replication key to list."""
+        if context is not None:
+            return context["since"], context["until"]
+        start = self.get_starting_replication_key_value(context)
+        sweep = self.stream_state.get(STATUS_SWEEP_KEY)
+        if self.status_sweep_started_at and sweep:
+            # Sweeps also list the objects updated since the previous sweep that
+            # left the configured statuses.
+            start = min(start, sweep["replication_key_value"], key=pendulum.parse)
+        ts = pendulum.parse(start)  # type: ignore[arg-type]
+        end = self.get_end_timestamp()
+        return int(ts.timestamp()), None if end is None else int(end.timestamp())  # type: ignore[union-attr]
+
+    def _complete_listing(self) -> None:
+        """Record the completion of a status sweep in the stream state."""
+        started_at = self.status_sweep_started_at
+        if started_at is None:
+            return
+        end = self.get_end_timestamp()
+        self.stream_state[STATUS_SWEEP_KEY] = {
+            "synced_at": started_at.isoformat(),
+            # Objects updated after the sweep started may not have been listed.
+            "replication_key_value": min(started_at, end or started_at).isoformat(),
+        }
+
     def get_url_params(
         self,
         context: Context | None,
@@ -171,15 +715,81 @@ class IncrementalFacebookStream(FacebookStream, metaclass=abc.ABCMeta):
         if self.replication_key:
             params["sort"] = "asc"
             params["order_by"] = self.replication_key
-            ts = pendulum.parse(self.get_starting_replication_key_value(context))  # type: ignore[arg-type]
-            params["filtering"] = json.dumps(
-                [
+            since, until = self._get_filter_bounds(context)
+            filtering = [
+                {
+                    "field": f"{self.filter_entity}.{self.replication_key}",
+                    "operator": "GREATER_THAN",
+                    "value": since,
+                },
+            ]
+            if until is not None:
+                filtering.append(
                     {
                         "field": f"{self.filter_entity}.{self.replication_key}",
-                        "operator": "GREATER_THAN",
-                        "value": int(ts.timestamp()),  # type: ignore[union-attr]
+                        "operator": "LESS_THAN",
+                        "value": until,
                     },
-                ],
-            )
+                )
+            statuses = self.config.get("effective_status")
+            if statuses and not self.status_sweep_started_at:
+                filtering.append(
+                    {
+                        "field": f"{self.filter_entity}.effective_status",
+                        "operator": "IN",
+                        "value": statuses,
+                    },
+                )
+            params["filtering"] = json.dumps(filtering)
 
         return params
+
+    def _start_slices(self) -> dict[tuple[int, int | None], t.Iterator[tuple[list[dict], int]]]:
+        """Start paging every backfill slice, each in a background thread.
+
+        The ``max_buffer_mb`` budget is shared between the slices. Without a budget,
+        each slice is paged as it is emitted.
+        """
+        self._slices_started = time.monotonic()
+        slices = self.partitions or []
+        max_bytes = int(self.config.get("max_buffer_mb", 0) * 1024 * 1024) // len(slices)
+        pages = {}
+        for context in slices:
+            key = (context["since"], context["until"])
+            pages[key] = self.request_pages(context)
+            if max_bytes:
+                pages[key] = prefetch(pages[key], max_bytes=max_bytes, size=itemgetter(1))
+        return pages
+
+    def request_records(self, context: Context | None) -> t.Iterable[dict]:
+        """Request records, listing backfill slices concurrently.
+
+        Slices are emitted in order, so the bookmark advances once each of them has
+        been emitted.
+
+        Args:
+            context: Stream partition or context dictionary.
+
+        Yields:
+            An item for every record in the response.
+        """
+        if context is None:
+            yield from super().request_records(context)
+            self._complete_listing()
+            return
+        if self._slice_pages is None:
+            self._slice_pages = self._start_slices()
+        for records, _ in self._slice_pages.pop((context["since"], context["until"])):
+            yield from records
+        if not self._slice_pages:
+            self._complete_listing()
+            record_timings(
+                self.stream_state,
+                units=1,
+                requests=self._requests_sent,
+                started=self._slices_started,
+            )
+        # The slices before this one have completed too.
+        if self.checkpoints_listings:
+            self._finalize_state(self.stream_state)
+            self._write_checkpoint_state()
@@ -0,0 +1,155 @@
+"""Helpers for fetching ahead of emission within a bounded memory budget."""
+
+from __future__ import annotations
+
+import collections
+import json
+import threading
+import typing as t
+
+if t.TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+T = t.TypeVar("T")
+
+_END = object()
+
+# Decoded API records take about five times as much memory as their JSON.
+DECODED_SIZE_FACTOR = 5
+
+
+def page_size(rows: list[dict]) -> int:
+    """Estimate the memory held by a page of rows from the JSON size of its first row.
+
+    Args:
+        rows: The decoded rows of a page.
+
+    Returns:
+        The estimated size, in bytes.
+    """
+    if not rows:
+        return 0
+    return len(json.dumps(rows[0], default=str)) * len(rows) * DECODED_SIZE_FACTOR
+
+
+class BoundedBuffer(t.Generic[T]):
+    """A FIFO queue that holds items up to a total estimated size.
+
+    Producers block in `put` while the buffer is full, which is how backpressure
+    from a slow consumer reaches them. An item larger than the whole budget is still
+    accepted once the buffer is empty, so a single oversized item cannot deadlock.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """Initialize the buffer.
+
+        Args:
+            max_bytes: The maximum total size of the buffered items.
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: collections.deque[tuple[T, int]] = collections.deque()
+        self._finished = False
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def put(self, item: T, size: int) -> bool:
+        """Add an item, blocking while the buffer is full.
+
+        Args:
+            item: The item.
+            size: The estimated size of the item, in bytes.
+
+        Returns:
+            False if the consumer has closed the buffer and the item was dropped.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._closed or not self._items or self.size + size <= self.max_bytes,
+            )
+            if self._closed:
+                return False
+            self._items.append((item, size))
+            self.size += size
+            self._condition.notify_all()
+            return True
+
+    def get(self) -> T | object:
+        """Remove and return the oldest item, blocking while the buffer is empty.
+
+        Returns:
+            The item, or a sentinel once the producer has finished and every item
+            has been returned.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._items or self._finished or self._closed)
+            if not self._items:
+                return _END
+            item, size = self._items.popleft()
+            self.size -= size
+            self._condition.notify_all()
+            return item
+
+    def finish(self) -> None:
+        """Signal that no more items will be added."""
+        with self._condition:
+            self._finished = True
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        """Drop the buffered items and stop accepting new ones."""
+        with self._condition:
+            self._closed = True
+            self._items.clear()
+            self.size = 0
+            self._condition.notify_all()
+
+
+def prefetch(
+    items: Iterable[T],
+    *,
+    max_bytes: int,
+    size: Callable[[T], int],
+) -> Iterator[T]:
+    """Consume ``items`` in a background thread, yielding them in order.
+
+    The thread starts right away and runs ahead of the caller until ``max_bytes``
+    worth of items are waiting to be consumed, then pauses until the caller catches
+    up. Exceptions raised while producing are re-raised once the items before them
+    are consumed.
+
+    Args:
+        items: The items, typically pages fetched over the network.
+        max_bytes: The maximum estimated size of items fetched ahead.
+        size: Returns the estimated size of an item, in bytes.
+
+    Returns:
+        An iterator of the items.
+    """
+    buffer: BoundedBuffer[T] = BoundedBuffer(max_bytes)
+    errors: list[BaseException] = []
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not buffer.put(item, size(item)):
+                    return
+        except BaseException as e:  # noqa: BLE001
+            errors.append(e)
+        finally:
+            buffer.finish()
+
+    thread = threading.Thread(target=produce, name="tap-facebook-prefetch", daemon=True)
+    thread.start()
+    return _consume(buffer, errors)
+
+
+def _consume(buffer: BoundedBuffer[T], errors: list[BaseException]) -> Iterator[T]:
+    """Yield the items of a prefetch buffer, then raise the producer's error."""
+    try:
+        while (item := buffer.get()) is not _END:
+            yield t.cast("T", item)
+        if errors:
+            raise errors[0]
+    finally:
+        buffer.close()
@@ -0,0 +1,328 @@
+"""Record conformers compiled once per stream schema."""
+
+from __future__ import annotations
+
+import decimal
+import math
+import typing as t
+from functools import cached_property
+
+import singer_sdk.singerlib as singer
+from singer_sdk.batch import Batcher
+from singer_sdk.helpers._batch import BatchFileFormat
+from singer_sdk.helpers._typing import (
+    TypeConformanceLevel,
+    _conform_primitive_property,
+    _is_exclusive_boolean_type,
+    is_object_type,
+    is_uniform_list,
+)
+from singer_sdk.helpers._util import utc_now
+from singer_sdk.streams.core import Stream
+
+from tap_facebook.batch import ParquetBatcher
+
+if t.TYPE_CHECKING:
+    import logging
+
+    from singer_sdk.batch import BaseBatcher
+    from singer_sdk.helpers._batch import BaseBatchFileEncoding, BatchConfig
+    from singer_sdk.helpers.types import Context, Record
+    from singer_sdk.singerlib.catalog import SelectionMask
+
+Breadcrumb = tuple[str, ...]
+Converter = t.Callable[[t.Any, list[str]], t.Any]
+
+# Values of these types are already JSON compatible and never need converting.
+_JSON_SCALARS = frozenset({str, int, bool, type(None)})
+_BOOLEAN_SCALARS = frozenset({bool, type(None)})
+
+
+def _conform_scalar(value: t.Any, property_schema: dict) -> t.Any:  # noqa: ANN401
+    if value.__class__ is decimal.Decimal:
+        return value if value.is_finite() else None
+    if value.__class__ is float:
+        return value if math.isfinite(value) else None
+    return _conform_primitive_property(value, property_schema)
+
+
+class _Pruner:
+    """Remove deselected properties from a record and its nested objects in place."""
+
+    def __init__(self, deselected: frozenset[str], nested: dict[str, _Pruner]) -> None:
+        self.deselected = deselected
+        self.nested = nested
+
+    @classmethod
+    def compile(
+        cls,
+        schema: dict,
+        mask: SelectionMask,
+        breadcrumb: Breadcrumb = (),
+    ) -> _Pruner | None:
+        """Return a pruner for ``schema``, or None if everything is selected."""
+        deselected = set()
+        nested = {}
+        for name, property_schema in schema.get("properties", {}).items():
+            property_breadcrumb = (*breadcrumb, "properties", name)
+            if not mask[property_breadcrumb]:
+                deselected.add(name)
+            elif pruner := cls.compile(property_schema, mask, property_breadcrumb):
+                nested[name] = pruner
+        if not deselected and not nested:
+            return None
+        return cls(frozenset(deselected), nested)
+
+    def __call__(self, record: dict) -> dict:
+        for name in self.deselected.intersection(record):
+            del record[name]
+        for name, pruner in self.nested.items():
+            value = record.get(name)
+            if isinstance(value, dict):
+                pruner(value)
+        return record
+
+
+class _ObjectConformer:
+    """Conform the properties of an object against a pre-compiled schema."""
+
+    def __init__(
+        self,
+        schema: dict,
+        *,
+        level: TypeConformanceLevel,
+        mask: SelectionMask | None,
+        breadcrumb: Breadcrumb = (),
+        path: str | None = None,
+    ) -> None:
+        self.path = path
+        self.additional_properties = bool(schema.get("additionalProperties"))
+        self.deselected: set[str] = set()
+        self.converters: dict[str, tuple[frozenset, Converter]] = {}
+        for name, property_schema in schema.get("properties", {}).items():
+            property_breadcrumb = (*breadcrumb, "properties", name)
+            if mask is not None and not mask[property_breadcrumb]:
+                self.deselected.add(name)
+                continue
+            property_path = name if path is None else f"{path}.{name}"
+            passthrough = (
+                _BOOLEAN_SCALARS if _is_exclusive_boolean_type(property_schema) else _JSON_SCALARS
+            )
+            converter = self._compile_property(
+                property_schema,
+                level=level,
+                mask=mask,
+                breadcrumb=property_breadcrumb,
+                path=property_path,
+            )
+            self.converters[name] = (passthrough, converter)
+
+    @staticmethod
+    def _compile_items(item_schema: dict, *, level: TypeConformanceLevel, path: str) -> Converter:
+        item_conformer = (
+            _ObjectConformer(item_schema, level=level, mask=None, path=path)
+            if is_object_type(item_schema)
+            else None
+        )
+
+        def convert_items(values: list, unmapped: list[str]) -> list:
+            return [
+                item_conformer(value, unmapped)
+                if item_conformer is not None and isinstance(value, dict)
+                else _conform_scalar(value, item_schema)
+                for value in values
+            ]
+
+        return convert_items
+
+    @classmethod
+    def _compile_property(
+        cls,
+        property_schema: dict,
+        *,
+        level: TypeConformanceLevel,
+        mask: SelectionMask | None,
+        breadcrumb: Breadcrumb,
+        path: str,
+    ) -> Converter:
+        recursive = level == TypeConformanceLevel.RECURSIVE
+        items: Converter | None = None
+        if recursive and is_uniform_list(property_schema):
+            items = cls._compile_items(property_schema["items"], level=level, path=path)
+
+        obj: Converter | None = None
+        if is_object_type(property_schema) and "properties" in property_schema:
+            if recursive:
+                obj = cls(property_schema, level=level, mask=mask, breadcrumb=breadcrumb, path=path)
+            elif mask is not None and (
+                pruner := _Pruner.compile(property_schema, mask, breadcrumb)
+            ):
+                # Below the root, only deselected properties are removed.
+                obj = lambda value, _: pruner(value)  # noqa: E731
+
+        def convert(value: t.Any, unmapped: list[str]) -> t.Any:  # noqa: ANN401
+            if isinstance(value, list):
+                return items(value, unmapped) if items is not None else value
+            if isinstance(value, dict) and obj is not None:
+                return obj(value, unmapped)
+            return _conform_scalar(value, property_schema)
+
+        return convert
+
+    def __call__(self, record: dict, unmapped: list[str]) -> dict:
+        output = {}
+        converters = self.converters
+        for name, value in record.items():
+            try:
+                passthrough, convert = converters[name]
+            except KeyError:
+                if name in self.deselected:
+                    continue
+                if self.additional_properties:
+                    output[name] = value
+                else:
+                    unmapped.append(name if self.path is None else f"{self.path}.{name}")
+                continue
+            output[name] = value if value.__class__ in passthrough else convert(value, unmapped)
+        return output
+
+
+class RecordConformer:
+    """Prune and conform records to a stream schema, compiled once per stream.
+
+    This is equivalent to the SDK's ``pop_deselected_record_properties`` followed by
+    ``conform_record_data_types``, but the schema and selection mask are resolved
+    into a tree of per-property converters up front rather than walked for every
+    property of every record. Values that are already JSON compatible are copied
+    without any further type checks.
+    """
+
+    def __init__(
+        self,
+        schema: dict,
+        mask: SelectionMask,
+        *,
+        level: TypeConformanceLevel = TypeConformanceLevel.RECURSIVE,
+        stream_name: str,
+        logger: logging.Logger,
+    ) -> None:
+        """Compile the conformer.
+
+        Args:
+            schema: The stream's effective JSON schema.
+            mask: The stream's selection mask.
+            level: How deeply values are conformed.
+            stream_name: The stream name, used in warnings.
+            logger: Logger for unmapped property warnings.
+        """
+        self.stream_name = stream_name
+        self.logger = logger
+        self._warned: set[tuple[str, ...]] = set()
+        self._conformer: _ObjectConformer | None = None
+        self._pruner: _Pruner | None = None
+        if level == TypeConformanceLevel.NONE:
+            self._pruner = _Pruner.compile(schema, mask)
+        else:
+            self._conformer = _ObjectConformer(schema, level=level, mask=mask)
+
+    def conform(self, record: Record) -> Record:
+        """Return ``record`` pruned of deselected properties and conformed to JSON types.
+
+        Args:
+            record: A record as returned by the stream.
+
+        Returns:
+            The conformed record.
+        """
+        if self._conformer is None:
+            return self._pruner(record) if self._pruner is not None else record
+
+        unmapped: list[str] = []
+        output = self._conformer(record, unmapped)
+        if unmapped and (key := tuple(unmapped)) not in self._warned:
+            self._warned.add(key)
+            self.logger.warning(
+                "Properties %s were present in the '%s' stream but "
+                "not found in catalog schema. Ignoring.",
+                key,
+                self.stream_name,
+            )
+        return output
+
+
+class CompiledConformerMixin(Stream):
+    """Stream mixin emitting records, or batches of them, through a `RecordConformer`."""
+
+    @cached_property
+    def record_conformer(self) -> RecordConformer:
+        """The conformer compiled from this stream's effective schema and selection."""
+        return RecordConformer(
+            self.effective_schema,
+            self.mask,
+            level=self.TYPE_CONFORMANCE_LEVEL,
+            stream_name=self.name,
+            logger=self.logger,
+        )
+
+    def _generate_record_messages(
+        self,
+        record: Record,
+    ) -> t.Generator[singer.RecordMessage, None, None]:
+        """Write out a RECORD message.
+
+        Args:
+            record: A single stream record.
+
+        Yields:
+            Record message objects.
+        """
+        record = self.record_conformer.conform(record)
+        for stream_map in self.stream_maps:
+            mapped_record = stream_map.transform(record)
+            # Emit record if not filtered
+            if mapped_record is not None:
+                yield singer.RecordMessage(
+                    stream=stream_map.stream_alias,
+                    record=mapped_record,
+                    version=self._stream_version,
+                    time_extracted=utc_now(),
+                )
+
+    def get_batches(
+        self,
+        batch_config: BatchConfig,
+        context: Context | None = None,
+    ) -> t.Iterable[tuple[BaseBatchFileEncoding, list[str]]]:
+        """Write conformed records to batch files.
+
+        Unlike the SDK default, records are pruned and conformed to the schema before
+        they are written, and Parquet files share a schema derived from the stream's.
+
+        Args:
+            batch_config: Batch config for this stream.
+            context: Stream partition or context dictionary.
+
+        Yields:
+            A tuple of (encoding, manifest) for each batch.
+        """
+        batcher: BaseBatcher
+        if batch_config.encoding.format == BatchFileFormat.PARQUET:
+            schema = self.effective_schema
+            batcher = ParquetBatcher(
+                self.tap_name,
+                self.name,
+                batch_config,
+                schema={
+                    **schema,
+                    "properties": {
+                        name: property_schema
+                        for name, property_schema in schema.get("properties", {}).items()
+                        if self.mask["properties", name]
+                    },
+                },
+            )
+        else:
+            batcher = Batcher(self.tap_name, self.name, batch_config)
+        records = self._sync_records(context, write_messages=False)
+        for manifest in batcher.get_batches(map(self.record_conformer.conform, records)):
+            yield batch_config.encoding, manifest
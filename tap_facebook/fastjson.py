@@ -0,0 +1,142 @@
+"""msgspec-based JSON decoding and Singer message encoding.
+
+This module is only imported when the ``fast_json`` setting is enabled, and requires
+the ``fast-json`` extra. Everything here produces exactly the same Python objects and
+output bytes as the default ``json``/``simplejson`` code paths it replaces.
+"""
+
+from __future__ import annotations
+
+import decimal
+import sys
+import typing as t
+
+import msgspec
+from singer_sdk.singerlib import RecordMessage
+from singer_sdk.singerlib.encoding.base import GenericSingerWriter
+from singer_sdk.singerlib.json import serialize_json
+
+if t.TYPE_CHECKING:
+    from singer_sdk.singerlib.encoding.simple import Message
+
+# Matches `response.json(parse_float=decimal.Decimal)`, used by the SDK's REST streams.
+_decimal_decoder = msgspec.json.Decoder(float_hook=decimal.Decimal)
+# Matches `json.loads`, used by the facebook_business SDK.
+_decoder = msgspec.json.Decoder()
+_encoder = msgspec.json.Encoder(decimal_format="number")
+
+# The range of floats that repr() writes without an exponent.
+_FIXED_NOTATION_MIN = 1e-4
+_FIXED_NOTATION_MAX = 1e16
+
+
+def _needs_fallback(value: t.Any) -> bool:  # noqa: ANN401
+    """Return True if msgspec might encode ``value`` differently from simplejson.
+
+    That is the case for floats that Python writes in exponent notation, which
+    msgspec writes as 0.00001 and 1e16 where simplejson writes 1e-05 and 1e+16, for
+    Decimal NaN and Infinity, which simplejson writes as null, and for any type that
+    is not plain JSON. Other Decimals are written with str() by both.
+    """
+    cls = value.__class__
+    if cls is str or cls is int or value is None or cls is bool:
+        return False
+    if cls is dict:
+        return any(_needs_fallback(item) for item in value.values())
+    if cls is list:
+        return any(_needs_fallback(item) for item in value)
+    if cls is float:
+        return not (value == 0 or _FIXED_NOTATION_MIN <= abs(value) < _FIXED_NOTATION_MAX)
+    if cls is decimal.Decimal:
+        return not value.is_finite()
+    return True
+
+
+def decode_json(data: bytes | str, *, use_decimal: bool = True) -> t.Any:  # noqa: ANN401
+    """Decode a JSON document.
+
+    Args:
+        data: The JSON document.
+        use_decimal: Decode floats as `decimal.Decimal`, like the SDK does for REST
+            responses, rather than as `float` like `json.loads`.
+
+    Returns:
+        The decoded document.
+    """
+    return (_decimal_decoder if use_decimal else _decoder).decode(data)
+
+
+def export_value(value: t.Any) -> t.Any:  # noqa: ANN401
+    """Drop null values from nested objects, like ``AbstractObject.export_all_data``.
+
+    Args:
+        value: A decoded JSON value.
+
+    Returns:
+        The value with None removed from every object.
+    """
+    if isinstance(value, dict):
+        return {
+            key: item if item.__class__ is str else export_value(item)
+            for key, item in value.items()
+            if item is not None
+        }
+    if isinstance(value, list):
+        return [item if item.__class__ is str else export_value(item) for item in value]
+    return value
+
+
+def serialize_record(message: RecordMessage) -> bytes:
+    """Serialize a RECORD message, byte-for-byte like the SDK's default writer.
+
+    Args:
+        message: The record message.
+
+    Returns:
+        The serialized message, without a trailing newline.
+    """
+    message_dict = message.to_dict()
+    if _needs_fallback(message.record):
+        return serialize_json(message_dict).encode()
+    if message.time_extracted is not None:
+        # The SDK writes datetimes with isoformat(), where msgspec would use "Z".
+        message_dict["time_extracted"] = message.time_extracted.isoformat(sep="T")
+    data = _encoder.encode(message_dict)
+    # simplejson escapes non-ASCII characters and DEL, msgspec writes them as is.
+    if not data.isascii() or b"\x7f" in data:
+        return serialize_json(message_dict).encode()
+    return data
+
+
+class FastSingerWriter(GenericSingerWriter[bytes, "Message"]):
+    """Write Singer messages to stdout, encoding records with msgspec.
+
+    Non-record messages are rare and are serialized by the SDK's default encoder.
+    Records are written to the buffered stdout without flushing; the buffer is
+    flushed with the next non-record message, so every STATE message still reaches
+    the target after the records it covers.
+    """
+
+    def serialize_message(self, message: Message) -> bytes:
+        """Serialize a message into a line of json.
+
+        Args:
+            message: A Singer message object.
+
+        Returns:
+            The serialized message.
+        """
+        if isinstance(message, RecordMessage):
+            return serialize_record(message)
+        return serialize_json(message.to_dict()).encode()
+
+    def write_message(self, message: Message) -> None:
+        """Write a message to stdout.
+
+        Args:
+            message: The message to write.
+        """
+        stdout = sys.stdout.buffer
+        stdout.write(self.format_message(message) + b"\n")
+        if not isinstance(message, RecordMessage):
+            stdout.flush()
@@ -0,0 +1,56 @@
+"""Joining the rows of reports that each hold some of the columns of the same rows."""
+
+from __future__ import annotations
+
+import itertools
+import json
+import sqlite3
+import typing as t
+from operator import itemgetter
+
+if t.TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+
+# Rows are inserted into the join table this many at a time.
+INSERT_BATCH_SIZE = 1000
+
+
+def join_rows(parts: Iterable[Iterable[dict]], keys: Sequence[str]) -> Iterator[dict]:
+    """Merge rows with the same values of ``keys`` across ``parts``.
+
+    Each part is read in full before the next one. Rows are held in a temporary
+    SQLite database, which SQLite keeps in memory while it is small and spills to a
+    temporary file as it grows, so the memory used does not depend on the number of
+    rows. Rows missing from some of the parts are merged from the others.
+
+    Args:
+        parts: The rows of each part, which share ``keys`` and split the remaining
+            columns between them.
+        keys: The columns identifying a row.
+
+    Yields:
+        The merged rows, ordered by their keys.
+    """
+    # An empty name opens a private database that is deleted once closed.
+    database = sqlite3.connect("")
+    try:
+        database.execute("CREATE TABLE rows (key TEXT, part INTEGER, row TEXT)")
+        for index, rows in enumerate(parts):
+            records = (
+                (
+                    json.dumps([row.get(key) for key in keys], default=str),
+                    index,
+                    json.dumps(row, default=str),
+                )
+                for row in rows
+            )
+            while batch := list(itertools.islice(records, INSERT_BATCH_SIZE)):
+                database.executemany("INSERT INTO rows VALUES (?, ?, ?)", batch)
+        cursor = database.execute("SELECT key, row FROM rows ORDER BY key, part")
+        for _, group in itertools.groupby(cursor, key=itemgetter(0)):
+            merged: dict = {}
+            for _, row in group:
+                merged.update(json.loads(row))
+            yield merged
+    finally:
+        database.close()
@@ -0,0 +1,111 @@
+"""Planning of a sync's work, without requesting any data.
+
+Every stream records in its state how many requests its last sync made and how
+long it took. The planner scales those timings to the work of the next sync, which
+each stream estimates from the config, catalog and state in its ``plan_sync``
+method: report windows and insights jobs for insights streams, listings or lookups
+for entity streams.
+"""
+
+from __future__ import annotations
+
+import time
+import typing as t
+
+if t.TYPE_CHECKING:
+    from singer_sdk import Tap
+
+# The stream state key holding the timings of the stream's last sync.
+TIMINGS_KEY = "timings"
+
+
+def record_timings(state: dict, *, units: int, requests: int, started: float) -> None:
+    """Record the timings of a sync in the stream's state.
+
+    Args:
+        state: The stream state.
+        units: The units of work synced, such as report windows.
+        requests: The number of API requests made.
+        started: When the sync started, as returned by `time.monotonic`.
+    """
+    state[TIMINGS_KEY] = {
+        "units": units,
+        "requests": requests,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+
+
+def scale_timings(state: t.Mapping, units: int) -> tuple[float | None, float | None]:
+    """Scale the timings of the last sync to ``units`` of work.
+
+    Args:
+        state: The stream state.
+        units: The units of work to sync.
+
+    Returns:
+        The expected number of requests and seconds, or None for both if the
+        stream has no timings yet.
+    """
+    timings = state.get(TIMINGS_KEY)
+    if not timings or not timings["units"]:
+        return None, None
+    ratio = units / timings["units"]
+    return timings["requests"] * ratio, timings["seconds"] * ratio
+
+
+class SyncPlanner:
+    """Estimate the work of a sync from the tap's config, catalog and state."""
+
+    def __init__(self, tap: Tap) -> None:
+        """Initialize the planner.
+
+        Args:
+            tap: The tap to plan the sync of.
+        """
+        self.tap = tap
+
+    def plan(self) -> dict:
+        """Plan the sync of every selected stream.
+
+        Returns:
+            The plan of each stream, and the totals of the sync. Estimates that
+            need the timings of an earlier sync are None for streams without them,
+            and the jobs of insights streams sharded by campaign are None.
+        """
+        streams = []
+        for stream in self.tap.streams.values():
+            if stream.parent_stream_type or not (
+                stream.selected or stream.has_selected_descendents
+            ):
+                continue
+            streams.append({"stream": stream.name, **stream.plan_sync()})  # type: ignore[attr-defined]
+
+        def total(key: str) -> float:
+            return round(sum(plan[key] for plan in streams if plan.get(key) is not None), 3)
+
+        config = self.tap.config
+        # Streams are spread across worker processes, and each insights stream
+        # across up to that many date ranges.
+        wall_seconds = total("seconds") / config.get("sync_processes", 1)
+        if config.get("rate_limit_dir"):
+            wall_seconds = max(
+                wall_seconds,
+                total("rate_limit_tokens") * 60 / config["rate_limit_calls_per_minute"],
+            )
+        return {
+            "streams": streams,
+            "totals": {
+                "windows": total("windows"),
+                "jobs": total("jobs"),
+                "requests": total("requests"),
+                "rate_limit_tokens": total("rate_limit_tokens"),
+                "seconds": total("seconds"),
+                "wall_seconds": round(wall_seconds, 3),
+                "streams_without_timings": [
+                    plan["stream"] for plan in streams if plan["seconds"] is None
+                ],
+                "streams_without_job_counts": [
+                    plan["stream"] for plan in streams if "jobs" in plan and plan["jobs"] is None
+                ],
+            },
+        }
@@ -0,0 +1,246 @@
+"""A sampling profiler that attributes sync time to streams and phases.
+
+A background thread samples the stack of every thread at a fixed interval. Samples of
+the thread running the sync are attributed to the stream being synced and to a phase,
+from the functions on the stack. Every sample is also recorded as a folded stack, the
+input format of flamegraph tools such as ``flamegraph.pl``, inferno and speedscope.
+The worker processes of a sharded sync profile their own syncs, which are merged into
+the profile of the coordinating process.
+"""
+
+from __future__ import annotations
+
+import collections
+import sys
+import threading
+import time
+import typing as t
+from pathlib import Path
+
+if t.TYPE_CHECKING:
+    import logging
+    from types import FrameType, TracebackType
+
+SAMPLE_INTERVAL_SECONDS = 0.005
+
+# Phases and the functions that identify them, as "<module>:<function>". A sample
+# is attributed to the first phase with a function on the stack, so validation,
+# which runs while writing records, is listed before writing.
+PHASES: tuple[tuple[str, frozenset[str]], ...] = (
+    ("wait", frozenset({"ad_insights:_wait_for_job"})),
+    ("validate", frozenset({"_typing:conform_record_data_types", "conform:conform"})),
+    ("transform", frozenset({"transform:transform", "core:post_process"})),
+    (
+        "parse",
+        frozenset(
+            {
+                "client:decode_response",
+                "fastjson:decode_json",
+                "abstractobject:export_all_data",
+                "decoder:decode",
+            },
+        ),
+    ),
+    (
+        "write",
+        frozenset(
+            {
+                "core:_write_record_message",
+                "core:_write_batch_message",
+                "core:_write_schema_message",
+                "core:_write_state_message",
+                "sharding:handle_message",
+            },
+        ),
+    ),
+    (
+        "network",
+        frozenset(
+            {
+                "rest:_request",
+                "api:call",
+                # Waiting for pages fetched in the background.
+                "concurrency:get",
+            },
+        ),
+    ),
+)
+OTHER_PHASE = "other"
+NO_STREAM = "(none)"
+
+
+def _function(frame: FrameType) -> str:
+    """Return the "<module>:<function>" identifier of a frame's function."""
+    code = frame.f_code
+    return f"{Path(code.co_filename).stem}:{code.co_name}"
+
+
+def _describe(frame: FrameType) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class SyncProfiler:
+    """Sample a sync, attributing wall and CPU time to streams and phases.
+
+    CPU time is measured for the whole process, and attributed to the phase of the
+    sync thread between samples, so it includes the CPU time of background threads.
+    """
+
+    # The profiler sampling the sync of this process, if any. Sharded syncs also
+    # profile their worker processes and merge them into it.
+    active: t.ClassVar[SyncProfiler | None] = None
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_SECONDS) -> None:
+        """Initialize the profiler.
+
+        Args:
+            interval: The time between samples, in seconds.
+        """
+        self.interval = interval
+        self.wall: collections.defaultdict[tuple[str, str], float] = collections.defaultdict(float)
+        self.cpu: collections.defaultdict[tuple[str, str], float] = collections.defaultdict(float)
+        self.stacks: collections.Counter[str] = collections.Counter()
+        self._stopped = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self._target = threading.get_ident()
+
+    def __enter__(self) -> SyncProfiler:  # noqa: PYI034
+        """Start sampling the current thread.
+
+        Returns:
+            The profiler.
+        """
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stop sampling."""
+        self.stop()
+
+    def start(self) -> None:
+        """Start sampling the current thread."""
+        self._target = threading.get_ident()
+        self._stopped.clear()
+        self._sampler = threading.Thread(
+            target=self._run,
+            name="tap-facebook-profiler",
+            daemon=True,
+        )
+        self._sampler.start()
+        SyncProfiler.active = self
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        if SyncProfiler.active is self:
+            SyncProfiler.active = None
+
+    def export(self) -> tuple[dict, dict, dict]:
+        """Return the profile's samples, to merge them into another process's profile.
+
+        Returns:
+            The wall and CPU time of each stream and phase, and the sampled stacks.
+        """
+        return dict(self.wall), dict(self.cpu), dict(self.stacks)
+
+    def merge(self, wall: dict, cpu: dict, stacks: dict, *, process: str) -> None:
+        """Add the samples of another process's profile, as returned by `export`.
+
+        Args:
+            wall: The wall time of each stream and phase.
+            cpu: The CPU time of each stream and phase.
+            stacks: The sampled stacks.
+            process: The name of the process, prepended to its stacks.
+        """
+        for key, value in wall.items():
+            self.wall[key] += value
+        for key, value in cpu.items():
+            self.cpu[key] += value
+        for stack, count in stacks.items():
+            self.stacks[f"{process};{stack}"] += count
+
+    @staticmethod
+    def classify(frame: FrameType | None) -> tuple[str, str]:
+        """Return the stream and phase of a stack.
+
+        Args:
+            frame: The innermost frame of the stack.
+
+        Returns:
+            The name of the stream being synced and the phase.
+        """
+        stream = NO_STREAM
+        functions: set[str] = set()
+        while frame is not None:
+            function = _function(frame)
+            functions.add(function)
+            if function == "core:sync" and stream == NO_STREAM:
+                stream = frame.f_locals["self"].name
+            frame = frame.f_back
+        for phase, phase_functions in PHASES:
+            if not phase_functions.isdisjoint(functions):
+                return stream, phase
+        return stream, OTHER_PHASE
+
+    def _sample(self, wall: float, cpu: float) -> None:
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():  # noqa: SLF001
+            if ident == threading.get_ident():
+                continue
+            stack = []
+            current: FrameType | None = frame
+            while current is not None:
+                stack.append(_describe(current))
+                current = current.f_back
+            thread_name = thread_names.get(ident, str(ident))
+            self.stacks[";".join([thread_name, *reversed(stack)])] += 1
+            if ident == self._target:
+                key = self.classify(frame)
+                self.wall[key] += wall
+                self.cpu[key] += cpu
+
+    def _run(self) -> None:
+        last_wall = time.perf_counter()
+        last_cpu = time.process_time()
+        while not self._stopped.wait(self.interval):
+            wall, cpu = time.perf_counter(), time.process_time()
+            self._sample(wall - last_wall, cpu - last_cpu)
+            last_wall, last_cpu = wall, cpu
+
+    def write_folded(self, path: Path) -> None:
+        """Write the sampled stacks in the folded format of flamegraph tools.
+
+        Args:
+            path: The output file.
+        """
+        with path.open("w", encoding="utf-8") as output:
+            for stack, count in sorted(self.stacks.items()):
+                output.write(f"{stack} {count}\n")
+
+    def log_summary(self, logger: logging.Logger) -> None:
+        """Log the wall and CPU time of each stream and phase, slowest first.
+
+        Args:
+            logger: The logger.
+        """
+        total = sum(self.wall.values()) or 1.0
+        logger.info("%-32s %-10s %10s %10s %7s", "stream", "phase", "wall (s)", "cpu (s)", "wall %")
+        for (stream, phase), wall in sorted(self.wall.items(), key=lambda item: -item[1]):
+            logger.info(
+                "%-32s %-10s %10.2f %10.2f %6.1f%%",
+                stream,
+                phase,
+                wall,
+                self.cpu[stream, phase],
+                100 * wall / total,
+            )
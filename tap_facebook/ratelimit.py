@@ -0,0 +1,153 @@
+"""A rate limit budget shared by every tap process on the host.
+
+Processes that sync accounts of the same app or business draw from a single token
+bucket, kept in a file under ``rate_limit_dir`` and updated under an exclusive file
+lock. Each Graph API call takes a token, and each insights job submission takes
+`INSIGHTS_JOB_COST` more. When the bucket is empty, callers sleep until it has
+refilled, so together the processes stay under the configured rate instead of each
+backing off on its own once the API throttles them.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import time
+import typing as t
+from pathlib import Path
+
+from facebook_business.api import FacebookAdsApi
+
+if t.TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+# The bucket holds this many seconds worth of calls, which bounds the burst a
+# process can send after the budget has been idle.
+BURST_SECONDS = 10
+# Submitting an insights job weighs more on the app's usage than reading a page.
+INSIGHTS_JOB_COST = 5
+
+
+class SharedTokenBucket:
+    """A token bucket whose state lives in a file shared between processes."""
+
+    def __init__(self, path: str | os.PathLike[str], *, calls_per_minute: float) -> None:
+        """Initialize the bucket.
+
+        Args:
+            path: The file holding the bucket's state. Created if missing.
+            calls_per_minute: The rate at which the bucket refills.
+        """
+        self.path = Path(path)
+        self.rate = calls_per_minute / 60
+        self.capacity = max(1.0, self.rate * BURST_SECONDS)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[dict]:
+        """Hold the lock on the bucket's state, writing back changes to it."""
+        # File locks are only available on POSIX systems.
+        import fcntl  # noqa: PLC0415
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            with os.fdopen(os.dup(fd), "r+", encoding="utf-8") as file:
+                try:
+                    state = json.loads(file.read() or "{}")
+                except json.JSONDecodeError:
+                    state = {}
+                now = time.time()
+                tokens = state.get("tokens", self.capacity)
+                elapsed = max(0.0, now - state.get("updated_at", now))
+                state = {"tokens": min(self.capacity, tokens + elapsed * self.rate)}
+                yield state
+                state["updated_at"] = now
+                file.seek(0)
+                file.truncate()
+                file.write(json.dumps(state))
+        finally:
+            os.close(fd)
+
+    def acquire(self, cost: float = 1) -> float:
+        """Take ``cost`` tokens, sleeping until the bucket holds enough of them.
+
+        Args:
+            cost: The number of tokens to take.
+
+        Returns:
+            The time spent waiting, in seconds.
+        """
+        cost = min(cost, self.capacity)
+        waited = 0.0
+        while True:
+            with self._locked() as state:
+                if state["tokens"] >= cost:
+                    state["tokens"] -= cost
+                    return waited
+                wait = (cost - state["tokens"]) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def drain(self) -> None:
+        """Empty the bucket, pausing every process until it has refilled.
+
+        Called when the API throttles a request despite the budget.
+        """
+        with self._locked() as state:
+            state["tokens"] = 0.0
+
+
+def get_rate_limiter(config: Mapping[str, t.Any]) -> SharedTokenBucket | None:
+    """Return the shared budget of the tap's app or business, if enabled in config.
+
+    Args:
+        config: The tap config.
+
+    Returns:
+        The token bucket, or None if ``rate_limit_dir`` is not set.
+    """
+    directory = config.get("rate_limit_dir")
+    if not directory:
+        return None
+    key = config.get("rate_limit_key") or f"act_{config['account_id']}"
+    digest = hashlib.sha256(str(key).encode()).hexdigest()[:16]
+    return SharedTokenBucket(
+        Path(directory) / f"{digest}.bucket",
+        calls_per_minute=config["rate_limit_calls_per_minute"],
+    )
+
+
+class RateLimitedApi(FacebookAdsApi):
+    """A Facebook Business SDK client that takes a token before every call."""
+
+    rate_limiter: SharedTokenBucket | None = None
+    # The number of calls made through the client.
+    calls = 0
+
+    @classmethod
+    def set_default_api(cls, api_instance: FacebookAdsApi) -> None:
+        """Set the client used by objects created without one, as `init` does.
+
+        Args:
+            api_instance: The client.
+        """
+        # Objects look up the default client of the base class.
+        FacebookAdsApi.set_default_api(api_instance)
+
+    def call(self, *args, **kwargs) -> t.Any:  # noqa: ANN002, ANN003, ANN401
+        """Make a Graph API call once the shared budget allows it.
+
+        Args:
+            args: Positional arguments of `FacebookAdsApi.call`.
+            kwargs: Keyword arguments of `FacebookAdsApi.call`.
+
+        Returns:
+            The API response.
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        self.calls += 1
+        return super().call(*args, **kwargs)
@@ -0,0 +1,390 @@
+"""Sharded syncs, which spread the work of a single sync across processes.
+
+The coordinator splits a sync into units: one per selected stream, and one per
+date range for insights streams. Worker processes sync one unit at a time with the
+tap's usual code and send their serialized messages back over a pipe. The
+coordinator writes RECORD and BATCH lines through unchanged, emits each SCHEMA
+once, and merges the state of every unit into a single STATE message.
+"""
+
+from __future__ import annotations
+
+import copy
+import multiprocessing
+import sys
+import traceback
+import typing as t
+from multiprocessing.connection import wait
+
+from singer_sdk.singerlib import Catalog, SchemaMessage, StateMessage
+from singer_sdk.singerlib.encoding.base import GenericSingerWriter
+
+from tap_facebook.planning import TIMINGS_KEY
+from tap_facebook.profiling import SyncProfiler
+from tap_facebook.streams.ad_insights import DELIVERY_PROBE_KEY
+
+if t.TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+    from multiprocessing.process import BaseProcess
+
+    import pendulum
+    from singer_sdk import Tap
+    from singer_sdk.singerlib.encoding.simple import Message
+
+# Serialized messages are sent to the coordinator in chunks of about this size.
+CHUNK_SIZE = 256 * 1024
+
+
+class ShardUnit(t.NamedTuple):
+    """A part of a sync, run by a single worker process."""
+
+    stream_name: str
+    # The start dates of the first and last insights report windows to sync.
+    date_range: tuple[pendulum.Date, pendulum.Date] | None = None
+    # The child streams synced along with the stream.
+    child_stream_names: tuple[str, ...] = ()
+
+
+class _ShardWriter(GenericSingerWriter[bytes, "Message"]):
+    """Send the messages of a worker's sync to the coordinator.
+
+    Messages are serialized with the tap's own writer, so the coordinator can write
+    them out without decoding them again.
+    """
+
+    def __init__(self, connection: Connection, writer: GenericSingerWriter) -> None:
+        self.connection = connection
+        self.writer = writer
+        self._chunk: list[bytes] = []
+        self._chunk_size = 0
+
+    def serialize_message(self, message: Message) -> bytes:
+        data = self.writer.format_message(message)
+        return data if isinstance(data, bytes) else data.encode()
+
+    def write_message(self, message: Message) -> None:
+        if isinstance(message, StateMessage):
+            self.flush()
+            self.connection.send(("state", message.value))
+        elif isinstance(message, SchemaMessage):
+            self.flush()
+            self.connection.send(("schema", message.stream, self.format_message(message)))
+        else:
+            line = self.format_message(message) + b"\n"
+            self._chunk.append(line)
+            self._chunk_size += len(line)
+            if self._chunk_size >= CHUNK_SIZE:
+                self.flush()
+
+    def flush(self) -> None:
+        if self._chunk:
+            self.connection.send(("lines", b"".join(self._chunk)))
+            self._chunk = []
+            self._chunk_size = 0
+
+
+def sync_unit(  # noqa: PLR0913, PLR0917
+    tap_class: type[Tap],
+    config: dict,
+    catalog: dict,
+    state: dict,
+    unit: ShardUnit,
+    connection: Connection,
+    profile: bool = False,  # noqa: FBT001, FBT002
+) -> None:
+    """Sync a single unit, sending its messages over ``connection``.
+
+    Args:
+        tap_class: The tap class.
+        config: The tap config.
+        catalog: The tap's catalog.
+        state: The state at the start of the sync.
+        unit: The unit to sync.
+        connection: The connection to the coordinator.
+        profile: Whether to profile the sync, and send the profile to the
+            coordinator once it completes.
+    """
+    unit_catalog = Catalog.from_dict(catalog)
+    for entry in unit_catalog.streams:
+        if entry.tap_stream_id not in {unit.stream_name, *unit.child_stream_names}:
+            entry.metadata.root.selected = False
+
+    tap = tap_class(
+        config={**config, "sync_processes": 1},
+        catalog=unit_catalog.to_dict(),
+        state=copy.deepcopy(state),
+    )
+    if unit.date_range is not None:
+        tap.streams[unit.stream_name].date_range = unit.date_range  # type: ignore[attr-defined]
+    writer = _ShardWriter(connection, tap.message_writer)
+    tap.message_writer = writer
+    if not profile:
+        tap.sync_all()
+        writer.flush()
+        return
+    with SyncProfiler() as profiler:
+        tap.sync_all()
+        writer.flush()
+    process = multiprocessing.current_process().name
+    connection.send(("profile", *profiler.export(), process))
+
+
+def _run_worker(  # noqa: PLR0913, PLR0917
+    tap_class: type[Tap],
+    config: dict,
+    catalog: dict,
+    state: dict,
+    connection: Connection,
+    profile: bool,  # noqa: FBT001
+) -> None:
+    """Sync the units received from the coordinator until told to stop."""
+    while (unit := connection.recv()) is not None:
+        try:
+            sync_unit(tap_class, config, catalog, state, unit, connection, profile)
+        except Exception:  # noqa: BLE001
+            connection.send(("error", traceback.format_exc()))
+            return
+        connection.send(("done",))
+
+
+class ShardedSync:
+    """Coordinate a sync across worker processes and merge their output."""
+
+    def __init__(self, tap: Tap, processes: int) -> None:
+        """Initialize the coordinator.
+
+        Args:
+            tap: The tap to sync.
+            processes: The maximum number of worker processes.
+        """
+        self.tap = tap
+        self.processes = processes
+        self.initial_state: dict = copy.deepcopy(dict(tap.state))
+        self._schemas: dict[str, bytes] = {}
+        self._last_state: dict = {}
+        self._partitions: dict[str, dict[ShardUnit, dict | None]] = {}
+        self._completed: set[ShardUnit] = set()
+
+    def get_units(self) -> list[ShardUnit]:
+        """Split the sync into units, insights date ranges first.
+
+        Returns:
+            The units to sync.
+        """
+        insights_units: list[ShardUnit] = []
+        units: list[ShardUnit] = []
+        for stream in self.tap.streams.values():
+            if stream.parent_stream_type or not (
+                stream.selected or stream.has_selected_descendents
+            ):
+                continue
+            partition_date_range = getattr(stream, "partition_date_range", None)
+            if partition_date_range is None:
+                child_stream_names = tuple(child.name for child in stream.child_streams)
+                units.append(ShardUnit(stream.name, child_stream_names=child_stream_names))
+                continue
+            partitions = [
+                ShardUnit(stream.name, date_range)
+                for date_range in partition_date_range(self.processes)
+            ]
+            self._partitions[stream.name] = dict.fromkeys(partitions)
+            insights_units.extend(partitions)
+        return [*insights_units, *units]
+
+    def _write_lines(self, data: bytes) -> None:
+        # Messages written by the tap's writer may still be buffered as text.
+        sys.stdout.flush()
+        sys.stdout.buffer.write(data)
+
+    def _write_state(self) -> None:
+        state = dict(self.tap.state)
+        if state != self._last_state:
+            self.tap.write_message(StateMessage(value=state))
+            self._last_state = copy.deepcopy(state)
+
+    def _merge_partitions(self, stream_name: str) -> dict:
+        """Merge the state of an insights stream's date ranges.
+
+        Report runs that are still checkpointed are kept from every range. The
+        bookmark only advances once all ranges of the stream have completed.
+        """
+        partitions = self._partitions[stream_name]
+        stream_state = copy.deepcopy(
+            self.initial_state.get("bookmarks", {}).get(stream_name, {}),
+        )
+        initial_runs = stream_state.get("report_runs", {})
+        report_runs = dict(initial_runs)
+        for partition_state in filter(None, partitions.values()):
+            if "report_runs" not in partition_state:
+                continue
+            # Every range starts out with the initial report runs, and clears
+            # those it reattaches to and completes.
+            runs = partition_state["report_runs"]
+            for fingerprint in initial_runs.keys() - runs.keys():
+                report_runs.pop(fingerprint, None)
+            report_runs.update(
+                (fingerprint, run)
+                for fingerprint, run in runs.items()
+                if fingerprint not in initial_runs
+            )
+            stream_state["report_runs"] = report_runs
+
+        if self._completed.issuperset(partitions):
+            # Ranges do not record where to resume, and every range has completed.
+            stream_state.pop("next_window_start", None)
+            values = [
+                partition_state["replication_key_value"]
+                for partition_state in [stream_state, *partitions.values()]
+                if partition_state and "replication_key_value" in partition_state
+            ]
+            for partition_state in filter(None, partitions.values()):
+                if "replication_key" in partition_state:
+                    stream_state["replication_key"] = partition_state["replication_key"]
+            if values:
+                stream_state["replication_key_value"] = max(values)
+            timings = [
+                partition_state[TIMINGS_KEY]
+                for partition_state in filter(None, partitions.values())
+                if TIMINGS_KEY in partition_state
+            ]
+            if timings:
+                # The work of every range, which the ranges did concurrently.
+                stream_state[TIMINGS_KEY] = {
+                    key: sum(timing[key] for timing in timings) for key in timings[0]
+                }
+            probes = [
+                partition_state[DELIVERY_PROBE_KEY]
+                for partition_state in filter(None, partitions.values())
+                if DELIVERY_PROBE_KEY in partition_state
+            ]
+            stream_state.pop(DELIVERY_PROBE_KEY, None)
+            if probes:
+                stream_state[DELIVERY_PROBE_KEY] = {
+                    "since": min(probe["since"] for probe in probes),
+                    "until": max(probe["until"] for probe in probes),
+                    "skipped_windows": sorted(
+                        window for probe in probes for window in probe["skipped_windows"]
+                    ),
+                }
+        return stream_state
+
+    def merge_state(self, unit: ShardUnit, state: dict) -> None:
+        """Merge a unit's state into the tap's state.
+
+        The bookmarks of the child streams synced along with the unit's stream are
+        only written by that unit, and are copied as they are.
+
+        Args:
+            unit: The unit that emitted the state.
+            state: The full state of the unit's sync.
+        """
+        bookmarks = state.get("bookmarks", {})
+        stream_state = bookmarks.get(unit.stream_name)
+        if unit.date_range is not None:
+            self._partitions[unit.stream_name][unit] = stream_state
+            stream_state = self._merge_partitions(unit.stream_name)
+        if stream_state is not None:
+            self.tap.state.setdefault("bookmarks", {})[unit.stream_name] = stream_state
+        child_bookmarks = {
+            name: bookmarks[name] for name in unit.child_stream_names if name in bookmarks
+        }
+        if child_bookmarks:
+            self.tap.state.setdefault("bookmarks", {}).update(child_bookmarks)
+
+    def complete(self, unit: ShardUnit) -> None:
+        """Record that a unit has completed, and emit the resulting state.
+
+        Args:
+            unit: The completed unit.
+        """
+        self._completed.add(unit)
+        if unit.date_range is not None:
+            stream_state = self._merge_partitions(unit.stream_name)
+            self.tap.state.setdefault("bookmarks", {})[unit.stream_name] = stream_state
+        self._write_state()
+
+    def handle_message(self, unit: ShardUnit, message: tuple) -> None:
+        """Write out a message received from the worker syncing ``unit``.
+
+        Args:
+            unit: The unit being synced.
+            message: The message.
+
+        Raises:
+            RuntimeError: If the worker failed.
+        """
+        kind, *payload = message
+        if kind == "lines":
+            self._write_lines(payload[0])
+        elif kind == "schema":
+            stream_name, data = payload
+            if self._schemas.get(stream_name) != data:
+                self._schemas[stream_name] = data
+                self._write_lines(data + b"\n")
+        elif kind == "state":
+            self.merge_state(unit, payload[0])
+            self._write_state()
+        elif kind == "profile":
+            *samples, process = payload
+            if SyncProfiler.active is not None:
+                SyncProfiler.active.merge(*samples, process=process)
+        elif kind == "done":
+            self.complete(unit)
+        elif kind == "error":
+            msg = f"Sharded sync of {unit} failed in a worker process:\n{payload[0]}"
+            raise RuntimeError(msg)
+
+    def run(self) -> None:
+        """Sync all units, emitting their merged output on stdout.
+
+        Raises:
+            RuntimeError: If a worker process exits unexpectedly.
+        """
+        self._write_state()
+        units = self.get_units()
+        context = multiprocessing.get_context("spawn")
+        workers: dict[Connection, tuple[BaseProcess, ShardUnit]] = {}
+        try:
+            for _ in range(min(self.processes, len(units))):
+                connection, worker_connection = context.Pipe()
+                worker = context.Process(
+                    target=_run_worker,
+                    args=(
+                        type(self.tap),
+                        dict(self.tap.config),
+                        self.tap.catalog.to_dict(),
+                        self.initial_state,
+                        worker_connection,
+                        SyncProfiler.active is not None,
+                    ),
+                    daemon=True,
+                )
+                worker.start()
+                worker_connection.close()
+                unit = units.pop(0)
+                connection.send(unit)
+                workers[connection] = (worker, unit)
+
+            while workers:
+                for connection in t.cast("list[Connection]", wait(list(workers))):
+                    process, unit = workers[connection]
+                    try:
+                        message = connection.recv()
+                    except EOFError as e:
+                        msg = f"Worker process syncing {unit} exited unexpectedly."
+                        raise RuntimeError(msg) from e
+                    self.handle_message(unit, message)
+                    if message[0] != "done":
+                        continue
+                    if units:
+                        unit = units.pop(0)
+                        connection.send(unit)
+                        workers[connection] = (process, unit)
+                    else:
+                        connection.send(None)
+                        del workers[connection]
+                        process.join()
+        finally:
+            for process, _ in workers.values():
+                process.terminate()
+            sys.stdout.flush()
@@ -18,7 +18,7 @@ from singer_sdk.typing import (
 from tap_facebook.client import FacebookStream
 
 if t.TYPE_CHECKING:
-    from singer_sdk.helpers.types import Context, Record
+    from singer_sdk.helpers.types import Context
 
 
 class AdAccountsStream(FacebookStream):
@@ -124,9 +124,17 @@ class AdAccountsStream(FacebookStream):
     name = "adaccounts"
     path = f"/adaccounts?fields={columns}"
     tap_stream_id = "adaccounts"
+    conditional_requests = True
     primary_keys = ["created_time"]  # noqa: RUF012
     replication_key = "created_time"
     replication_method = REPLICATION_INCREMENTAL
+    numeric_string_fields = (
+        "amount_spent",
+        "balance",
+        "min_campaign_group_spend_cap",
+        "spend_cap",
+    )
+    fill_missing_fields = numeric_string_fields
 
     schema = PropertiesList(
         Property("account_id", StringType),
@@ -215,21 +223,6 @@ class AdAccountsStream(FacebookStream):
         Property("tax_id", StringType),
     ).to_dict()
 
-    def post_process(
-        self,
-        row: Record,
-        context: Context | None = None,  # noqa: ARG002
-    ) -> Record | None:
-        row["amount_spent"] = int(row["amount_spent"]) if "amount_spent" in row else None
-        row["balance"] = int(row["balance"]) if "balance" in row else None
-        row["min_campaign_group_spend_cap"] = (
-            int(row["min_campaign_group_spend_cap"])
-            if "min_campaign_group_spend_cap" in row
-            else None
-        )
-        row["spend_cap"] = int(row["spend_cap"]) if "spend_cap" in row else None
-        return row
-
     def get_url_params(
         self,
         context: Context | None,  # noqa: ARG002
@@ -57,6 +57,7 @@ class AdImages(FacebookStream):
     tap_stream_id = "images"
     replication_method = REPLICATION_INCREMENTAL
     replication_key = "updated_time"
+    supports_lookup = True
 
     schema = PropertiesList(
         Property("id", StringType),
@@ -77,6 +78,17 @@ class AdImages(FacebookStream):
         Property("width", IntegerType),
     ).to_dict()
 
+    def get_lookup_id(self, key: str) -> str:
+        """Return the id of an image, from its hash.
+
+        Args:
+            key: The hash of the image.
+
+        Returns:
+            The image's id, of the form ``<account id>:<hash>``.
+        """
+        return f"{self.config['account_id']}:{key}"
+
     def get_url_params(
         self,
         context: Context | None,
@@ -2,24 +2,40 @@
 
 from __future__ import annotations
 
+import collections
 import time
 import typing as t
-from functools import lru_cache
+from functools import cached_property, lru_cache
 
 import facebook_business.adobjects.user as fb_user
 import pendulum
+import requests
 from facebook_business.adobjects.adaccount import AdAccount
 from facebook_business.adobjects.adreportrun import AdReportRun
 from facebook_business.adobjects.adsactionstats import AdsActionStats
 from facebook_business.adobjects.adshistogramstats import AdsHistogramStats
 from facebook_business.adobjects.adsinsights import AdsInsights
-from facebook_business.api import FacebookAdsApi
+from facebook_business.adobjects.campaign import Campaign
+from facebook_business.exceptions import FacebookRequestError
+from facebook_business.session import FacebookSession
 from singer_sdk import typing as th
 from singer_sdk.streams.core import REPLICATION_INCREMENTAL, Stream
 
+from tap_facebook.cache import DiskCache
+from tap_facebook.checkpoint import CheckpointMixin
+from tap_facebook.concurrency import page_size, prefetch
+from tap_facebook.conform import CompiledConformerMixin
+from tap_facebook.join import join_rows
+from tap_facebook.planning import record_timings, scale_timings
+from tap_facebook.ratelimit import INSIGHTS_JOB_COST, RateLimitedApi, get_rate_limiter
+from tap_facebook.transform import RecordTransformer, iter_batches
+
 if t.TYPE_CHECKING:
+    from facebook_business.api import FacebookAdsApi
     from singer_sdk.helpers.types import Context
 
+    from tap_facebook.ratelimit import SharedTokenBucket
+
 EXCLUDED_FIELDS = [
     "total_postbacks",
     "adset_end",
@@ -64,21 +80,98 @@ EXCLUDED_FIELDS = [
     "wish_bid",
 ]
 
+# Metrics the API returns as strings, emitted as numbers when
+# `numeric_insights_fields` is enabled.
+INTEGER_FIELDS = (
+    "clicks",
+    "estimated_ad_recallers",
+    "full_view_impressions",
+    "full_view_reach",
+    "impressions",
+    "inline_link_clicks",
+    "inline_post_engagement",
+    "instant_experience_clicks_to_open",
+    "instant_experience_clicks_to_start",
+    "reach",
+    "unique_clicks",
+    "unique_inline_link_clicks",
+)
+NUMBER_FIELDS = (
+    "canvas_avg_view_percent",
+    "canvas_avg_view_time",
+    "cost_per_estimated_ad_recallers",
+    "cost_per_inline_link_click",
+    "cost_per_inline_post_engagement",
+    "cost_per_unique_click",
+    "cost_per_unique_inline_link_click",
+    "cpc",
+    "cpm",
+    "cpp",
+    "ctr",
+    "estimated_ad_recall_rate",
+    "frequency",
+    "inline_link_click_ctr",
+    "social_spend",
+    "spend",
+    "unique_ctr",
+    "unique_inline_link_click_ctr",
+    "unique_link_clicks_ctr",
+)
+
 SLEEP_TIME_INCREMENT = 5
 INSIGHTS_MAX_WAIT_TO_START_SECONDS = 5 * 60
 INSIGHTS_MAX_WAIT_TO_FINISH_SECONDS = 30 * 60
+# Report runs submitted by an interrupted sync are only reattached while they are
+# recent enough for Facebook to still hold their results.
+INSIGHTS_JOB_REUSE_MAX_AGE_SECONDS = 6 * 60 * 60
+INSIGHTS_FAILED_JOB_STATUSES = ("Job Failed", "Job Skipped")
+# Small windows are requested from the synchronous insights endpoint, which skips
+# the job creation and polling round trips of the async flow. Windows of up to
+# INSIGHTS_SYNC_MAX_WINDOW_DAYS days are small at the INSIGHTS_SYNC_LEVELS levels,
+# and at any level without breakdowns.
+INSIGHTS_SYNC_LEVELS = ("account", "campaign")
+INSIGHTS_SYNC_MAX_WINDOW_DAYS = 2
+INSIGHTS_SYNC_TIMEOUT_SECONDS = 60
+INSIGHTS_TRANSFORM_BATCH_SIZE = 500
+# The stream state key holding the first report window an interrupted sync has
+# not emitted yet.
+RESUME_WINDOW_KEY = "next_window_start"
+# Without timings of an earlier sync, an async job is expected to take a request
+# to submit it, one to poll it and one to read its results.
+INSIGHTS_JOB_REQUESTS = 3
+# Levels whose rows each belong to a single campaign, so that a report at that
+# level is the union of the reports on each of its campaigns.
+INSIGHTS_CAMPAIGN_SHARD_LEVELS = ("campaign", "adset", "ad")
+# The most async jobs a window keeps running at once, well under the number of
+# concurrent report runs the API allows an account.
+INSIGHTS_MAX_JOBS_IN_FLIGHT = 10
+# The stream state key recording the dates probed for delivery by the last sync,
+# and the report windows it skipped for lack of delivery.
+DELIVERY_PROBE_KEY = "delivery_probe"
+# Fields of the delivery probe. Actions are reported on the day of the conversion
+# unless `action_report_time` is `impression`, which may have no spend.
+DELIVERY_PROBE_FIELDS = ["spend", "impressions", "actions"]
 
 
-class AdsInsightStream(Stream):
+class AdsInsightStream(CheckpointMixin, CompiledConformerMixin, Stream):
     name = "adsinsights"
     replication_method = REPLICATION_INCREMENTAL
     replication_key = "date_start"
+    # Report windows are synced in date order, but the rows of a window, which
+    # can span more than one day, are not sorted.
+    check_sorted = False
+
+    # The clients of the current sync.
+    _apis: tuple[RateLimitedApi, ...] = ()
 
     def __init__(self, *args, **kwargs) -> None:  # noqa: ANN002, ANN003
         """Initialize the stream."""
         self._report_definition = kwargs.pop("report_definition")
         kwargs["name"] = f"{self.name}_{self._report_definition['name']}"
         super().__init__(*args, **kwargs)
+        # The start dates of the first and last report windows to sync, set when
+        # a sharded sync assigns part of this stream to a worker process.
+        self.date_range: tuple[pendulum.Date, pendulum.Date] | None = None
 
     @property
     def primary_keys(self) -> t.Sequence[str]:
@@ -93,6 +186,14 @@ class AdsInsightStream(Stream):
         """
         self._primary_keys = new_value
 
+    @staticmethod
+    def _get_numeric_datatype(field: str) -> th.JSONTypeHelper | None:
+        if field in INTEGER_FIELDS:
+            return th.IntegerType()
+        if field in NUMBER_FIELDS:
+            return th.NumberType()
+        return None
+
     @staticmethod
     def _get_datatype(field: str) -> th.JSONTypeHelper | None:
         d_type = AdsInsights._field_types[field]  # noqa: SLF001
@@ -131,10 +232,12 @@ class AdsInsightStream(Stream):
     def schema(self) -> dict:
         properties: list[th.Property] = []
         columns = list(AdsInsights.Field.__dict__)[1:]
+        numeric_fields = self.config.get("numeric_insights_fields")
         for field in columns:
             if field in EXCLUDED_FIELDS:
                 continue
-            if data_type := self._get_datatype(field):
+            data_type = numeric_fields and self._get_numeric_datatype(field)
+            if data_type := data_type or self._get_datatype(field):
                 properties.append(th.Property(field, data_type))
 
         properties.extend(
@@ -146,12 +249,23 @@ class AdsInsightStream(Stream):
 
         return th.PropertiesList(*properties).to_dict()
 
+    @cached_property
+    def record_transformer(self) -> RecordTransformer:
+        """The numeric coercion plan compiled from this stream's schema."""
+        return RecordTransformer(self.schema)
+
+    @cached_property
+    def _rate_limiter(self) -> SharedTokenBucket | None:
+        """The rate limit budget shared with other tap processes, if enabled in config."""
+        return get_rate_limiter(self.config)
+
     def _initialize_client(self) -> None:
-        FacebookAdsApi.init(
+        api = RateLimitedApi.init(
             access_token=self.config["access_token"],
             timeout=300,
             api_version=self.config["api_version"],
         )
+        api.rate_limiter = self._rate_limiter
         fb_user.User(fbid="me")
 
         account_id = self.config["account_id"]
@@ -160,11 +274,196 @@ class AdsInsightStream(Stream):
             msg = f"Couldn't find account with id {account_id}"
             raise RuntimeError(msg)
 
-    def _run_job_to_completion(self, params: dict) -> None:
-        job = self.account.get_insights(
+        # Synchronous requests get a shorter timeout so slow windows quickly fall
+        # back to an async job.
+        sync_api = RateLimitedApi(
+            FacebookSession(
+                access_token=self.config["access_token"],
+                timeout=INSIGHTS_SYNC_TIMEOUT_SECONDS,
+            ),
+            api_version=self.config["api_version"],
+        )
+        sync_api.rate_limiter = self._rate_limiter
+        self.sync_account = AdAccount(f"act_{account_id}", api=sync_api)
+        self._apis = (api, sync_api)
+
+    def _job_fingerprint(self, params: dict) -> str:
+        """Return a stable identifier for an insights job.
+
+        Args:
+            params: The insights request parameters.
+
+        Returns:
+            A hex digest covering the account, API version and request parameters.
+        """
+        return self._get_fingerprint(
+            account_id=self.config["account_id"],
+            api_version=self.config["api_version"],
             params=params,
-            is_async=True,
         )
+
+    @property
+    def is_sorted(self) -> bool:
+        """Whether the bookmark can advance during a sync.
+
+        BATCH files are only emitted once they are complete, after the state has
+        moved past the records they hold, so batch syncs are treated as unsorted.
+        """
+        return not self.get_batch_config(self.config)
+
+    def _complete_window(
+        self,
+        context: Context | None,
+        next_window_start: pendulum.Date,
+        latest_date: str | None,
+    ) -> None:
+        """Advance the bookmark and checkpoint the next report window, once a window is emitted.
+
+        An interrupted sync resumes from this window instead of starting over. The
+        ranges of a sharded sync only advance the bookmark, which is merged once
+        every range has completed.
+        """
+        if not self.is_sorted:
+            return
+        state = self.get_context_state(context)
+        if latest_date is not None:
+            # The bookmark follows the latest row, which within a window may not
+            # be the latest date.
+            state["replication_key"] = self.replication_key
+            state["replication_key_value"] = max(
+                latest_date,
+                state.get("replication_key_value") or latest_date,
+            )
+        if self.date_range is None:
+            state[RESUME_WINDOW_KEY] = next_window_start.to_date_string()
+            self._write_checkpoint_state()
+
+    def _increment_stream_state(
+        self,
+        latest_record: dict,
+        *,
+        context: Context | None = None,
+    ) -> None:
+        """Track the replication key of unsorted syncs.
+
+        The rows of a window are not sorted, so sorted syncs only advance the
+        bookmark in `_complete_window`, once the whole window has been emitted.
+
+        Args:
+            latest_record: The record just emitted.
+            context: Stream partition or context dictionary.
+        """
+        if not self.is_sorted:
+            super()._increment_stream_state(latest_record, context=context)
+
+    @staticmethod
+    def _get_time_span(params: dict) -> dict:
+        """Return the dates covered by a request, whether it has one time range or many."""
+        if "time_ranges" not in params:
+            return params["time_range"]
+        return {
+            "since": params["time_ranges"][0]["since"],
+            "until": params["time_ranges"][-1]["until"],
+        }
+
+    def _get_report_runs_state(self, context: Context | None) -> dict:
+        return self.get_context_state(context).setdefault("report_runs", {})
+
+    def _checkpoint_job(
+        self,
+        context: Context | None,
+        fingerprint: str,
+        job: AdReportRun,
+        params: dict,
+    ) -> None:
+        """Record a submitted report run in state so it can be reattached later."""
+        self._get_report_runs_state(context)[fingerprint] = {
+            "report_run_id": job["id"],
+            "time_range": self._get_time_span(params),
+            "submitted_at": int(time.time()),
+        }
+        self._write_checkpoint_state()
+
+    def _clear_job_checkpoint(self, context: Context | None, fingerprint: str) -> None:
+        report_runs = self._get_report_runs_state(context)
+        if report_runs.pop(fingerprint, None) is not None:
+            self._write_checkpoint_state()
+
+    def _prune_report_runs(self, context: Context | None) -> None:
+        """Discard the report runs of previous syncs that are too old to reattach to.
+
+        Runs are only reattached to by the windows that submitted them, so the runs
+        of windows that are no longer synced would otherwise stay in the state.
+        """
+        report_runs = self._get_report_runs_state(context)
+        for fingerprint, checkpoint in list(report_runs.items()):
+            age = time.time() - checkpoint["submitted_at"]
+            if age > INSIGHTS_JOB_REUSE_MAX_AGE_SECONDS:
+                self.logger.info(
+                    "Discarding insights job %s submitted %d seconds ago.",
+                    checkpoint["report_run_id"],
+                    age,
+                )
+                report_runs.pop(fingerprint)
+
+    def _reattach_job(self, context: Context | None, fingerprint: str) -> AdReportRun | None:
+        """Return a still-valid report run submitted by a previous sync, if any."""
+        report_runs = self._get_report_runs_state(context)
+        checkpoint = report_runs.get(fingerprint)
+        if checkpoint is None:
+            return None
+
+        report_run_id = checkpoint["report_run_id"]
+        try:
+            job = AdReportRun(fbid=report_run_id).api_get()
+        except FacebookRequestError:
+            self.logger.warning(
+                "Unable to reattach insights job %s, resubmitting.",
+                report_run_id,
+                exc_info=True,
+            )
+            report_runs.pop(fingerprint)
+            return None
+
+        if job[AdReportRun.Field.async_status] in INSIGHTS_FAILED_JOB_STATUSES:
+            self.logger.info(
+                "Previous insights job %s ended with status '%s', resubmitting.",
+                report_run_id,
+                job[AdReportRun.Field.async_status],
+            )
+            report_runs.pop(fingerprint)
+            return None
+
+        self.logger.info(
+            "Reattached to insights job %s for %s - %s.",
+            report_run_id,
+            checkpoint["time_range"]["since"],
+            checkpoint["time_range"]["until"],
+        )
+        return job
+
+    def _submit_job(self, params: dict, context: Context | None) -> AdReportRun:
+        """Submit an async job, unless one submitted by an earlier sync can be reattached."""
+        fingerprint = self._job_fingerprint(params)
+        job = self._reattach_job(context, fingerprint)
+        if job is None:
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire(INSIGHTS_JOB_COST)
+            job = self.account.get_insights(
+                params=params,
+                is_async=True,
+            )
+            self._checkpoint_job(context, fingerprint, job, params)
+        return job
+
+    def _run_job_to_completion(
+        self,
+        params: dict,
+        context: Context | None = None,
+    ) -> AdReportRun:
+        return self._wait_for_job(self._submit_job(params, context), params)
+
+    def _wait_for_job(self, job: AdReportRun, params: dict) -> AdReportRun:
         status = None
         time_start = time.time()
         while status != "Job Completed":
@@ -177,8 +476,8 @@ class AdsInsightStream(Stream):
             self.logger.info(
                 "%s for %s - %s. %s%% done. ",
                 status,
-                params["time_range"]["since"],
-                params["time_range"]["until"],
+                self._get_time_span(params)["since"],
+                self._get_time_span(params)["until"],
                 percent_complete,
             )
 
@@ -193,7 +492,9 @@ class AdsInsightStream(Stream):
                     "This is an intermittent error and may resolve itself on subsequent "
                     "queries to the Facebook API. "
                     "You should deselect fields from the schema that are not necessary, "
-                    "as that may help improve the reliability of the Facebook API."
+                    "or set `max_fields_per_job` or `campaigns_per_job` on the report to "
+                    "split it across several jobs, as that may help improve the "
+                    "reliability of the Facebook API."
                 )
                 raise RuntimeError(error_message)
 
@@ -204,7 +505,9 @@ class AdsInsightStream(Stream):
                     "This is an intermittent error and may resolve itself on "
                     "subsequent queries to the Facebook API. "
                     "You should deselect fields from the schema that are not necessary, "
-                    "as that may help improve the reliability of the Facebook API."
+                    "or set `max_fields_per_job` or `campaigns_per_job` on the report to "
+                    "split it across several jobs, as that may help improve the "
+                    "reliability of the Facebook API."
                 )
                 raise RuntimeError(error_message)
 
@@ -216,6 +519,283 @@ class AdsInsightStream(Stream):
         msg = "Job failed to complete for unknown reason"
         raise RuntimeError(msg)
 
+    @cached_property
+    def _results_cache(self) -> DiskCache | None:
+        """Local cache of completed insights windows, if enabled in config."""
+        cache_dir = self.config.get("insights_cache_dir")
+        if not cache_dir:
+            return None
+        return DiskCache(
+            cache_dir,
+            ttl_seconds=self.config["insights_cache_ttl_hours"] * 60 * 60,
+            max_bytes=self.config["insights_cache_max_size_mb"] * 1024 * 1024,
+        )
+
+    @staticmethod
+    def _is_zero_row(row: dict) -> bool:
+        """Return True if every metric of a row is zero.
+
+        Action stats are only returned for rows that have some, so a row with any
+        list of stats is not a zero row. Rows without any metric are kept.
+        """
+        metrics = [row[field] for field in (*INTEGER_FIELDS, *NUMBER_FIELDS) if field in row]
+        if not metrics or any(isinstance(value, list) and value for value in row.values()):
+            return False
+        try:
+            return not any(float(value or 0) for value in metrics)
+        except (TypeError, ValueError):
+            return False
+
+    def _transform_rows(self, rows: t.Iterable[dict]) -> t.Iterator[dict]:
+        if self._report_definition["drop_zero_rows"]:
+            rows = (row for row in rows if not self._is_zero_row(row))
+        transformer = self.record_transformer
+        if not transformer:
+            yield from rows
+            return
+        for batch in iter_batches(rows, INSIGHTS_TRANSFORM_BATCH_SIZE):
+            yield from transformer.transform(batch)
+
+    def _use_sync_request(self, params: dict) -> bool:
+        """Return True if a window is small enough for the synchronous endpoint."""
+        # Windows are only packed into a request when they need an async job.
+        if not self._report_definition["use_synchronous_requests"] or "time_ranges" in params:
+            return False
+        since = pendulum.parse(params["time_range"]["since"]).date()  # type: ignore[union-attr]
+        until = pendulum.parse(params["time_range"]["until"]).date()  # type: ignore[union-attr]
+        if (until - since).days + 1 > INSIGHTS_SYNC_MAX_WINDOW_DAYS:
+            return False
+        # Reports on few objects stay small with breakdowns.
+        return params["level"] in INSIGHTS_SYNC_LEVELS or not params["breakdowns"]
+
+    def _request_sync_rows(self, params: dict) -> list[dict]:
+        """Request a report from the synchronous insights endpoint.
+
+        Returns:
+            The report's rows.
+        """
+        if self.config.get("fast_json"):
+            pages = self._iter_edge_pages(
+                self.sync_account.get_api_assured(),
+                (self.sync_account["id"], "insights"),
+                params,
+            )
+            return [row for page in pages for row in page]
+        return [obj.export_all_data() for obj in self.sync_account.get_insights(params=params)]
+
+    def _get_sync_rows(self, params: dict) -> list[dict] | None:
+        """Request a window from the synchronous insights endpoint.
+
+        Returns:
+            The window's rows, or None if the request failed or timed out and the
+            window should be requested as an async job instead.
+        """
+        try:
+            return self._request_sync_rows(params)
+        except (FacebookRequestError, requests.exceptions.RequestException) as e:
+            self.logger.info(
+                "Synchronous insights request for %s - %s failed, falling back to an async job: %s",
+                params["time_range"]["since"],
+                params["time_range"]["until"],
+                e,
+            )
+            return None
+
+    def _iter_edge_pages(
+        self,
+        api: FacebookAdsApi,
+        path: tuple[str, ...],
+        params: dict,
+    ) -> t.Iterator[list[dict]]:
+        """Page through an insights edge, decoding every page once with msgspec.
+
+        This yields the same rows, a page at a time, as iterating the edge's
+        ``Cursor`` and exporting each ``AdsInsights`` object, without building the
+        objects.
+        """
+        from tap_facebook.fastjson import decode_json, export_value  # noqa: PLC0415
+
+        params = dict(params)
+        while True:
+            page = decode_json(api.call("GET", path, params=params).body(), use_decimal=False)
+            yield export_value(page.get("data", []))
+            paging = page.get("paging", {})
+            if "next" not in paging or "after" not in paging.get("cursors", {}):
+                return
+            params["after"] = paging["cursors"]["after"]
+
+    def _get_result_pages(self, job: AdReportRun) -> t.Iterator[list[dict]]:
+        """Yield the rows of a completed report run, a page at a time."""
+        if self.config.get("fast_json"):
+            yield from self._iter_edge_pages(job.get_api_assured(), (job["id"], "insights"), {})
+            return
+        cursor = job.get_result()
+        page = []
+        for obj in cursor:
+            page.append(obj.export_all_data())
+            # The cursor holds the rest of the page it last loaded.
+            if not len(cursor):
+                yield page
+                page = []
+        if page:
+            yield page
+
+    def _get_result_rows(self, job: AdReportRun) -> t.Iterator[dict]:
+        """Yield the rows of a completed report run.
+
+        With a ``max_buffer_mb`` budget, result pages are fetched in a background
+        thread while earlier rows are emitted. Fetching pauses whenever the pages
+        waiting to be emitted exceed the budget, so a slow target slows pagination
+        down instead of growing memory.
+        """
+        pages = self._get_result_pages(job)
+        if max_buffer_mb := self.config.get("max_buffer_mb"):
+            pages = prefetch(pages, max_bytes=int(max_buffer_mb * 1024 * 1024), size=page_size)
+        for page in pages:
+            yield from page
+
+    def _get_key_fields(self) -> list[str]:
+        """Return the fields identifying the object that a row reports on."""
+        return list(dict.fromkeys(["account_id", f"{self._report_definition['level']}_id"]))
+
+    def _split_fields(self, params: dict) -> list[dict]:
+        """Split a request into requests of up to ``max_fields_per_job`` fields each.
+
+        Every request also has the fields identifying the row, so that their rows
+        can be joined.
+        """
+        max_fields = self._report_definition["max_fields_per_job"]
+        key_fields = self._get_key_fields()
+        fields = [field for field in params["fields"] if field not in key_fields]
+        if not max_fields or len(fields) <= max_fields:
+            return [params]
+        return [
+            {**params, "fields": [*key_fields, *fields[start : start + max_fields]]}
+            for start in range(0, len(fields), max_fields)
+        ]
+
+    @cached_property
+    def _campaign_ids(self) -> list[str]:
+        """The ids of the account's campaigns, listed once per sync."""
+        campaigns = self.account.get_campaigns(
+            fields=[Campaign.Field.id],
+            params={
+                # Deleted and archived campaigns still report on their past delivery.
+                "effective_status": [
+                    value
+                    for name, value in vars(Campaign.EffectiveStatus).items()
+                    if not name.startswith("_")
+                ],
+                "limit": 500,
+            },
+        )
+        return [campaign[Campaign.Field.id] for campaign in campaigns]
+
+    def _shard_by_campaign(self, params: dict) -> list[dict]:
+        """Split a request into requests on up to ``campaigns_per_job`` campaigns each.
+
+        Only reports at the campaign level or below are split, since their rows
+        each belong to one campaign.
+        """
+        campaigns_per_job = self._report_definition["campaigns_per_job"]
+        if not campaigns_per_job or params["level"] not in INSIGHTS_CAMPAIGN_SHARD_LEVELS:
+            return [params]
+        campaign_ids = self._campaign_ids
+        if len(campaign_ids) <= campaigns_per_job:
+            return [params]
+        return [
+            {
+                **params,
+                "filtering": [
+                    *params.get("filtering", []),
+                    {
+                        "field": "campaign.id",
+                        "operator": "IN",
+                        "value": campaign_ids[start : start + campaigns_per_job],
+                    },
+                ],
+            }
+            for start in range(0, len(campaign_ids), campaigns_per_job)
+        ]
+
+    def _get_job_rows(self, params: dict, context: Context | None) -> t.Iterator[dict]:
+        """Yield the rows of a request run as async jobs.
+
+        A request on more than ``campaigns_per_job`` campaigns is sharded into
+        jobs on some of the campaigns each, whose rows are yielded one shard after
+        the other. A request with more than ``max_fields_per_job`` fields is split
+        into jobs with some of the fields each, whose rows are joined on the date,
+        the object and the breakdowns. Shards are submitted ahead of the one being
+        read, so their jobs run concurrently, up to `INSIGHTS_MAX_JOBS_IN_FLIGHT`
+        jobs at a time. The next shard is submitted once one has finished.
+        """
+        shards = [self._split_fields(shard) for shard in self._shard_by_campaign(params)]
+        if len(shards) == 1 and len(shards[0]) == 1:
+            yield from self._get_result_rows(self._run_job_to_completion(params, context))
+            return
+
+        keys = ["date_start", "date_stop", *self._get_key_fields(), *params["breakdowns"]]
+        pending = collections.deque(shards)
+        running: collections.deque[tuple[list[dict], list[AdReportRun]]] = collections.deque()
+
+        def submit_shards() -> None:
+            # A shard is submitted whole, as its parts are joined, even if it alone
+            # has more parts than the cap.
+            while pending and (
+                not running
+                or sum(len(jobs) for _, jobs in running) + len(pending[0])
+                <= INSIGHTS_MAX_JOBS_IN_FLIGHT
+            ):
+                parts = pending.popleft()
+                running.append((parts, [self._submit_job(part, context) for part in parts]))
+
+        submit_shards()
+        while running:
+            parts, jobs = running.popleft()
+            completed = [
+                self._wait_for_job(job, part) for job, part in zip(jobs, parts, strict=True)
+            ]
+            # The next shards run while this one's rows are read.
+            submit_shards()
+            results = (self._get_result_rows(job) for job in completed)
+            if len(parts) == 1:
+                yield from next(results)
+            else:
+                yield from join_rows(results, keys)
+            for part in parts:
+                self._clear_job_checkpoint(context, self._job_fingerprint(part))
+
+    def _get_window_rows(self, params: dict, context: Context | None) -> t.Iterator[dict]:
+        """Yield the insights rows for a single report window.
+
+        Rows are served from the local results cache when a fresh entry exists for
+        the exact same request. Otherwise small windows are requested synchronously,
+        falling back to an async job, and the results are written through to the
+        cache.
+        """
+        fingerprint = self._job_fingerprint(params)
+        cache = self._results_cache
+        if cache is not None:
+            cached_rows = cache.iter_lines(fingerprint)
+            if cached_rows is not None:
+                self.logger.info(
+                    "Using cached insights for %s - %s.",
+                    self._get_time_span(params)["since"],
+                    self._get_time_span(params)["until"],
+                )
+                yield from self._transform_rows(cached_rows)
+                return
+
+        rows: t.Iterable[dict] | None = None
+        if self._use_sync_request(params):
+            rows = self._get_sync_rows(params)
+        if rows is None:
+            rows = self._get_job_rows(params, context)
+        if cache is not None:
+            rows = cache.write_through(fingerprint, rows)
+        yield from self._transform_rows(rows)
+        self._clear_job_checkpoint(context, fingerprint)
+
     def _get_selected_columns(self) -> list[str]:
         columns = [
             keys[1] for keys, data in self.metadata.items() if data.selected and len(keys) > 0
@@ -267,43 +847,298 @@ class AdsInsightStream(Stream):
             )
         return report_start
 
+    def _get_window_starts(self, context: Context | None) -> tuple[pendulum.Date, pendulum.Date]:
+        """Return the start dates of the first and last report windows to sync."""
+        if self.date_range is not None:
+            return self.date_range
+        sync_end_date = pendulum.parse(  # type: ignore[union-attr]
+            self.config.get("end_date", pendulum.today().to_date_string()),
+        ).date()
+        resume_window = self.get_context_state(context).get(RESUME_WINDOW_KEY)
+        if resume_window:
+            self.logger.info("Resuming the interrupted sync at window '%s'.", resume_window)
+            return pendulum.parse(resume_window).date(), sync_end_date  # type: ignore[union-attr]
+        return self._get_start_date(context), sync_end_date
+
+    def partition_date_range(self, count: int) -> list[tuple[pendulum.Date, pendulum.Date]]:
+        """Split the report windows to sync into contiguous date ranges.
+
+        Args:
+            count: The maximum number of ranges.
+
+        Returns:
+            Up to ``count`` ranges of report window start dates, in order, each
+            holding about the same number of windows.
+        """
+        # Ranges are planned before the sync starts, which is when the SDK records
+        # the bookmark to start from.
+        self._write_starting_replication_value(None)
+        first, last = self._get_window_starts(None)
+        time_increment = self._report_definition["time_increment_days"]
+        windows = (last - first).days // time_increment + 1
+        if windows <= 1:
+            return [(first, last)]
+        count = min(count, windows)
+        return [
+            (
+                first.add(days=windows * i // count * time_increment),
+                first.add(days=(windows * (i + 1) // count - 1) * time_increment),
+            )
+            for i in range(count)
+        ]
+
+    def _get_window_params(
+        self,
+        report_start: pendulum.Date,
+        report_end: pendulum.Date,
+        columns: list[str],
+    ) -> dict:
+        """Return the insights request parameters of a report window."""
+        params = {
+            "level": self._report_definition["level"],
+            "action_breakdowns": self._report_definition["action_breakdowns"],
+            "action_report_time": self._report_definition["action_report_time"],
+            "breakdowns": self._report_definition["breakdowns"],
+            "fields": columns,
+            "time_increment": self._report_definition["time_increment_days"],
+            "limit": 100,
+            "action_attribution_windows": [
+                self._report_definition["action_attribution_windows_view"],
+                self._report_definition["action_attribution_windows_click"],
+            ],
+            "time_range": {
+                "since": report_start.to_date_string(),
+                "until": report_end.to_date_string(),
+            },
+        }
+        if self._report_definition["filtering"]:
+            params["filtering"] = self._report_definition["filtering"]
+        return params
+
+    def _get_packed_params(self, window_starts: list[pendulum.Date], columns: list[str]) -> dict:
+        """Return the parameters of a single request covering several report windows.
+
+        A window spans ``time_increment_days`` days and the first day of the next
+        window, split by the API into one period per increment. Each period becomes
+        one of the request's ``time_ranges``, which the API reports on separately,
+        so the rows are those of the windows requested one at a time. Periods shared
+        by two windows are requested, and emitted, once.
+        """
+        time_increment = self._report_definition["time_increment_days"]
+        params = self._get_window_params(
+            window_starts[0],
+            window_starts[0].add(days=time_increment),
+            columns,
+        )
+        if len(window_starts) == 1:
+            return params
+        periods = set()
+        for window_start in window_starts:
+            next_window_start = window_start.add(days=time_increment)
+            periods.add((window_start, next_window_start.subtract(days=1)))
+            periods.add((next_window_start, next_window_start))
+        del params["time_range"], params["time_increment"]
+        params["time_ranges"] = [
+            {"since": since.to_date_string(), "until": until.to_date_string()}
+            for since, until in sorted(periods)
+        ]
+        return params
+
+    def _get_window_batches(
+        self,
+        first_window_start: pendulum.Date,
+        last_window_start: pendulum.Date,
+        columns: list[str],
+        active_dates: set[str] | None = None,
+    ) -> t.Iterator[tuple[list[pendulum.Date], dict | None]]:
+        """Yield the report windows to sync, with the parameters of their request.
+
+        Consecutive windows that need an async job are packed into a single job, up
+        to ``windows_per_job`` at a time. Windows requested from the synchronous
+        endpoint are requested one at a time. Given the ``active_dates`` with
+        delivery, windows without any are yielded one at a time without parameters,
+        as they have no rows to request.
+        """
+        time_increment = self._report_definition["time_increment_days"]
+        windows_per_job = self._report_definition["windows_per_job"]
+        pack: list[pendulum.Date] = []
+        window_start = first_window_start
+        while window_start <= last_window_start:
+            next_window_start = window_start.add(days=time_increment)
+            params = self._get_window_params(window_start, next_window_start, columns)
+            if active_dates is not None and not any(
+                window_start.add(days=offset).to_date_string() in active_dates
+                for offset in range(time_increment + 1)
+            ):
+                if pack:
+                    yield pack, self._get_packed_params(pack, columns)
+                    pack = []
+                yield [window_start], None
+            elif self._use_sync_request(params):
+                if pack:
+                    yield pack, self._get_packed_params(pack, columns)
+                    pack = []
+                yield [window_start], params
+            else:
+                pack.append(window_start)
+                if len(pack) >= windows_per_job:
+                    yield pack, self._get_packed_params(pack, columns)
+                    pack = []
+            window_start = next_window_start
+        if pack:
+            yield pack, self._get_packed_params(pack, columns)
+
+    def plan_sync(self) -> dict:
+        """Estimate the work of the next sync, without requesting any data.
+
+        Returns:
+            The number of report windows and async jobs, and the expected requests,
+            rate limit tokens and seconds. Requests are scaled from the last sync
+            if it recorded its timings, and estimated from the number of jobs
+            otherwise. Requests split by ``max_fields_per_job`` count one job per part.
+            Reports sharded by ``campaigns_per_job`` run their jobs once per shard of
+            the account's campaigns, which are not listed to plan the sync: their
+            number of jobs, and the estimates derived from it, are None.
+        """
+        # Like the sync, the plan starts from the bookmark.
+        self._write_starting_replication_value(None)
+        windows = jobs = sync_requests = 0
+        batches = self._get_window_batches(
+            *self._get_window_starts(None),
+            self._get_selected_columns(),
+        )
+        for window_starts, params in batches:
+            windows += len(window_starts)
+            if params is None:
+                continue
+            if self._use_sync_request(params):
+                sync_requests += 1
+            else:
+                jobs += len(self._split_fields(params))
+
+        sharded = bool(
+            jobs
+            and self._report_definition["campaigns_per_job"]
+            and self._report_definition["level"] in INSIGHTS_CAMPAIGN_SHARD_LEVELS,
+        )
+        requests, seconds = scale_timings(self.stream_state, windows)
+        if sharded:
+            # The campaigns, and so the shards, are only listed by the sync.
+            return {
+                "windows": windows,
+                "jobs": None,
+                "jobs_per_campaign_shard": jobs,
+                "campaign_shards": None,
+                "requests": requests,
+                "rate_limit_tokens": None,
+                "seconds": seconds,
+            }
+        if requests is None:
+            requests = jobs * INSIGHTS_JOB_REQUESTS + sync_requests
+        return {
+            "windows": windows,
+            "jobs": jobs,
+            "requests": requests,
+            "rate_limit_tokens": requests + jobs * INSIGHTS_JOB_COST,
+            "seconds": seconds,
+        }
+
+    def _probe_delivery(
+        self,
+        first_window_start: pendulum.Date,
+        last_window_start: pendulum.Date,
+    ) -> set[str] | None:
+        """Return the dates on which the account delivered, with a single request.
+
+        The account-level report of the dates covered by the report windows, one
+        row per day, is requested from the synchronous endpoint. Days without a row,
+        or whose row has no spend, impressions or actions, had no delivery.
+
+        Returns:
+            The dates with delivery, or None if the request failed and every window
+            should be synced.
+        """
+        time_increment = self._report_definition["time_increment_days"]
+        params = self._get_window_params(
+            first_window_start,
+            last_window_start.add(days=time_increment),
+            DELIVERY_PROBE_FIELDS,
+        )
+        # Rows the report filters out may still have delivery that counts.
+        params.pop("filtering", None)
+        params.update(level="account", breakdowns=[], action_breakdowns=[], time_increment=1)
+        try:
+            rows = self._request_sync_rows(params)
+        except (FacebookRequestError, requests.exceptions.RequestException) as e:
+            self.logger.info("Delivery probe failed, syncing every window: %s", e)
+            return None
+        return {
+            row["date_start"]
+            for row in rows
+            if float(row.get("spend") or 0)
+            or int(row.get("impressions") or 0)
+            or row.get("actions")
+        }
+
     def get_records(
         self,
         context: Context | None,
     ) -> t.Iterable[dict | tuple[dict, dict | None]]:
+        started = time.monotonic()
+        windows = 0
         self._initialize_client()
+        self._prune_report_runs(context)
 
         time_increment = self._report_definition["time_increment_days"]
-
-        sync_end_date = pendulum.parse(  # type: ignore[union-attr]
-            self.config.get("end_date", pendulum.today().to_date_string()),
-        ).date()
-
-        report_start = self._get_start_date(context)
-        report_end = report_start.add(days=time_increment)
-
         columns = self._get_selected_columns()
-        while report_start <= sync_end_date:
-            params = {
-                "level": self._report_definition["level"],
-                "action_breakdowns": self._report_definition["action_breakdowns"],
-                "action_report_time": self._report_definition["action_report_time"],
-                "breakdowns": self._report_definition["breakdowns"],
-                "fields": columns,
-                "time_increment": time_increment,
-                "limit": 100,
-                "action_attribution_windows": [
-                    self._report_definition["action_attribution_windows_view"],
-                    self._report_definition["action_attribution_windows_click"],
-                ],
-                "time_range": {
-                    "since": report_start.to_date_string(),
-                    "until": report_end.to_date_string(),
-                },
+        first_window_start, last_window_start = self._get_window_starts(context)
+        active_dates = None
+        if self._report_definition["probe_delivery"] and first_window_start <= last_window_start:
+            active_dates = self._probe_delivery(first_window_start, last_window_start)
+        probe: dict = {}
+        if active_dates is not None:
+            probe = {
+                "since": first_window_start.to_date_string(),
+                "until": last_window_start.add(days=time_increment).to_date_string(),
+                "skipped_windows": [],
             }
-            job = self._run_job_to_completion(params)  # type: ignore[func-returns-value]
-            for obj in job.get_result():
-                yield obj.export_all_data()
-            # Bump to the next increment
-            report_start = report_start.add(days=time_increment)
-            report_end = report_end.add(days=time_increment)
+            self.get_context_state(context)[DELIVERY_PROBE_KEY] = probe
+        else:
+            self.get_context_state(context).pop(DELIVERY_PROBE_KEY, None)
+
+        batches = self._get_window_batches(
+            first_window_start,
+            last_window_start,
+            columns,
+            active_dates,
+        )
+        for window_starts, params in batches:
+            dates: set[str] = set()
+            if params is None:
+                self.logger.info(
+                    "Skipping the window starting %s, which had no delivery.",
+                    window_starts[0].to_date_string(),
+                )
+                probe["skipped_windows"].append(window_starts[0].to_date_string())
+            else:
+                for row in self._get_window_rows(params, context):
+                    yield row
+                    if date_start := row.get("date_start"):
+                        dates.add(date_start)
+            for window_start in window_starts:
+                next_window_start = window_start.add(days=time_increment)
+                # The rows of a window start on its first day or the next window's.
+                window_dates = dates & {
+                    window_start.to_date_string(),
+                    next_window_start.to_date_string(),
+                }
+                self._complete_window(context, next_window_start, max(window_dates, default=None))
+                windows += 1
+
+        self.get_context_state(context).pop(RESUME_WINDOW_KEY, None)
+        record_timings(
+            self.get_context_state(context),
+            units=windows,
+            requests=sum(api.calls for api in self._apis),
+            started=started,
+        )
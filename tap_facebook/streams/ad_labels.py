@@ -29,6 +29,7 @@ class AdLabelsStream(FacebookStream):
     path = f"/adlabels?fields={columns}"
     primary_keys = ["id", "updated_time"]  # noqa: RUF012
     tap_stream_id = "adlabels"
+    conditional_requests = True
     replication_method = REPLICATION_INCREMENTAL
     replication_key = "updated_time"
 
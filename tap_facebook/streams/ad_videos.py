@@ -76,6 +76,7 @@ class AdVideos(FacebookStream):
     tap_stream_id = "videos"
     replication_method = REPLICATION_INCREMENTAL
     replication_key = "id"
+    supports_lookup = True
 
     schema = PropertiesList(
         Property("id", StringType),
@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+import typing as t
+from functools import cached_property
+
 from singer_sdk.streams.core import REPLICATION_INCREMENTAL
 from singer_sdk.typing import (
     ArrayType,
@@ -14,6 +17,11 @@ from singer_sdk.typing import (
 
 from tap_facebook.client import IncrementalFacebookStream
 
+if t.TYPE_CHECKING:
+    from singer_sdk.helpers.types import Context, Record
+
+    from tap_facebook.client import FacebookStream
+
 
 class AdsStream(IncrementalFacebookStream):
     """Ads stream class.
@@ -54,8 +62,6 @@ class AdsStream(IncrementalFacebookStream):
     name = "ads"
     filter_entity = "ad"
 
-    path = f"/ads?fields={columns}"
-
     primary_keys = ["id", "updated_time"]  # noqa: RUF012
     replication_method = REPLICATION_INCREMENTAL
     replication_key = "updated_time"
@@ -159,3 +165,76 @@ class AdsStream(IncrementalFacebookStream):
     ).to_dict()
 
     tap_stream_id = "ads"
+
+    @cached_property
+    def _expanded_creative_ids(self) -> set[str]:
+        """The IDs of the creatives already emitted through field expansion."""
+        return set()
+
+    @cached_property
+    def _expanded_creatives(self) -> dict[str, Record]:
+        """The expanded creatives not emitted yet, keyed by creative ID."""
+        return {}
+
+    @property
+    def _creatives_stream(self) -> FacebookStream | None:
+        """The selected creatives stream, if it is synced through field expansion."""
+        for child_stream in self.child_streams:
+            if child_stream.name == "creatives" and child_stream.selected:
+                return t.cast("FacebookStream", child_stream)
+        return None
+
+    @property
+    def path(self) -> str:  # type: ignore[override]
+        """The ads edge, expanding the fields of the creatives stream if it is selected.
+
+        Returns:
+            The path of the ads edge, with its fields.
+        """
+        columns = list(self.columns)
+        creatives_stream = self._creatives_stream
+        if creatives_stream is not None:
+            expanded = ",".join(creatives_stream.columns)  # type: ignore[attr-defined]
+            columns[columns.index("creative")] = f"creative{{{expanded}}}"
+        return f"/ads?fields={columns}"
+
+    def pop_expanded_creative(self, creative_id: str) -> Record:
+        """Return an expanded creative to emit, forgetting its payload.
+
+        Args:
+            creative_id: The ID of the creative.
+
+        Returns:
+            The creative, as expanded in the ad that referenced it first.
+        """
+        return self._expanded_creatives.pop(creative_id)
+
+    def generate_child_contexts(
+        self,
+        record: Record,
+        context: Context | None,
+    ) -> t.Iterable[Context | None]:
+        """Move each expanded creative out of its ad, and yield a context with its ID.
+
+        The ad keeps a reference to the creative, like without field expansion. The
+        creative is kept until the creatives stream emits it, and a creative shared
+        by several ads is only emitted once.
+
+        Args:
+            record: Individual record in the stream.
+            context: Stream partition or context dictionary.
+
+        Yields:
+            A context for each creative not emitted yet.
+        """
+        if not self.child_streams:
+            yield from super().generate_child_contexts(record, context)
+            return
+        creative = record.get("creative")
+        if self._creatives_stream is None or not creative:
+            return
+        record["creative"] = {"id": creative["id"]}
+        if creative["id"] not in self._expanded_creative_ids:
+            self._expanded_creative_ids.add(creative["id"])
+            self._expanded_creatives[creative["id"]] = creative
+            yield {"creative_id": creative["id"]}
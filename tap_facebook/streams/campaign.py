@@ -2,16 +2,11 @@
 
 from __future__ import annotations
 
-import typing as t
-
 from singer_sdk import typing as th  # JSON Schema typing helpers
 from singer_sdk.streams.core import REPLICATION_INCREMENTAL
 
 from tap_facebook.client import IncrementalFacebookStream
 
-if t.TYPE_CHECKING:
-    from singer_sdk.helpers.types import Context, Record
-
 
 class CampaignStream(IncrementalFacebookStream):
     """https://developers.facebook.com/docs/marketing-api/reference/ad-campaign-group."""
@@ -74,6 +69,8 @@ class CampaignStream(IncrementalFacebookStream):
     tap_stream_id = "campaigns"
     replication_method = REPLICATION_INCREMENTAL
     replication_key = "updated_time"
+    numeric_string_fields = ("daily_budget",)
+    fill_missing_fields = ("daily_budget",)
 
     PropertiesList = th.PropertiesList
     Property = th.Property
@@ -135,12 +132,3 @@ class CampaignStream(IncrementalFacebookStream):
         Property("daily_budget", IntegerType),
         Property("special_ad_category_country", ArrayType),
     ).to_dict()
-
-    def post_process(
-        self,
-        row: Record,
-        context: Context | None = None,  # noqa: ARG002
-    ) -> Record | None:
-        daily_budget = row.get("daily_budget")
-        row["daily_budget"] = int(daily_budget) if daily_budget is not None else None
-        return row
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import typing as t
+
 from singer_sdk.streams.core import REPLICATION_INCREMENTAL
 from singer_sdk.typing import (
     BooleanType,
@@ -13,6 +15,10 @@ from singer_sdk.typing import (
 )
 
 from tap_facebook.client import FacebookStream
+from tap_facebook.streams.ads import AdsStream
+
+if t.TYPE_CHECKING:
+    from singer_sdk.helpers.types import Context, Record
 
 
 class CreativeStream(FacebookStream):
@@ -85,6 +91,7 @@ class CreativeStream(FacebookStream):
     tap_stream_id = "creatives"
     replication_method = REPLICATION_INCREMENTAL
     replication_key = "id"
+    supports_lookup = True
 
     schema = PropertiesList(
         Property("id", StringType),
@@ -200,3 +207,33 @@ class CreativeStream(FacebookStream):
         Property("product_set_id", StringType),
         Property("carousel_ad_link", StringType),
     ).to_dict()
+
+
+class ExpandedCreativeStream(CreativeStream):
+    """Creatives fetched inline with the ads that reference them.
+
+    With ``expand_creatives``, this replaces the listing of every creative in the
+    account. Creatives are requested through field expansion of the ads query, so
+    only the creatives of changed ads are synced.
+    """
+
+    parent_stream_type = AdsStream
+    # Creatives share the stream's state rather than one partition per ad.
+    state_partitioning_keys: t.ClassVar[list[str]] = []
+    # Creatives come from the ads query, so they are not looked up by id.
+    supports_lookup = False
+
+    def get_records(self, context: Context | None) -> t.Iterable[Record]:
+        """Return the creative expanded in the ad being synced.
+
+        Args:
+            context: The context holding the ID of the expanded creative.
+
+        Returns:
+            The creative.
+        """
+        if context is None:
+            return []
+        ads_stream = t.cast("AdsStream", self._tap.streams[AdsStream.name])
+        creative = ads_stream.pop_expanded_creative(context["creative_id"])
+        return self.record_transformer.transform([creative])
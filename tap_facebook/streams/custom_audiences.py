@@ -33,6 +33,7 @@ class CustomAudiences(FacebookStream):
     """
 
     name = "customaudiences"
+    conditional_requests = True
     primary_keys = ["id"]  # noqa: RUF012
 
     @property
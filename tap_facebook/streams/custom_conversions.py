@@ -40,6 +40,7 @@ class CustomConversions(FacebookStream):
     name = "customconversions"
     path = f"/customconversions?fields={columns}"
     tap_stream_id = "customconversions"
+    conditional_requests = True
     primary_keys = ["id"]  # noqa: RUF012
     replication_method = REPLICATION_INCREMENTAL
     replication_key = "creation_time"
@@ -2,12 +2,18 @@
 
 from __future__ import annotations
 
+import json
+import pathlib
 import typing as t
 
+import click
 from singer_sdk import Tap
 from singer_sdk import typing as th  # JSON schema typing helpers
+from singer_sdk.io_base import SingerWriter
 
 if t.TYPE_CHECKING:
+    from singer_sdk.singerlib.encoding.base import GenericSingerWriter
+
     from tap_facebook.client import FacebookStream
 
 from tap_facebook.streams import (
@@ -23,6 +29,7 @@ from tap_facebook.streams import (
     CustomAudiences,
     CustomConversions,
 )
+from tap_facebook.streams.creative import ExpandedCreativeStream
 
 STREAM_TYPES = [
     AdsetsStream,
@@ -47,6 +54,13 @@ DEFAULT_INSIGHT_REPORT = {
     "action_attribution_windows_click": "7d_click",
     "action_report_time": "mixed",
     "lookback_window": 28,
+    "use_synchronous_requests": True,
+    "windows_per_job": 1,
+    "max_fields_per_job": 0,
+    "campaigns_per_job": 0,
+    "filtering": [],
+    "drop_zero_rows": True,
+    "probe_delivery": False,
 }
 
 
@@ -166,6 +180,92 @@ class TapFacebook(Tap):
                         ),
                         default=28,
                     ),
+                    th.Property(
+                        "use_synchronous_requests",
+                        th.BooleanType,
+                        description=(
+                            "Request small windows (windows of up to two days of account "
+                            "or campaign level reports, or without breakdowns) from the "
+                            "synchronous insights endpoint instead of an async job. "
+                            "Windows that fail or time out fall back to an async job."
+                        ),
+                        default=True,
+                    ),
+                    th.Property(
+                        "windows_per_job",
+                        th.IntegerType,
+                        description=(
+                            "Maximum number of consecutive report windows requested "
+                            "in a single async job, through `time_ranges`, such as "
+                            "the days of the lookback window. The job returns the "
+                            "rows of each window, as separate jobs would."
+                        ),
+                        default=1,
+                    ),
+                    th.Property(
+                        "max_fields_per_job",
+                        th.IntegerType,
+                        description=(
+                            "Maximum number of fields requested by a single async "
+                            "job. Reports with more selected fields are split into "
+                            "concurrent jobs, whose rows are joined by the tap. 0 "
+                            "requests every field in one job."
+                        ),
+                        default=0,
+                    ),
+                    th.Property(
+                        "filtering",
+                        th.ArrayType(
+                            th.ObjectType(
+                                th.Property("field", th.StringType, required=True),
+                                th.Property(
+                                    "operator",
+                                    th.StringType,
+                                    required=True,
+                                    description="For example `GREATER_THAN`, `IN` or `EQUAL`.",
+                                ),
+                                th.Property("value", th.AnyType, required=True),
+                            ),
+                        ),
+                        description=(
+                            "Filters applied by the API before it returns the report's "
+                            "rows, such as `impressions` `GREATER_THAN` 0. Rows must "
+                            "match every filter."
+                        ),
+                        default=[],
+                    ),
+                    th.Property(
+                        "drop_zero_rows",
+                        th.BooleanType,
+                        description=(
+                            "Drop the rows whose metrics, such as impressions, spend "
+                            "and clicks, are all zero and that have no actions."
+                        ),
+                        default=True,
+                    ),
+                    th.Property(
+                        "probe_delivery",
+                        th.BooleanType,
+                        description=(
+                            "Request the account's daily spend, impressions and "
+                            "actions over the whole sync from the synchronous "
+                            "endpoint first, and skip the report windows without "
+                            "any of them instead of requesting their rows."
+                        ),
+                        default=False,
+                    ),
+                    th.Property(
+                        "campaigns_per_job",
+                        th.IntegerType,
+                        description=(
+                            "Maximum number of campaigns reported on by a single "
+                            "async job, for reports at the `campaign`, `adset` or "
+                            "`ad` level. Windows of accounts with more campaigns are "
+                            "sharded into concurrent jobs filtered on `campaign.id`. "
+                            "0 reports on every campaign in one job."
+                        ),
+                        default=0,
+                    ),
                 ),
             ),
             description=(
@@ -185,15 +285,317 @@ class TapFacebook(Tap):
             th.DateTimeType,
             description="The latest record date to sync",
         ),
+        th.Property(
+            "numeric_insights_fields",
+            th.BooleanType,
+            description=(
+                "Emit numeric insights metrics that the API returns as strings, such as "
+                "spend, impressions and cpm, as numbers. This changes the type of those "
+                "properties in the insights stream schemas."
+            ),
+            default=False,
+        ),
+        th.Property(
+            "insights_cache_dir",
+            th.StringType,
+            description=(
+                "Directory of a local cache for completed insights report windows. "
+                "Reruns requesting the same account, report parameters, time range and "
+                "API version within the freshness window are served from this cache "
+                "instead of submitting new jobs. Caching is disabled when unset."
+            ),
+        ),
+        th.Property(
+            "insights_cache_ttl_hours",
+            th.NumberType,
+            description="How long a cached insights window is considered fresh, in hours.",
+            default=24,
+        ),
+        th.Property(
+            "insights_cache_max_size_mb",
+            th.IntegerType,
+            description=(
+                "Maximum size of the insights cache on disk, in megabytes. The least "
+                "recently used entries are evicted first."
+            ),
+            default=1024,
+        ),
+        th.Property(
+            "http_cache_dir",
+            th.StringType,
+            description=(
+                "Directory of a local cache for the pages of slowly changing streams, "
+                "such as ad labels, custom audiences and custom conversions. Cached "
+                "pages are revalidated with their ETag, and replayed when the API "
+                "reports them unchanged. Caching is disabled when unset."
+            ),
+        ),
+        th.Property(
+            "http_cache_max_size_mb",
+            th.IntegerType,
+            description=(
+                "Maximum size of the HTTP cache on disk, in megabytes. The least "
+                "recently used entries are evicted first."
+            ),
+            default=256,
+        ),
+        th.Property(
+            "fast_json",
+            th.BooleanType,
+            description=(
+                "Decode API responses and encode Singer messages with msgspec. The "
+                "output is byte-for-byte identical. Requires the `fast-json` extra."
+            ),
+            default=False,
+        ),
+        th.Property(
+            "max_buffer_mb",
+            th.NumberType,
+            description=(
+                "Memory budget, in megabytes, for insights result pages and backfill "
+                "slice pages fetched ahead of emission. Fetching pauses while this much "
+                "data is waiting to be "
+                "written, so a slow target slows down pagination instead of growing "
+                "memory. When unset or 0, pages are only fetched as they are emitted."
+            ),
+            default=0,
+        ),
+        th.Property(
+            "expand_creatives",
+            th.BooleanType,
+            description=(
+                "Fetch the creatives of changed ads inline with the ads query, through "
+                "field expansion, instead of listing every creative in the account."
+            ),
+            default=False,
+        ),
+        th.Property(
+            "lookup_ids",
+            th.ObjectType(
+                th.Property("creatives", th.ArrayType(th.StringType)),
+                th.Property("adimages", th.ArrayType(th.StringType)),
+                th.Property("advideos", th.ArrayType(th.StringType)),
+            ),
+            description=(
+                "Objects to refresh by id instead of listing the whole collection, by "
+                "stream: creative ids for `creatives`, image hashes for `adimages` and "
+                "video ids for `advideos`. They are requested 50 at a time, and leave "
+                "the stream's bookmark unchanged."
+            ),
+        ),
+        th.Property(
+            "effective_status",
+            th.ArrayType(th.StringType),
+            description=(
+                "Only list ads, ad sets and campaigns with these effective statuses, "
+                "such as `ACTIVE` and `PAUSED`. Every status is listed when unset."
+            ),
+        ),
+        th.Property(
+            "status_sweep_interval_hours",
+            th.IntegerType,
+            description=(
+                "How often, in hours, to list ads, ad sets and campaigns of every "
+                "effective status despite `effective_status`, so that objects leaving "
+                "the listed statuses are synced. Never when unset."
+            ),
+        ),
+        th.Property(
+            "backfill_slices",
+            th.IntegerType,
+            description=(
+                "Number of `updated_time` ranges that the first sync of the ads, adsets "
+                "and campaigns streams is split into. The ranges are listed "
+                "concurrently, and emitted in order."
+            ),
+            default=1,
+        ),
+        th.Property(
+            "sync_processes",
+            th.IntegerType,
+            description=(
+                "Number of worker processes to spread a sync across. Each selected "
+                "stream, and each of up to this many date ranges of every insights "
+                "stream, is synced by a worker, and their output is merged into a "
+                "single stream of messages."
+            ),
+            default=1,
+        ),
+        th.Property(
+            "rate_limit_dir",
+            th.StringType,
+            description=(
+                "Directory of the rate limit budgets shared by tap processes on this "
+                "host. Every Graph API call and insights job submission waits for the "
+                "budget of its `rate_limit_key`. Disabled when unset."
+            ),
+        ),
+        th.Property(
+            "rate_limit_key",
+            th.StringType,
+            description=(
+                "Identifier of the shared rate limit budget, such as the app id or the "
+                "business id. Processes with the same key share a budget. Defaults to "
+                "the account id."
+            ),
+        ),
+        th.Property(
+            "rate_limit_calls_per_minute",
+            th.NumberType,
+            description=(
+                "Rate of Graph API calls allowed by the shared budget, across all the "
+                "processes that share it. An insights job submission counts as 5 calls."
+            ),
+            default=120,
+        ),
     ).to_dict()
 
+    @property
+    def message_writer_class(self) -> type[GenericSingerWriter]:  # type: ignore[override]
+        """The Singer message writer, msgspec-based if ``fast_json`` is enabled."""
+        if self.config.get("fast_json"):
+            from tap_facebook.fastjson import FastSingerWriter  # noqa: PLC0415
+
+            return FastSingerWriter
+        return SingerWriter
+
+    @classmethod
+    def append_builtin_config(cls, config_jsonschema: dict) -> None:
+        """Append built-in config, documenting the size of BATCH files.
+
+        Args:
+            config_jsonschema: The tap's config JSON schema.
+        """
+        super().append_builtin_config(config_jsonschema)
+        batch_config = config_jsonschema["properties"].get("batch_config")
+        if batch_config and "batch_size" not in batch_config["properties"]:
+            batch_size = th.Property(
+                "batch_size",
+                th.IntegerType,
+                title="Batch Size",
+                description="Maximum number of records written to each batch file.",
+            )
+            # Copy rather than update the SDK's shared schema in place.
+            config_jsonschema["properties"]["batch_config"] = {
+                **batch_config,
+                "properties": {**batch_config["properties"], **batch_size.to_dict()},
+            }
+
+    @classmethod
+    def invoke(  # type: ignore[override]  # noqa: PLR0913
+        cls,
+        *,
+        about: bool = False,
+        about_format: str | None = None,
+        config: tuple[str, ...] = (),
+        state: pathlib.Path | None = None,
+        catalog: pathlib.Path | None = None,
+        profile: pathlib.Path | None = None,
+        plan: bool = False,
+    ) -> None:
+        """Invoke the tap's command line interface, sharding and profiling the sync.
+
+        Args:
+            about: Display package metadata and settings.
+            about_format: Specify output style for `--about`.
+            config: Configuration file location or 'ENV' to use environment
+                variables. Accepts multiple inputs as a tuple.
+            state: Use a bookmarks file for incremental replication.
+            catalog: Use a Singer catalog file with the tap.
+            profile: Where to write the folded stacks of a profile of the sync.
+            plan: Print the plan of the sync instead of running it.
+        """
+        super(Tap, cls).invoke(about=about, about_format=about_format)
+        cls.print_version(print_fn=cls.logger.info)
+        config_files, parse_env_config = cls.config_from_cli_args(*config)
+
+        def get_tap() -> TapFacebook:
+            return cls(
+                config=config_files,  # type: ignore[arg-type]
+                state=state,
+                catalog=catalog,
+                parse_env_config=parse_env_config,
+                validate_config=True,
+            )
+
+        if plan:
+            from tap_facebook.planning import SyncPlanner  # noqa: PLC0415
+
+            click.echo(json.dumps(SyncPlanner(get_tap()).plan(), indent=2))
+            return
+        if profile is None:
+            get_tap().run_sync()
+            return
+
+        from tap_facebook.profiling import SyncProfiler  # noqa: PLC0415
+
+        with SyncProfiler() as profiler:
+            try:
+                get_tap().run_sync()
+            finally:
+                profiler.stop()
+                profiler.log_summary(cls.logger)
+                profiler.write_folded(profile)
+                cls.logger.info("Wrote the sync profile to %s", profile)
+
+    @classmethod
+    def get_singer_command(cls) -> click.Command:
+        """Add the ``--profile`` and ``--plan`` options to the command line interface.
+
+        Returns:
+            A click.Command object.
+        """
+        command = super().get_singer_command()
+        command.params.append(
+            click.Option(
+                ["--profile"],
+                help=(
+                    "Profile the sync, logging the time spent on each stream and "
+                    "phase, and write its sampled stacks to this file in the folded "
+                    "format of flamegraph tools."
+                ),
+                type=click.Path(path_type=pathlib.Path, dir_okay=False),
+            ),
+        )
+        command.params.append(
+            click.Option(
+                ["--plan"],
+                is_flag=True,
+                help=(
+                    "Print the report windows, listings, requests, rate limit tokens "
+                    "and time that the sync is expected to take, without running it."
+                ),
+            ),
+        )
+        return command
+
+    def run_sync(self) -> None:
+        """Sync all streams, across worker processes if ``sync_processes`` is set.
+
+        The command line interface runs syncs through this method rather than
+        `sync_all`, which always syncs in this process.
+        """
+        processes = self.config.get("sync_processes", 1)
+        if processes > 1:
+            from tap_facebook.sharding import ShardedSync  # noqa: PLC0415
+
+            ShardedSync(self, processes).run()
+            return
+        self.sync_all()
+
     def discover_streams(self) -> list[FacebookStream | AdsInsightStream]:
         """Return a list of discovered streams.
 
         Returns:
             A list of discovered streams.
         """
-        streams = [stream_class(tap=self) for stream_class in STREAM_TYPES]
+        stream_types = STREAM_TYPES
+        if self.config.get("expand_creatives"):
+            stream_types = [
+                ExpandedCreativeStream if stream_type is CreativeStream else stream_type
+                for stream_type in stream_types
+            ]
+        streams = [stream_class(tap=self) for stream_class in stream_types]
         report_configs = [  # type: ignore[misc]
             DEFAULT_INSIGHT_REPORT,
             *self.config.get("insight_reports_list"),
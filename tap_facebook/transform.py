@@ -0,0 +1,142 @@
+"""Record transformations applied to batches of records before they are emitted."""
+
+from __future__ import annotations
+
+import decimal
+import itertools
+import typing as t
+
+if t.TYPE_CHECKING:
+    from collections.abc import Collection, Iterable, Iterator, Sequence
+
+    from singer_sdk.helpers.types import Record
+
+
+def schema_types(property_schema: dict) -> set[str]:
+    """Return the JSON types a property schema allows.
+
+    Args:
+        property_schema: A JSON schema.
+
+    Returns:
+        The set of type names, including those of any ``anyOf`` options.
+    """
+    if "anyOf" in property_schema:
+        return set().union(*(schema_types(option) for option in property_schema["anyOf"]))
+    property_type = property_schema.get("type", [])
+    return {property_type} if isinstance(property_type, str) else set(property_type)
+
+
+def _to_integer(value: str) -> int | str:
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def _to_number(value: str) -> decimal.Decimal | str:
+    try:
+        return decimal.Decimal(value)
+    except decimal.InvalidOperation:
+        return value
+
+
+# Fast converters paired with their lenient fallback for values that do not parse.
+_INTEGER = (int, _to_integer)
+_NUMBER = (decimal.Decimal, _to_number)
+_CONVERSION_ERRORS = (ValueError, decimal.InvalidOperation)
+
+
+def _coerce_field(
+    records: list[Record],
+    name: str,
+    convert: t.Callable[[str], t.Any],
+    fallback: t.Callable[[str], t.Any],
+) -> None:
+    try:
+        for record in records:
+            value = record.get(name)
+            if value.__class__ is str:
+                record[name] = convert(value)
+    except _CONVERSION_ERRORS:
+        # Values converted before the failure are no longer strings.
+        for record in records:
+            value = record.get(name)
+            if value.__class__ is str:
+                record[name] = fallback(value)
+
+
+def iter_batches(records: Iterable[Record], size: int) -> Iterator[list[Record]]:
+    """Split an iterable of records into lists of at most ``size`` records.
+
+    Args:
+        records: The records to batch.
+        size: The maximum batch size.
+
+    Yields:
+        Lists of records.
+    """
+    iterator = iter(records)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+class RecordTransformer:
+    """Coerce numeric-as-string fields over batches of records.
+
+    The coercion plan is compiled once from a stream schema: every top-level
+    ``integer`` or ``number`` property is paired with the function converting its
+    string values. A batch is then transformed one field at a time over all of its
+    records, skipping fields absent from the whole batch, instead of looking up the
+    schema for every field of every record. Values that do not parse are left
+    untouched.
+    """
+
+    def __init__(
+        self,
+        schema: dict,
+        *,
+        fields: Collection[str] | None = None,
+        fill_missing: Sequence[str] = (),
+    ) -> None:
+        """Compile the coercion plan for a schema.
+
+        Args:
+            schema: The stream's JSON schema.
+            fields: The properties to coerce, if not every numeric property.
+            fill_missing: Properties set to None when absent from a record.
+        """
+        plan: list[tuple[str, t.Callable[[str], t.Any], t.Callable[[str], t.Any]]] = []
+        for name, property_schema in schema.get("properties", {}).items():
+            if fields is not None and name not in fields:
+                continue
+            types = schema_types(property_schema)
+            if "integer" in types:
+                plan.append((name, *_INTEGER))
+            elif "number" in types:
+                plan.append((name, *_NUMBER))
+        self.plan = tuple(plan)
+        self.fill_missing = tuple(fill_missing)
+
+    def __bool__(self) -> bool:
+        """Return False if the transformer would leave every record unchanged."""
+        return bool(self.plan or self.fill_missing)
+
+    def transform(self, records: list[Record]) -> list[Record]:
+        """Coerce a batch of records in place.
+
+        Args:
+            records: The records to transform.
+
+        Returns:
+            The same list of records.
+        """
+        for name in self.fill_missing:
+            for record in records:
+                if name not in record:
+                    record[name] = None
+        present = set().union(*records)
+        for name, convert, fallback in self.plan:
+            if name in present:
+                _coerce_field(records, name, convert, fallback)
+        return records
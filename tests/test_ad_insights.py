@@ -0,0 +1,620 @@
+"""Tests for the AdsInsightStream job handling."""
+
+from __future__ import annotations
+
+import time
+import typing as t
+from unittest import mock
+
+import pendulum
+import pytest
+import requests
+from facebook_business.adobjects.adreportrun import AdReportRun
+from facebook_business.adobjects.adsinsights import AdsInsights
+
+from tap_facebook.streams import AdsInsightStream
+from tap_facebook.streams.ad_insights import INSIGHTS_JOB_REUSE_MAX_AGE_SECONDS
+from tap_facebook.tap import TapFacebook
+
+if t.TYPE_CHECKING:
+    from pathlib import Path
+
+START_DATE = pendulum.today().subtract(days=3)
+
+CONFIG = {
+    "access_token": "token",
+    "account_id": "123",
+    "start_date": START_DATE.to_iso8601_string(),
+    "end_date": START_DATE.to_date_string(),
+}
+
+
+class FakeAccount:
+    """Stand-in for ``AdAccount`` that hands out report runs.
+
+    Synchronous requests time out unless ``sync_rows`` is given.
+    """
+
+    def __init__(self, sync_rows: list[dict] | None = None) -> None:
+        """Initialize the fake account."""
+        self.submitted: list[dict] = []
+        self.sync_requests: list[dict] = []
+        self.sync_rows = sync_rows
+
+    def get_insights(
+        self,
+        params: dict,
+        is_async: bool = False,  # noqa: FBT001, FBT002
+    ) -> AdReportRun | list[AdsInsights]:
+        if not is_async:
+            self.sync_requests.append(params)
+            if self.sync_rows is None:
+                raise requests.exceptions.ReadTimeout
+            return [_insights_row(row) for row in self.sync_rows]
+        self.submitted.append(params)
+        return AdReportRun(fbid=f"job-{len(self.submitted)}")
+
+
+def _insights_row(data: dict) -> AdsInsights:
+    row = AdsInsights()
+    row._set_data(data)  # noqa: SLF001
+    return row
+
+
+def _client(account: FakeAccount) -> mock.Mock:
+    def initialize_client(stream: AdsInsightStream) -> None:
+        stream.account = account
+        stream.sync_account = account
+
+    return mock.patch.object(AdsInsightStream, "_initialize_client", initialize_client)
+
+
+def _insights_stream(state: dict | None = None) -> AdsInsightStream:
+    tap = TapFacebook(config=CONFIG, state=state or {})
+    return tap.streams["adsinsights_default"]
+
+
+def _report_run_lifecycle(statuses: list[str | BaseException]) -> mock.Mock:
+    """Patch ``AdReportRun.api_get`` to walk through the given job statuses."""
+    remaining = iter(statuses)
+
+    def api_get(job: AdReportRun) -> AdReportRun:
+        status = next(remaining)
+        if isinstance(status, BaseException):
+            raise status
+        job._set_data(  # noqa: SLF001
+            {
+                "id": job["id"],
+                "async_status": status,
+                "async_percent_completion": 100 if status == "Job Completed" else 0,
+            },
+        )
+        return job
+
+    return mock.patch.object(AdReportRun, "api_get", autospec=True, side_effect=api_get)
+
+
+def _result_rows() -> mock.Mock:
+    row = _insights_row(
+        {"ad_id": "1", "account_id": "123", "date_start": START_DATE.to_date_string()},
+    )
+    return mock.patch.object(AdReportRun, "get_result", autospec=True, return_value=[row])
+
+
+@pytest.fixture(autouse=True)
+def _no_sleep() -> t.Iterator[None]:
+    with mock.patch("tap_facebook.streams.ad_insights.time.sleep"):
+        yield
+
+
+def test_interrupted_job_is_reattached_on_restart():
+    account = FakeAccount()
+
+    stream = _insights_stream()
+    with (
+        _client(account),
+        _report_run_lifecycle(["Job Running", KeyboardInterrupt()]),
+        pytest.raises(KeyboardInterrupt),
+    ):
+        list(stream._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    assert len(account.submitted) == 1
+    report_runs = stream.stream_state["report_runs"]
+    (checkpoint,) = report_runs.values()
+    assert checkpoint["report_run_id"] == "job-1"
+    assert checkpoint["time_range"] == account.submitted[0]["time_range"]
+
+    restarted = _insights_stream(state=stream.tap_state)
+    with (
+        _client(account),
+        _report_run_lifecycle(["Job Completed", "Job Completed"]),
+        _result_rows(),
+    ):
+        records = list(restarted._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    assert len(account.submitted) == 1
+    assert records == [
+        {"ad_id": "1", "account_id": "123", "date_start": START_DATE.to_date_string()},
+    ]
+    assert restarted.stream_state["report_runs"] == {}
+
+
+def test_failed_job_is_resubmitted_on_restart():
+    account = FakeAccount()
+
+    stream = _insights_stream()
+    with (
+        _client(account),
+        _report_run_lifecycle(["Job Failed"]),
+        pytest.raises(RuntimeError),
+    ):
+        list(stream._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    restarted = _insights_stream(state=stream.tap_state)
+    with (
+        _client(account),
+        _report_run_lifecycle(["Job Failed", "Job Completed"]),
+        _result_rows(),
+    ):
+        records = list(restarted._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    assert len(account.submitted) == 2
+    assert len(records) == 1
+    assert restarted.stream_state["report_runs"] == {}
+
+
+def test_stale_report_runs_are_pruned():
+    stale = {
+        "report_run_id": "job-0",
+        "time_range": {"since": "2020-01-01", "until": "2020-01-01"},
+        "submitted_at": int(time.time()) - INSIGHTS_JOB_REUSE_MAX_AGE_SECONDS - 1,
+    }
+    state = {"bookmarks": {"adsinsights_default": {"report_runs": {"stale": stale}}}}
+    account = FakeAccount()
+
+    stream = _insights_stream(state=state)
+    with (
+        _client(account),
+        _report_run_lifecycle(["Job Completed", "Job Completed"]),
+        _result_rows(),
+    ):
+        list(stream._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    assert stream.stream_state["report_runs"] == {}
+
+
+def test_completed_windows_are_served_from_cache(tmp_path: Path):
+    account = FakeAccount()
+    config = {**CONFIG, "insights_cache_dir": str(tmp_path)}
+
+    for _ in range(2):
+        stream = TapFacebook(config=config).streams["adsinsights_default"]
+        with (
+            _client(account),
+            _report_run_lifecycle(["Job Completed"]),
+            _result_rows(),
+        ):
+            records = list(stream._sync_records(None, write_messages=False))  # noqa: SLF001
+        assert records == [
+            {"ad_id": "1", "account_id": "123", "date_start": START_DATE.to_date_string()},
+        ]
+
+    assert len(account.submitted) == 1
+
+
+def test_small_windows_use_the_synchronous_endpoint():
+    row = {"ad_id": "1", "account_id": "123", "date_start": START_DATE.to_date_string()}
+    account = FakeAccount(sync_rows=[row])
+
+    stream = _insights_stream()
+    with _client(account):
+        records = list(stream._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    assert records == [row]
+    assert len(account.sync_requests) == 1
+    assert account.submitted == []
+
+
+@pytest.mark.parametrize(
+    ("level", "time_increment_days", "expected"),
+    [
+        pytest.param("account", 1, True, id="account-day"),
+        pytest.param("account", 365, False, id="account-year"),
+        pytest.param("campaign", 30, False, id="campaign-month"),
+    ],
+)
+def test_only_small_windows_use_the_synchronous_endpoint(
+    level: str,
+    time_increment_days: int,
+    expected: bool,  # noqa: FBT001
+):
+    report = {"name": "sized", "level": level, "time_increment_days": time_increment_days}
+    stream = TapFacebook(config={**CONFIG, "insight_reports_list": [report]}).streams[
+        "adsinsights_sized"
+    ]
+    params = stream._get_window_params(  # type: ignore[attr-defined]  # noqa: SLF001
+        START_DATE,
+        START_DATE.add(days=time_increment_days),
+        [],
+    )
+
+    assert stream._use_sync_request(params) is expected  # type: ignore[attr-defined]  # noqa: SLF001
+
+
+def test_synchronous_endpoint_is_skipped_when_disabled():
+    config = {
+        **CONFIG,
+        "insight_reports_list": [{"name": "async", "use_synchronous_requests": False}],
+    }
+    account = FakeAccount(sync_rows=[])
+
+    stream = TapFacebook(config=config).streams["adsinsights_async"]
+    with (
+        _client(account),
+        _report_run_lifecycle(["Job Completed"]),
+        _result_rows(),
+    ):
+        list(stream._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    assert account.sync_requests == []
+    assert len(account.submitted) == 1
+
+
+@pytest.mark.parametrize(
+    ("filtering", "expected"),
+    [
+        pytest.param(None, None),
+        pytest.param(
+            [{"field": "spend", "operator": "GREATER_THAN", "value": 0}],
+            [{"field": "spend", "operator": "GREATER_THAN", "value": 0}],
+        ),
+        pytest.param([], None),
+    ],
+)
+def test_reports_are_filtered_by_the_api(filtering: list[dict] | None, expected: list[dict] | None):
+    report = {"name": "filtered"}
+    if filtering is not None:
+        report["filtering"] = filtering
+    account = FakeAccount(sync_rows=[])
+
+    stream = TapFacebook(config={**CONFIG, "insight_reports_list": [report]}).streams[
+        "adsinsights_filtered"
+    ]
+    with _client(account):
+        list(stream._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    (params,) = account.sync_requests
+    assert params.get("filtering") == expected
+
+
+@pytest.mark.parametrize(
+    ("drop_zero_rows", "expected"),
+    [
+        pytest.param(True, ["delivered", "converted", "unmeasured"], id="dropped"),
+        pytest.param(False, ["delivered", "converted", "unmeasured", "zero"], id="kept"),
+    ],
+)
+def test_rows_without_any_metric_are_dropped(drop_zero_rows: bool, expected: list[str]):  # noqa: FBT001
+    day = START_DATE.to_date_string()
+    rows = [
+        {"ad_id": "delivered", "date_start": day, "impressions": "10", "spend": "0"},
+        {"ad_id": "converted", "date_start": day, "impressions": "0", "actions": [{"value": "1"}]},
+        {"ad_id": "unmeasured", "date_start": day},
+        {"ad_id": "zero", "date_start": day, "impressions": "0", "spend": "0.00"},
+    ]
+    config = {
+        **CONFIG,
+        "insight_reports_list": [{"name": "zero", "drop_zero_rows": drop_zero_rows}],
+    }
+    account = FakeAccount(sync_rows=rows)
+
+    stream = TapFacebook(config=config).streams["adsinsights_zero"]
+    with _client(account):
+        records = list(stream._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    assert [record["ad_id"] for record in records] == expected
+
+
+def test_windows_are_packed_into_a_job_with_time_ranges():
+    config = {
+        **CONFIG,
+        "end_date": START_DATE.add(days=2).to_date_string(),
+        "insight_reports_list": [
+            {"name": "packed", "use_synchronous_requests": False, "windows_per_job": 3},
+        ],
+    }
+    days = [START_DATE.add(days=offset).to_date_string() for offset in range(4)]
+    rows = [_insights_row({"ad_id": "1", "date_start": day, "date_stop": day}) for day in days]
+    account = FakeAccount()
+
+    stream = TapFacebook(config=config).streams["adsinsights_packed"]
+    assert stream.plan_sync()["jobs"] == 1  # type: ignore[attr-defined]
+    with (
+        _client(account),
+        _report_run_lifecycle(["Job Completed"]),
+        mock.patch.object(AdReportRun, "get_result", autospec=True, return_value=rows),
+    ):
+        records = list(stream._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    # Each window spans its day and the next, split into one range per day.
+    [params] = account.submitted
+    assert params["time_ranges"] == [{"since": day, "until": day} for day in days]
+    assert "time_range" not in params
+    assert [record["date_start"] for record in records] == days
+    assert "next_window_start" not in stream.stream_state
+    assert stream.stream_state["replication_key_value"] == days[-1]
+
+
+def test_wide_reports_are_split_into_jobs_joined_by_key():
+    config = {
+        **CONFIG,
+        "insight_reports_list": [
+            {"name": "split", "use_synchronous_requests": False, "max_fields_per_job": 10},
+        ],
+    }
+    account = FakeAccount()
+    day = START_DATE.to_date_string()
+
+    def get_result(job: AdReportRun) -> list[AdsInsights]:
+        fields = account.submitted[int(job["id"].removeprefix("job-")) - 1]["fields"]
+        return [
+            _insights_row(
+                {field: f"{ad_id}:{field}" for field in fields}
+                | {"ad_id": ad_id, "account_id": "123", "date_start": day, "date_stop": day},
+            )
+            for ad_id in ("1", "2")
+        ]
+
+    stream = TapFacebook(config=config).streams["adsinsights_split"]
+    fields = ["account_id", "ad_id", *sorted(stream.schema["properties"])[:25]]
+    for field in fields:
+        stream.metadata["properties", field].selected = True
+    jobs = 3
+    with (
+        _client(account),
+        _report_run_lifecycle(["Job Completed"] * jobs),
+        mock.patch.object(AdReportRun, "get_result", autospec=True, side_effect=get_result),
+    ):
+        records = list(stream._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    assert len(account.submitted) == jobs
+    for params in account.submitted:
+        assert params["fields"][:2] == ["account_id", "ad_id"]
+        assert len(params["fields"]) <= 12
+    assert [record["ad_id"] for record in records] == ["1", "2"]
+    assert set(records[1]) >= set(fields)
+
+
+class CampaignAccount(FakeAccount):
+    """Lists the given campaigns."""
+
+    def __init__(self, campaign_ids: list[str]) -> None:
+        """Initialize the fake account."""
+        super().__init__()
+        self.campaign_ids = campaign_ids
+        self.campaign_listings = 0
+
+    def get_campaigns(self, fields: list[str], params: dict) -> list[dict]:  # noqa: ARG002
+        self.campaign_listings += 1
+        return [{"id": campaign_id} for campaign_id in self.campaign_ids]
+
+
+def test_large_accounts_are_sharded_by_campaign():
+    config = {
+        **CONFIG,
+        "end_date": START_DATE.add(days=1).to_date_string(),
+        "insight_reports_list": [
+            {"name": "sharded", "use_synchronous_requests": False, "campaigns_per_job": 2},
+        ],
+    }
+    account = CampaignAccount(["1", "2", "3"])
+
+    def get_result(job: AdReportRun) -> list[AdsInsights]:
+        params = account.submitted[int(job["id"].removeprefix("job-")) - 1]
+        campaign_filter = params["filtering"][-1]
+        return [
+            _insights_row(
+                {
+                    "campaign_id": campaign_id,
+                    "ad_id": f"ad-{campaign_id}",
+                    "date_start": params["time_range"]["since"],
+                },
+            )
+            for campaign_id in campaign_filter["value"]
+        ]
+
+    stream = TapFacebook(config=config).streams["adsinsights_sharded"]
+    for field in ("campaign_id", "ad_id"):
+        stream.metadata["properties", field].selected = True
+    jobs = 4
+    with (
+        _client(account),
+        _report_run_lifecycle(["Job Completed"] * jobs),
+        mock.patch.object(AdReportRun, "get_result", autospec=True, side_effect=get_result),
+    ):
+        records = list(stream._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    assert account.campaign_listings == 1
+    assert [params["filtering"][-1] for params in account.submitted[:2]] == [
+        {"field": "campaign.id", "operator": "IN", "value": ["1", "2"]},
+        {"field": "campaign.id", "operator": "IN", "value": ["3"]},
+    ]
+    assert [record["campaign_id"] for record in records] == ["1", "2", "3"] * 2
+    assert not stream.stream_state.get("report_runs")
+
+
+def test_campaign_shards_wait_for_jobs_to_finish():
+    config = {
+        **CONFIG,
+        "insight_reports_list": [
+            {"name": "sharded", "use_synchronous_requests": False, "campaigns_per_job": 1},
+        ],
+    }
+    account = CampaignAccount(["1", "2", "3", "4"])
+    submitted_at_read = []
+
+    def get_result(job: AdReportRun) -> list[AdsInsights]:
+        submitted_at_read.append(len(account.submitted))
+        params = account.submitted[int(job["id"].removeprefix("job-")) - 1]
+        (campaign_id,) = params["filtering"][-1]["value"]
+        return [
+            _insights_row({"campaign_id": campaign_id, "date_start": START_DATE.to_date_string()}),
+        ]
+
+    stream = TapFacebook(config=config).streams["adsinsights_sharded"]
+    stream.metadata["properties", "campaign_id"].selected = True
+    with (
+        _client(account),
+        _report_run_lifecycle(["Job Completed"] * 4),
+        mock.patch.object(AdReportRun, "get_result", autospec=True, side_effect=get_result),
+        mock.patch("tap_facebook.streams.ad_insights.INSIGHTS_MAX_JOBS_IN_FLIGHT", 2),
+    ):
+        records = list(stream._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    # Each finished shard makes room for the next one.
+    assert submitted_at_read == [3, 4, 4, 4]
+    assert [record["campaign_id"] for record in records] == ["1", "2", "3", "4"]
+
+
+class WindowAccount(FakeAccount):
+    """Returns one row per synchronous window, interrupted after ``fail_after`` windows."""
+
+    def __init__(self, fail_after: int | None = None) -> None:
+        """Initialize the fake account."""
+        super().__init__(sync_rows=[])
+        self.fail_after = fail_after
+
+    def get_insights(
+        self,
+        params: dict,
+        is_async: bool = False,  # noqa: FBT001, FBT002
+    ) -> AdReportRun | list[AdsInsights]:
+        if len(self.sync_requests) == self.fail_after:
+            raise KeyboardInterrupt
+        self.sync_rows = [{"ad_id": "1", "date_start": params["time_range"]["since"]}]
+        return super().get_insights(params, is_async)
+
+
+class ProbedAccount(FakeAccount):
+    """Delivered on the given dates, and returns one row per synchronous window."""
+
+    def __init__(self, active_dates: list[str]) -> None:
+        """Initialize the fake account."""
+        super().__init__(sync_rows=[])
+        self.active_dates = active_dates
+
+    def get_insights(
+        self,
+        params: dict,
+        is_async: bool = False,  # noqa: FBT001, FBT002
+    ) -> AdReportRun | list[AdsInsights]:
+        if params["level"] == "account":
+            self.sync_rows = [
+                {"date_start": day, "spend": "1.50", "impressions": "10"}
+                for day in self.active_dates
+            ]
+        else:
+            self.sync_rows = [{"ad_id": "1", "date_start": params["time_range"]["since"]}]
+        return super().get_insights(params, is_async)
+
+
+def test_windows_without_delivery_are_skipped():
+    config = {
+        **CONFIG,
+        "end_date": START_DATE.add(days=2).to_date_string(),
+        "insight_reports_list": [{"name": "probed", "probe_delivery": True}],
+    }
+    account = ProbedAccount([START_DATE.add(days=1).to_date_string()])
+
+    stream = TapFacebook(config=config).streams["adsinsights_probed"]
+    with _client(account):
+        records = list(stream._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    probe, *windows = account.sync_requests
+    assert probe["fields"] == ["spend", "impressions", "actions"]
+    assert probe["time_increment"] == 1
+    assert probe["time_range"] == {
+        "since": START_DATE.to_date_string(),
+        "until": START_DATE.add(days=3).to_date_string(),
+    }
+    # The last window, from the third to the fourth day, had no delivery.
+    assert [window["time_range"]["since"] for window in windows] == [
+        START_DATE.to_date_string(),
+        START_DATE.add(days=1).to_date_string(),
+    ]
+    assert len(records) == 2
+    assert stream.stream_state["delivery_probe"]["skipped_windows"] == [
+        START_DATE.add(days=2).to_date_string(),
+    ]
+
+
+def test_failed_probes_sync_every_window(caplog: pytest.LogCaptureFixture):
+    config = {
+        **CONFIG,
+        "end_date": START_DATE.add(days=2).to_date_string(),
+        "insight_reports_list": [{"name": "probed", "probe_delivery": True}],
+    }
+    account = ProbedAccount([])
+
+    def get_insights(params: dict, is_async: bool = False) -> AdReportRun | list[AdsInsights]:  # noqa: FBT001, FBT002
+        if params["level"] == "account":
+            raise requests.exceptions.ConnectionError
+        return ProbedAccount.get_insights(account, params, is_async)
+
+    stream = TapFacebook(config=config).streams["adsinsights_probed"]
+    with (
+        _client(account),
+        mock.patch.object(account, "get_insights", side_effect=get_insights),
+        caplog.at_level("INFO"),
+    ):
+        records = list(stream._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    assert len(records) == 3
+    assert "Delivery probe failed, syncing every window" in caplog.text
+    assert "falling back to an async job" not in caplog.text
+
+
+def test_interrupted_backfill_resumes_at_the_next_window():
+    config = {**CONFIG, "end_date": START_DATE.add(days=2).to_date_string()}
+    account = WindowAccount(fail_after=2)
+
+    stream = TapFacebook(config=config).streams["adsinsights_default"]
+    with _client(account), pytest.raises(KeyboardInterrupt):
+        list(stream._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    assert stream.is_sorted
+    assert stream.stream_state["next_window_start"] == START_DATE.add(days=2).to_date_string()
+    assert stream.stream_state["replication_key_value"] == START_DATE.add(days=1).to_date_string()
+
+    restarted = TapFacebook(config=config, state=stream.tap_state).streams["adsinsights_default"]
+    account = WindowAccount()
+    with _client(account):
+        records = list(restarted._sync_records(None, write_messages=False))  # noqa: SLF001
+
+    last_date = START_DATE.add(days=2).to_date_string()
+    assert [params["time_range"]["since"] for params in account.sync_requests] == [last_date]
+    assert [record["date_start"] for record in records] == [last_date]
+    assert "next_window_start" not in restarted.stream_state
+    assert restarted.stream_state["replication_key_value"] == last_date
+
+
+def test_rows_do_not_advance_the_bookmark_of_sorted_syncs():
+    stream = TapFacebook(config=CONFIG).streams["adsinsights_default"]
+    stream._write_starting_replication_value(None)  # noqa: SLF001
+    bookmark = dict(stream.stream_state)
+
+    stream._increment_stream_state({"date_start": "2030-01-01"})  # noqa: SLF001
+
+    assert stream.stream_state == bookmark
+
+
+def test_batch_syncs_are_not_resumable(tmp_path: Path):
+    batch_config = {
+        "encoding": {"format": "jsonl", "compression": "gzip"},
+        "storage": {"root": f"file://{tmp_path}"},
+    }
+    stream = TapFacebook(config={**CONFIG, "batch_config": batch_config}).streams[
+        "adsinsights_default"
+    ]
+
+    assert not stream.is_sorted
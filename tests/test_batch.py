@@ -0,0 +1,149 @@
+"""Tests for BATCH message output."""
+
+from __future__ import annotations
+
+import gzip
+import json
+import typing as t
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+import pyarrow.parquet as pq
+import pytest
+import requests
+from singer_sdk.helpers._batch import BatchConfig, SDKBatchMessage
+from singer_sdk.singerlib import StateMessage
+
+from tap_facebook.client import RESUME_CURSOR_KEY, RESUME_CURSOR_STATE_PAGES
+from tap_facebook.streams import AdsetsStream
+from tap_facebook.tap import TapFacebook
+
+if t.TYPE_CHECKING:
+    from pathlib import Path
+
+ROWS = [
+    {
+        "id": "1",
+        "name": "adset",
+        "updated_time": "2024-01-02T00:00:00+0000",
+        "daily_budget": "100",
+        "targeting": {"age_max": 65, "publisher_platforms": ["facebook"]},
+        "promoted_object": {"pixel_id": "4", "event_id": 5},
+        "not_in_schema": "x",
+    },
+    {"id": "2", "updated_time": "2024-01-03T00:00:00+0000"},
+    {"id": "3", "updated_time": "2024-01-04T00:00:00+0000", "bid_amount": 5},
+]
+
+
+def _batch_config(tmp_path: Path, encoding_format: str) -> dict:
+    return {
+        "encoding": {"format": encoding_format, "compression": "gzip"},
+        "storage": {"root": f"file://{tmp_path}"},
+        "batch_size": 2,
+    }
+
+
+def _get_batches(tmp_path: Path, encoding_format: str) -> list[list[str]]:
+    config = {
+        "access_token": "token",
+        "account_id": "123",
+        "start_date": "2024-01-01T00:00:00Z",
+        "batch_config": _batch_config(tmp_path, encoding_format),
+    }
+    stream = TapFacebook(config=config).streams["adsets"]
+    batch_config = stream.get_batch_config(stream.config)
+    assert isinstance(batch_config, BatchConfig)
+
+    with mock.patch.object(AdsetsStream, "get_records", return_value=iter(ROWS)):
+        batches = list(stream.get_batches(batch_config))
+    return [manifest for _, manifest in batches]
+
+
+@pytest.mark.parametrize("encoding_format", ["jsonl", "parquet"])
+def test_batches_are_chunked(tmp_path: Path, encoding_format: str):
+    manifests = _get_batches(tmp_path, encoding_format)
+
+    assert [len(manifest) for manifest in manifests] == [1, 1]
+    assert all(url.startswith("file://") for (url,) in manifests)
+
+
+def test_jsonl_records_are_conformed(tmp_path: Path):
+    manifests = _get_batches(tmp_path, "jsonl")
+
+    lines = []
+    for (url,) in manifests:
+        with gzip.open(url.removeprefix("file://")) as f:
+            lines.extend(json.loads(line) for line in f)
+
+    assert [line["id"] for line in lines] == ["1", "2", "3"]
+    assert "not_in_schema" not in lines[0]
+
+
+def test_parquet_files_share_the_stream_schema(tmp_path: Path):
+    manifests = _get_batches(tmp_path, "parquet")
+
+    tables = [pq.read_table(url.removeprefix("file://")) for (url,) in manifests]
+
+    assert tables[0].schema == tables[1].schema
+    assert "bid_amount" in tables[0].column_names
+    first, *_ = tables[0].to_pylist()
+    assert first["promoted_object"]["pixel_id"] == "4"
+    assert first["promoted_object"]["event_id"] == 5
+    # Objects with untyped nested properties are stored as JSON strings.
+    assert json.loads(first["targeting"]) == {"age_max": 65, "publisher_platforms": ["facebook"]}
+    assert tables[1].to_pylist()[0]["bid_amount"] == 5
+
+
+def _send_page(request: requests.PreparedRequest, **_: object) -> requests.Response:
+    page = int(parse_qs(urlparse(request.url).query).get("after", ["0"])[0])
+    paging = {"cursors": {"after": str(page + 1)}} if page < RESUME_CURSOR_STATE_PAGES else {}
+    response = requests.Response()
+    response.url = t.cast("str", request.url)
+    response.status_code = 200
+    response._content = json.dumps(  # noqa: SLF001
+        {
+            "data": [{"id": str(page), "updated_time": "2024-01-02T00:00:00+0000"}],
+            "paging": paging,
+        },
+    ).encode()
+    return response
+
+
+def _states_before_batch(tmp_path: Path, stream_name: str, **settings: object) -> list[str]:
+    config = {
+        "access_token": "token",
+        "account_id": "123",
+        "start_date": "2024-01-01T00:00:00Z",
+        # A single file, emitted once every page has been listed.
+        "batch_config": {**_batch_config(tmp_path, "jsonl"), "batch_size": 100},
+        **settings,
+    }
+    tap = TapFacebook(config=config)
+    messages: list[tuple[type, str]] = []
+
+    def write_message(message: object) -> None:
+        # The state is mutated in place, so it is serialized as it is emitted.
+        messages.append((type(message), json.dumps(getattr(message, "value", None))))
+
+    with (
+        mock.patch.object(requests.Session, "send", side_effect=_send_page),
+        mock.patch.object(tap, "write_message", side_effect=write_message),
+    ):
+        tap.streams[stream_name].sync()
+
+    kinds = [kind for kind, _ in messages]
+    first_batch = kinds.index(SDKBatchMessage)
+    return [value for kind, value in messages[:first_batch] if kind is StateMessage]
+
+
+def test_batch_syncs_do_not_checkpoint_listings(tmp_path: Path):
+    states = _states_before_batch(tmp_path, "adlabels")
+
+    assert all(RESUME_CURSOR_KEY not in value for value in states)
+
+
+def test_batch_syncs_do_not_checkpoint_slices(tmp_path: Path):
+    states = _states_before_batch(tmp_path, "adsets", end_date="2024-01-10", backfill_slices=3)
+
+    assert states == []
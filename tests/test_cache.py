@@ -0,0 +1,147 @@
+"""Tests for the local disk cache."""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+import typing as t
+from unittest import mock
+
+import requests
+
+from tap_facebook.cache import DiskCache
+from tap_facebook.tap import TapFacebook
+
+if t.TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_round_trip(tmp_path: Path):
+    cache = DiskCache(tmp_path)
+    key = DiskCache.make_key("act_1", {"level": "ad"}, "v22.0")
+
+    assert cache.get(key) is None
+    cache.put(key, b"payload")
+    assert cache.get(key) == b"payload"
+
+
+def test_write_through_only_stores_complete_results(tmp_path: Path):
+    cache = DiskCache(tmp_path)
+    rows = [{"id": "1"}, {"id": "2"}]
+
+    partial = cache.write_through("partial", iter(rows))
+    next(partial)
+    partial.close()
+    assert cache.iter_lines("partial") is None
+
+    assert list(cache.write_through("complete", iter(rows))) == rows
+    lines = cache.iter_lines("complete")
+    assert lines is not None
+    assert list(lines) == rows
+
+
+def test_expired_entries_are_ignored(tmp_path: Path):
+    cache = DiskCache(tmp_path, ttl_seconds=60)
+    cache.put("key", b"payload")
+    path = next(tmp_path.glob("*/*.gz"))
+    stale = time.time() - 120
+    os.utime(path, (stale, stale))
+
+    assert cache.get("key") is None
+    assert not path.exists()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: Path):
+    cache = DiskCache(tmp_path)
+    payload = os.urandom(1024)
+    for key in ("a", "b", "c"):
+        cache.put(key, payload)
+    now = time.time()
+    for age, key in ((30, "a"), (20, "b"), (10, "c")):
+        path = next(tmp_path.glob(f"*/{key}.gz"))
+        os.utime(path, (now - age, now))
+
+    cache.get("a")
+    cache.max_bytes = 2 * next(tmp_path.glob("*/a.gz")).stat().st_size
+    cache.evict()
+
+    assert cache.get("a") == payload
+    assert cache.get("b") is None
+    assert cache.get("c") == payload
+
+
+def test_writes_only_scan_the_cache_once_over_its_size(tmp_path: Path):
+    DiskCache(tmp_path).put("old", os.urandom(1024))
+    size = next(tmp_path.glob("*/old.gz")).stat().st_size
+    cache = DiskCache(tmp_path, max_bytes=3 * size)
+
+    with mock.patch.object(cache, "evict", wraps=cache.evict) as evict:
+        cache.put("a", os.urandom(1024))
+        cache.put("b", os.urandom(1024))
+        assert not evict.called
+        cache.put("c", os.urandom(1024))
+        evict.assert_called_once()
+
+    assert cache.get("old") is None
+    assert cache.get("c") is not None
+
+
+def test_iter_lines_streams_rows(tmp_path: Path):
+    cache = DiskCache(tmp_path)
+    rows = [{"id": str(i)} for i in range(1000)]
+    list(cache.write_through("key", iter(rows)))
+
+    lines = cache.iter_lines("key")
+
+    assert lines is not None
+    assert next(lines) == {"id": "0"}
+    assert list(lines) == rows[1:]
+    assert cache.iter_lines("missing") is None
+
+
+def test_corrupt_entries_are_misses(tmp_path: Path):
+    cache = DiskCache(tmp_path)
+    list(cache.write_through("key", iter([{"id": "1"}] * 1000)))
+    path = next(tmp_path.glob("*/*.gz"))
+    path.write_bytes(path.read_bytes()[:-10])
+
+    assert cache.iter_lines("key") is None
+
+
+class ETagGraph:
+    """Serves a single page of ad labels, honoring If-None-Match."""
+
+    etag = '"v1"'
+    body = json.dumps({"data": [{"id": "1", "updated_time": "2024-01-02T00:00:00+0000"}]})
+
+    def __init__(self) -> None:
+        """Initialize the fake Graph API."""
+        self.statuses: list[int] = []
+
+    def send(self, request: requests.PreparedRequest, **_: object) -> requests.Response:
+        response = requests.Response()
+        response.url = t.cast("str", request.url)
+        if request.headers.get("If-None-Match") == self.etag:
+            response.status_code = 304
+            response._content = b""  # noqa: SLF001
+        else:
+            response.status_code = 200
+            response.headers["ETag"] = self.etag
+            response._content = self.body.encode()  # noqa: SLF001
+        self.statuses.append(response.status_code)
+        return response
+
+
+def test_unchanged_pages_are_replayed_from_the_http_cache(tmp_path: Path):
+    config = {"access_token": "token", "account_id": "123", "http_cache_dir": str(tmp_path)}
+    graph = ETagGraph()
+
+    with mock.patch.object(requests.Session, "send", graph.send):
+        runs = [
+            list(TapFacebook(config=config).streams["adlabels"].get_records(None)) for _ in range(2)
+        ]
+
+    assert graph.statuses == [200, 304]
+    assert runs[0] == runs[1]
+    assert runs[0][0]["id"] == "1"
@@ -0,0 +1,99 @@
+"""Tests for fetching ahead within a memory budget."""
+
+from __future__ import annotations
+
+import threading
+import typing as t
+
+import pytest
+import requests
+
+from tap_facebook.concurrency import prefetch
+from tap_facebook.tap import TapFacebook
+
+if t.TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+def test_items_are_yielded_in_order():
+    assert list(prefetch(iter(range(100)), max_bytes=10, size=lambda _: 1)) == list(range(100))
+
+
+def test_producer_pauses_while_the_budget_is_used():
+    produced: list[int] = []
+    paused = threading.Event()
+
+    def pages() -> Iterator[int]:
+        for page in range(100):
+            produced.append(page)
+            if len(produced) == 4:
+                paused.set()
+            yield page
+
+    items = prefetch(pages(), max_bytes=30, size=lambda _: 10)
+    assert next(items) == 0
+    paused.wait(timeout=5)
+
+    # One item is consumed and three fill the budget; the fourth waits to be added.
+    assert len(produced) == 4
+    assert list(items) == list(range(1, 100))
+
+
+def test_oversized_items_do_not_block():
+    assert list(prefetch(iter("abc"), max_bytes=1, size=lambda _: 10)) == ["a", "b", "c"]
+
+
+def test_errors_are_raised_after_earlier_items():
+    def pages() -> Iterator[int]:
+        yield 1
+        yield 2
+        msg = "page 3 failed"
+        raise RuntimeError(msg)
+
+    items = prefetch(pages(), max_bytes=100, size=lambda _: 1)
+
+    assert next(items) == 1
+    assert next(items) == 2
+    with pytest.raises(RuntimeError, match="page 3 failed"):
+        next(items)
+
+
+def test_closing_stops_the_producer():
+    stopped = threading.Event()
+
+    def pages() -> Iterator[int]:
+        try:
+            yield from range(1000)
+        finally:
+            stopped.set()
+
+    items = prefetch(pages(), max_bytes=10, size=lambda _: 1)
+    next(items)
+    items.close()
+
+    assert stopped.wait(timeout=5)
+
+
+def _response(body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = body  # noqa: SLF001
+    return response
+
+
+def test_fetching_ahead_is_off_by_default():
+    tap = TapFacebook(config={"access_token": "token", "account_id": "123"})
+
+    assert tap.config["max_buffer_mb"] == 0
+
+
+def test_responses_are_decoded_once_per_thread():
+    stream = TapFacebook(config={"access_token": "token", "account_id": "123"}).streams["ads"]
+    main, background = _response(b'{"data": [1]}'), _response(b'{"data": [2]}')
+    payload = stream.decode_response(main)
+
+    thread = threading.Thread(target=stream.decode_response, args=(background,))
+    thread.start()
+    thread.join()
+
+    assert stream.decode_response(main) is payload
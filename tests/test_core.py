@@ -27,12 +27,12 @@ TestTapFacebook = get_tap_test_class(
 )
 
 
-def test_ads_accounts_post_process():
+def test_ads_accounts_record_transformer():
     row = {"amount_spent": "0", "balance": "1", "min_campaign_group_spend_cap": "2"}
 
     ads_accounts_stream = AdAccountsStream(tap=TapFacebook(config=SAMPLE_CONFIG))
 
-    post_processed_row = ads_accounts_stream.post_process(row)
+    (post_processed_row,) = ads_accounts_stream.record_transformer.transform([row])
 
     assert post_processed_row["spend_cap"] is None
     assert post_processed_row["amount_spent"] == 0
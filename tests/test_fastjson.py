@@ -0,0 +1,109 @@
+"""Tests for msgspec-based JSON decoding and message encoding."""
+
+from __future__ import annotations
+
+import datetime as dt
+import decimal
+import json
+from unittest import mock
+
+import pytest
+from facebook_business.adobjects.adreportrun import AdReportRun
+from facebook_business.api import FacebookResponse
+from singer_sdk import singerlib as singer
+from singer_sdk.singerlib.encoding import SimpleSingerWriter
+
+from tap_facebook.fastjson import FastSingerWriter, decode_json
+from tap_facebook.tap import TapFacebook
+
+CONFIG = {
+    "access_token": "token",
+    "account_id": "123",
+    "start_date": "2024-01-01T00:00:00Z",
+}
+
+TIME_EXTRACTED = dt.datetime(2024, 1, 2, 3, 4, 5, 678900, tzinfo=dt.timezone.utc)
+
+RECORDS = [
+    {
+        "ad_id": "1",
+        "spend": decimal.Decimal("12.30"),
+        "impressions": 1000,
+        "actions": [{"action_type": "link_click", "value": "3"}],
+        "is_active": True,
+        "budget": None,
+    },
+    {"name": "Café ünïcødé \u2028", "emoji": "\U0001f600"},
+    {"small": 1e-05, "large": 1e16, "plain": 0.1, "exponent": decimal.Decimal("1E+2")},
+    {"nan": decimal.Decimal("NaN"), "control": 'a\x00b\x1fc\x7fd"e\\f\n'},
+    {"big": 2**70, "negative": -0.0, "nested": {"deep": [[1, 2.5], {"x": None}]}},
+]
+
+PAGE = {
+    "data": [
+        {"ad_id": "1", "spend": "1.5", "cpm": 2.25, "actions": [{"value": "1", "x": None}]},
+        {"ad_id": "2", "spend": "3", "reach": None},
+    ],
+    "paging": {"cursors": {"after": "abc"}, "next": "https://graph.facebook.com/next"},
+}
+LAST_PAGE = {
+    "data": [{"ad_id": "3", "spend": "0"}],
+    "paging": {"cursors": {"after": "def"}},
+}
+
+
+@pytest.mark.parametrize("record", RECORDS)
+@pytest.mark.parametrize("time_extracted", [TIME_EXTRACTED, None])
+def test_records_match_default_writer(record: dict, time_extracted: dt.datetime | None):
+    message = singer.RecordMessage(
+        stream="adsinsights_default",
+        record=record,
+        version=1 if time_extracted else None,
+        time_extracted=time_extracted,
+    )
+
+    expected = SimpleSingerWriter().serialize_message(message).encode()
+    assert FastSingerWriter().serialize_message(message) == expected
+
+
+def test_other_messages_match_default_writer():
+    messages = [
+        singer.SchemaMessage(stream="ads", schema={"type": "object"}, key_properties=["id"]),
+        singer.StateMessage(value={"bookmarks": {"ads": {"replication_key_value": "é"}}}),
+    ]
+
+    for message in messages:
+        expected = SimpleSingerWriter().serialize_message(message).encode()
+        assert FastSingerWriter().serialize_message(message) == expected
+
+
+def test_decode_matches_json():
+    body = json.dumps(PAGE).replace('"3"', "3.10").encode()
+
+    assert decode_json(body) == json.loads(body, parse_float=decimal.Decimal)
+    assert decode_json(body, use_decimal=False) == json.loads(body)
+
+
+def test_fast_json_uses_the_fast_writer():
+    assert isinstance(TapFacebook(config=CONFIG).message_writer, SimpleSingerWriter)
+    tap = TapFacebook(config={**CONFIG, "fast_json": True})
+    assert isinstance(tap.message_writer, FastSingerWriter)
+
+
+def test_insights_results_match_cursor():
+    def call(*_: object, **__: object) -> FacebookResponse:
+        page = next(pages)
+        return FacebookResponse(body=json.dumps(page), http_status=200, headers={})
+
+    api = mock.Mock(call=call)
+    job = AdReportRun(fbid="job-1", api=api)
+
+    pages = iter([PAGE, LAST_PAGE])
+    expected = [obj.export_all_data() for obj in job.get_result()]
+
+    pages = iter([PAGE, LAST_PAGE])
+    stream = TapFacebook(config={**CONFIG, "fast_json": True}).streams["adsinsights_default"]
+    rows = list(stream._get_result_rows(job))  # noqa: SLF001
+
+    assert rows == expected
+    assert [row["ad_id"] for row in rows] == ["1", "2", "3"]
@@ -0,0 +1,24 @@
+"""Tests for joining the rows of split reports."""
+
+from __future__ import annotations
+
+from tap_facebook.join import join_rows
+
+
+def test_rows_are_joined_on_their_keys():
+    spend = [
+        {"date_start": "2024-01-02", "ad_id": "2", "spend": "3.5"},
+        {"date_start": "2024-01-01", "ad_id": "1", "spend": "1.0"},
+    ]
+    clicks = [
+        {"date_start": "2024-01-01", "ad_id": "1", "clicks": "4"},
+        {"date_start": "2024-01-01", "ad_id": "3", "clicks": "1"},
+    ]
+
+    rows = list(join_rows(iter([spend, clicks]), ["date_start", "ad_id"]))
+
+    assert rows == [
+        {"date_start": "2024-01-01", "ad_id": "1", "spend": "1.0", "clicks": "4"},
+        {"date_start": "2024-01-01", "ad_id": "3", "clicks": "1"},
+        {"date_start": "2024-01-02", "ad_id": "2", "spend": "3.5"},
+    ]
@@ -0,0 +1,134 @@
+"""Tests for the memory use of large insights syncs.
+
+Set ``TAP_FACEBOOK_MEMORY_TEST_ROWS`` to run the sync at full size, for example
+10000000 rows.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import typing as t
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pendulum
+import pytest
+
+if t.TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+
+resource = pytest.importorskip("resource")
+
+ROWS = int(os.environ.get("TAP_FACEBOOK_MEMORY_TEST_ROWS", "100000"))
+PAGE_SIZE = 500
+BUFFER_MB = 16
+# Peak RSS growth allowed during the sync, on top of the buffer.
+RSS_CEILING_MB = BUFFER_MB + 96
+
+
+def _insights_row(index: int) -> dict:
+    actions = [
+        {"action_type": action_type, "value": str(index * weight)}
+        for weight, action_type in enumerate(("link_click", "post_engagement", "purchase"), 1)
+    ]
+    return {
+        "account_id": "123",
+        "ad_id": str(index),
+        "date_start": "2024-01-01",
+        "date_stop": "2024-01-01",
+        "impressions": "10234",
+        "spend": "45.67",
+        "actions": actions,
+        "action_values": actions,
+    }
+
+
+class MockGraphAPI(BaseHTTPRequestHandler):
+    """Serves a completed report run with ``ROWS`` result rows."""
+
+    def _send(self, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        self._send({"report_run_id": "job-1"})
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        path = url.path.rstrip("/")
+        if path.endswith("/job-1"):
+            self._send(
+                {"id": "job-1", "async_status": "Job Completed", "async_percent_completion": 100},
+            )
+        elif path.endswith("/job-1/insights"):
+            start = int(parse_qs(url.query).get("after", ["0"])[0])
+            end = min(start + PAGE_SIZE, ROWS)
+            page: dict = {"data": [_insights_row(i) for i in range(start, end)]}
+            if end < ROWS:
+                page["paging"] = {"cursors": {"after": str(end)}, "next": "next"}
+            self._send(page)
+        else:
+            self._send({"id": "act_123", "account_id": "123"})
+
+    def log_message(self, *_: object) -> None:
+        pass
+
+
+def _sync_report(graph_url: str, connection: Connection) -> None:
+    """Sync the mock report with stdout discarded, sending back the peak RSS growth."""
+    from facebook_business.session import FacebookSession  # noqa: PLC0415
+
+    from tap_facebook.tap import TapFacebook  # noqa: PLC0415
+
+    FacebookSession.GRAPH = graph_url
+    day = pendulum.today().subtract(days=1).to_date_string()
+    config = {
+        "access_token": "token",
+        "account_id": "123",
+        "start_date": day,
+        "end_date": day,
+        "fast_json": True,
+        "max_buffer_mb": BUFFER_MB,
+        "insight_reports_list": [
+            {"name": "large", "use_synchronous_requests": False},
+        ],
+    }
+    catalog = TapFacebook(config=config).catalog.to_dict()
+    for entry in catalog["streams"]:
+        for metadata in entry["metadata"]:
+            if not metadata["breadcrumb"]:
+                metadata["metadata"]["selected"] = entry["tap_stream_id"] == "adsinsights_large"
+    tap = TapFacebook(config=config, catalog=catalog)
+
+    sys.stdout = open(os.devnull, "w")  # noqa: PTH123, SIM115
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tap.sync_all()
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    connection.send((after - before) / 1024)
+
+
+def test_large_report_syncs_within_memory_ceiling():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockGraphAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    context = multiprocessing.get_context("spawn")
+    connection, child_connection = context.Pipe()
+    process = context.Process(
+        target=_sync_report,
+        args=(f"http://127.0.0.1:{server.server_port}", child_connection),
+    )
+    try:
+        process.start()
+        process.join()
+    finally:
+        server.shutdown()
+
+    assert process.exitcode == 0
+    assert connection.recv() < RSS_CEILING_MB
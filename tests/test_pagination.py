@@ -0,0 +1,400 @@
+"""Tests for the pagination of entity streams."""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import threading
+import time
+import typing as t
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+import pendulum
+import pytest
+import requests
+
+from tap_facebook.client import (
+    RESUME_CURSOR_KEY,
+    RESUME_CURSOR_MAX_AGE_SECONDS,
+    STATUS_SWEEP_KEY,
+)
+from tap_facebook.planning import TIMINGS_KEY
+from tap_facebook.tap import TapFacebook
+
+if t.TYPE_CHECKING:
+    from tap_facebook.client import FacebookStream
+
+CONFIG = {"access_token": "token", "account_id": "123", "start_date": "2024-01-01"}
+
+# Pages of the listing, keyed by the cursor that requests them.
+PAGES = {
+    None: ({"id": "1", "updated_time": "2024-01-02T00:00:00+0000"}, "c1"),
+    "c1": ({"id": "2", "updated_time": "2024-01-03T00:00:00+0000"}, "c2"),
+    "c2": ({"id": "3", "updated_time": "2024-01-04T00:00:00+0000"}, None),
+}
+
+
+class Interrupted(Exception):  # noqa: N818
+    """Stands in for the tap being stopped mid-sync."""
+
+
+class FakeGraph:
+    """Serves the pages of a listing, failing requests for the given cursors."""
+
+    def __init__(
+        self,
+        *,
+        interrupt: str | None = None,
+        fail: dict[str | None, int] | None = None,
+    ) -> None:
+        """Initialize the fake Graph API.
+
+        Args:
+            interrupt: The cursor at which the sync is interrupted.
+            fail: The status code to return for the first request with each cursor.
+        """
+        self.interrupt = interrupt
+        self.fail = fail or {}
+        self.cursors: list[str | None] = []
+
+    def send(self, request: requests.PreparedRequest, **_: object) -> requests.Response:
+        after = parse_qs(urlparse(request.url).query).get("after", [None])[0]
+        self.cursors.append(after)
+        if after is not None and after == self.interrupt:
+            raise Interrupted
+        response = requests.Response()
+        response.url = t.cast("str", request.url)
+        response.status_code = self.fail.pop(after, 200)
+        if response.status_code != 200:
+            response._content = b'{"error": {"message": "Invalid cursor"}}'  # noqa: SLF001
+            return response
+        row, next_cursor = PAGES[after]
+        paging = {"cursors": {"after": next_cursor}} if next_cursor else {}
+        response._content = json.dumps({"data": [row], "paging": paging}).encode()  # noqa: SLF001
+        return response
+
+
+def _sync(graph: FakeGraph, state: dict | None = None) -> tuple[FacebookStream, list[str]]:
+    stream = t.cast("FacebookStream", TapFacebook(config=CONFIG, state=state).streams["adlabels"])
+    ids = []
+    with mock.patch.object(requests.Session, "send", graph.send), contextlib.suppress(Interrupted):
+        ids.extend(record["id"] for record in stream.get_records(None))
+    return stream, ids
+
+
+def test_interrupted_listing_resumes_from_the_saved_cursor():
+    interrupted = FakeGraph(interrupt="c2")
+    stream, ids = _sync(interrupted)
+    assert ids == ["1", "2"]
+    state = {"bookmarks": {"adlabels": dict(stream.stream_state)}}
+    assert state["bookmarks"]["adlabels"][RESUME_CURSOR_KEY]["after"] == "c2"
+
+    resumed = FakeGraph()
+    stream, ids = _sync(resumed, state)
+
+    assert resumed.cursors == ["c2"]
+    assert ids == ["3"]
+    assert RESUME_CURSOR_KEY not in stream.stream_state
+
+
+@pytest.mark.parametrize(
+    ("change", "cursors"),
+    [
+        pytest.param({"fingerprint": "other"}, [None, "c1", "c2"], id="changed-query"),
+        pytest.param(
+            {"saved_at": int(time.time()) - RESUME_CURSOR_MAX_AGE_SECONDS - 1},
+            [None, "c1", "c2"],
+            id="expired",
+        ),
+        pytest.param({}, ["c2"], id="valid"),
+    ],
+)
+def test_saved_cursor_is_only_used_while_valid(change: dict, cursors: list):
+    stream, _ = _sync(FakeGraph(interrupt="c2"))
+    stream_state = {**stream.stream_state}
+    stream_state[RESUME_CURSOR_KEY] = {**stream_state[RESUME_CURSOR_KEY], **change}
+
+    graph = FakeGraph()
+    _, ids = _sync(graph, {"bookmarks": {"adlabels": stream_state}})
+
+    assert graph.cursors == cursors
+    assert ids == ["1", "2", "3"][-len(cursors) :]
+
+
+def test_rejected_cursor_restarts_the_listing():
+    stream, _ = _sync(FakeGraph(interrupt="c2"))
+    state = {"bookmarks": {"adlabels": dict(stream.stream_state)}}
+
+    graph = FakeGraph(fail={"c2": 400})
+    stream, ids = _sync(graph, state)
+
+    assert graph.cursors == ["c2", None, "c1", "c2"]
+    assert ids == ["1", "2", "3"]
+    assert RESUME_CURSOR_KEY not in stream.stream_state
+
+
+def test_listing_stops_at_the_end_date():
+    graph = FakeGraph()
+    stream = TapFacebook(config={**CONFIG, "end_date": "2024-01-02"}).streams["adlabels"]
+
+    with mock.patch.object(requests.Session, "send", graph.send):
+        ids = [record["id"] for record in stream.get_records(None)]
+
+    assert graph.cursors == [None, "c1"]
+    assert ids == ["1"]
+    assert RESUME_CURSOR_KEY not in stream.stream_state
+
+
+def test_listings_keyed_by_id_ignore_the_end_date():
+    graph = FakeGraph()
+    stream = TapFacebook(config={**CONFIG, "end_date": "2024-01-02"}).streams["advideos"]
+
+    with mock.patch.object(requests.Session, "send", graph.send):
+        ids = [record["id"] for record in stream.get_records(None)]
+
+    assert graph.cursors == [None, "c1", "c2"]
+    assert ids == ["1", "2", "3"]
+
+
+def test_incremental_streams_filter_on_the_end_date():
+    stream = TapFacebook(config={**CONFIG, "end_date": "2024-01-10"}).streams["adsets"]
+    stream._write_starting_replication_value(None)  # noqa: SLF001
+
+    filtering = json.loads(stream.get_url_params(None, None)["filtering"])
+
+    assert filtering == [
+        {"field": "adset.updated_time", "operator": "GREATER_THAN", "value": 1704067200},
+        {"field": "adset.updated_time", "operator": "LESS_THAN", "value": 1704931200},
+    ]
+
+
+ADSETS = [
+    {"id": str(index), "updated_time": updated_time}
+    for index, updated_time in enumerate(
+        [
+            "2024-01-01T12:00:00+0000",
+            "2024-01-03T00:00:00+0000",
+            "2024-01-04T00:00:00+0000",
+            "2024-01-04T16:00:00+0000",
+            "2024-01-08T00:00:00+0000",
+            "2024-01-10T23:59:59+0000",
+            "2024-01-11T00:00:00+0000",
+        ],
+    )
+]
+
+
+class FilteringGraph:
+    """Serves adsets matching the time filter of each request, two per page."""
+
+    def __init__(self) -> None:
+        """Initialize the fake Graph API."""
+        self.filters: list[tuple[int, int]] = []
+        self.threads: set[str] = set()
+
+    def send(self, request: requests.PreparedRequest, **_: object) -> requests.Response:
+        query = parse_qs(urlparse(request.url).query)
+        bounds = {item["operator"]: item["value"] for item in json.loads(query["filtering"][0])}
+        since, until = bounds["GREATER_THAN"], bounds["LESS_THAN"]
+        offset = int(query.get("after", ["0"])[0])
+        if not offset:
+            self.filters.append((since, until))
+        self.threads.add(threading.current_thread().name)
+        rows = [
+            row
+            for row in ADSETS
+            if since < pendulum.parse(row["updated_time"]).int_timestamp < until  # type: ignore[union-attr]
+        ]
+        paging = {"cursors": {"after": str(offset + 2)}} if offset + 2 < len(rows) else {}
+        response = requests.Response()
+        response.url = t.cast("str", request.url)
+        response.status_code = 200
+        response._content = json.dumps(  # noqa: SLF001
+            {"data": rows[offset : offset + 2], "paging": paging},
+        ).encode()
+        return response
+
+
+@pytest.mark.parametrize("max_buffer_mb", [0, 1])
+def test_first_sync_is_listed_in_concurrent_slices(
+    capsys: pytest.CaptureFixture[str],
+    max_buffer_mb: int,
+):
+    config = {
+        **CONFIG,
+        "end_date": "2024-01-10",
+        "backfill_slices": 3,
+        "max_buffer_mb": max_buffer_mb,
+    }
+    stream = TapFacebook(config=config).streams["adsets"]
+    graph = FilteringGraph()
+
+    with mock.patch.object(requests.Session, "send", graph.send):
+        stream.sync()
+
+    # Bounded by 2024-01-01, 2024-01-04T08:00, 2024-01-07T16:00 and 2024-01-11.
+    assert sorted(graph.filters) == [
+        (1704067200, 1704355200),
+        (1704355199, 1704643200),
+        (1704643199, 1704931200),
+    ]
+    assert ("tap-facebook-prefetch" in graph.threads) == bool(max_buffer_mb)
+    messages = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    records = [message["record"]["id"] for message in messages if message["type"] == "RECORD"]
+    assert records == ["0", "1", "2", "3", "4", "5"]
+    assert stream.stream_state.pop(TIMINGS_KEY)["requests"] >= len(graph.filters)
+    assert stream.stream_state == {
+        "replication_key": "updated_time",
+        "replication_key_value": "2024-01-10T23:59:59+0000",
+    }
+
+
+def test_later_syncs_are_not_sliced():
+    bookmark = {"replication_key": "updated_time", "replication_key_value": "2024-01-05"}
+    config = {**CONFIG, "backfill_slices": 3}
+    stream = TapFacebook(config=config, state={"bookmarks": {"adsets": bookmark}}).streams["adsets"]
+
+    assert stream.partitions is None
+
+
+def _status_filter(stream: FacebookStream) -> tuple[int, list | None]:
+    stream._write_starting_replication_value(None)  # noqa: SLF001
+    filtering = {
+        item["operator"]: item["value"]
+        for item in json.loads(stream.get_url_params(None, None)["filtering"])
+    }
+    return filtering["GREATER_THAN"], filtering.get("IN")
+
+
+def test_routine_syncs_only_list_the_configured_statuses():
+    sweep = {"synced_at": pendulum.now("UTC").isoformat(), "replication_key_value": "2024-01-01"}
+    bookmark = {
+        "replication_key": "updated_time",
+        "replication_key_value": "2024-01-05",
+        STATUS_SWEEP_KEY: sweep,
+    }
+    config = {**CONFIG, "effective_status": ["ACTIVE"], "status_sweep_interval_hours": 24}
+    stream = TapFacebook(config=config, state={"bookmarks": {"adsets": bookmark}}).streams["adsets"]
+
+    assert _status_filter(stream) == (1704412800, ["ACTIVE"])
+
+
+def test_status_sweeps_list_every_status_since_the_previous_sweep():
+    synced_at = pendulum.now("UTC").subtract(hours=25)
+    sweep = {"synced_at": synced_at.isoformat(), "replication_key_value": "2024-01-01"}
+    bookmark = {
+        "replication_key": "updated_time",
+        "replication_key_value": "2024-01-05",
+        STATUS_SWEEP_KEY: sweep,
+    }
+    config = {**CONFIG, "effective_status": ["ACTIVE"], "status_sweep_interval_hours": 24}
+    stream = TapFacebook(config=config, state={"bookmarks": {"adsets": bookmark}}).streams["adsets"]
+    assert _status_filter(stream) == (1704067200, None)
+
+    with mock.patch.object(requests.Session, "send", FakeGraph().send):
+        assert len(list(stream.get_records(None))) == 3
+
+    assert stream.stream_state[STATUS_SWEEP_KEY] == {
+        "synced_at": stream.status_sweep_started_at.isoformat(),  # type: ignore[attr-defined]
+        "replication_key_value": stream.status_sweep_started_at.isoformat(),  # type: ignore[attr-defined]
+    }
+
+
+def test_creatives_are_expanded_inline_with_changed_ads(capsys: pytest.CaptureFixture[str]):
+    creatives = [{"id": "c1", "name": "first"}, {"id": "c2", "name": "second"}]
+    ads = [
+        {"id": str(index), "updated_time": "2024-01-02T00:00:00+0000", "creative": creative}
+        for index, creative in enumerate([creatives[0], creatives[1], creatives[0]])
+    ]
+    requested: list[str] = []
+
+    def send(request: requests.PreparedRequest, **_: object) -> requests.Response:
+        requested.append(t.cast("str", request.url))
+        response = requests.Response()
+        response.url = t.cast("str", request.url)
+        response.status_code = 200
+        response._content = json.dumps({"data": ads}).encode()  # noqa: SLF001
+        return response
+
+    tap = TapFacebook(config={**CONFIG, "expand_creatives": True})
+    stream = tap.streams["ads"]
+    assert [child.name for child in stream.child_streams] == ["creatives"]
+
+    with mock.patch.object(requests.Session, "send", side_effect=send):
+        stream.sync()
+
+    assert len(requested) == 1
+    assert "creative%7Bid%2Caccount_id%2C" in requested[0]
+    messages = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    records = [
+        (message["stream"], message["record"]["id"], message["record"].get("creative"))
+        for message in messages
+        if message["type"] == "RECORD"
+    ]
+    assert records == [
+        ("creatives", "c1", None),
+        ("ads", "0", {"id": "c1"}),
+        ("creatives", "c2", None),
+        ("ads", "1", {"id": "c2"}),
+        ("ads", "2", {"id": "c1"}),
+    ]
+    assert stream._expanded_creatives == {}  # type: ignore[attr-defined]  # noqa: SLF001
+
+
+def test_creatives_are_not_expanded_unless_selected():
+    config = {**CONFIG, "expand_creatives": True}
+    catalog = TapFacebook(config=config).catalog.to_dict()
+    for entry in catalog["streams"]:
+        for metadata in entry["metadata"]:
+            if not metadata["breadcrumb"]:
+                metadata["metadata"]["selected"] = entry["tap_stream_id"] == "ads"
+    stream = TapFacebook(config=config, catalog=catalog).streams["ads"]
+    ad = {"id": "1", "creative": {"id": "c1"}}
+
+    assert "creative{" not in stream.path
+    assert list(stream.generate_child_contexts(ad, None)) == []
+    assert ad["creative"] == {"id": "c1"}
+
+
+@pytest.mark.parametrize("max_buffer_mb", [0, 1])
+def test_objects_are_looked_up_by_id_in_chunks(max_buffer_mb: int):
+    hashes = [f"h{index}" for index in range(120)]
+    requested: list[list[str]] = []
+
+    def send(request: requests.PreparedRequest, **_: object) -> requests.Response:
+        query = parse_qs(urlparse(request.url).query)
+        ids = query["ids"][0].split(",")
+        requested.append(ids)
+        assert urlparse(request.url).path == "/v22.0/"
+        assert query["fields"][0].startswith("id,account_id,")
+        response = requests.Response()
+        response.url = t.cast("str", request.url)
+        response.status_code = 200
+        objects = {
+            object_id: {"id": object_id, "updated_time": "2024-01-02T00:00:00+0000"}
+            for object_id in ids
+        }
+        response._content = json.dumps(objects).encode()  # noqa: SLF001
+        return response
+
+    bookmark = {"replication_key": "updated_time", "replication_key_value": "2024-06-01"}
+    tap = TapFacebook(
+        config={
+            **CONFIG,
+            "api_version": "v22.0",
+            "max_buffer_mb": max_buffer_mb,
+            "lookup_ids": {"adimages": hashes},
+        },
+        state={"bookmarks": {"adimages": bookmark}},
+    )
+    stream = tap.streams["adimages"]
+    with mock.patch.object(requests.Session, "send", side_effect=send):
+        records = list(stream.get_records(None))
+        stream.sync()
+
+    assert [record["id"] for record in records] == [f"123:{key}" for key in hashes]
+    assert sorted(len(ids) for ids in requested) == [20, 20, 50, 50, 50, 50]
+    assert min(requested)[0] == "123:h0"
+    assert stream.stream_state["replication_key_value"] == "2024-06-01"
+    assert not tap.streams["advideos"].lookup_ids
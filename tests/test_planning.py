@@ -0,0 +1,169 @@
+"""Tests for the planning of a sync."""
+
+from __future__ import annotations
+
+import json
+import typing as t
+from unittest import mock
+
+import requests
+from click.testing import CliRunner
+
+from tap_facebook.planning import TIMINGS_KEY, SyncPlanner
+from tap_facebook.tap import TapFacebook
+
+if t.TYPE_CHECKING:
+    from pathlib import Path
+
+CONFIG = {
+    "access_token": "token",
+    "account_id": "123",
+    "start_date": "2024-01-01",
+    "end_date": "2024-01-10",
+}
+
+
+def _send(request: requests.PreparedRequest, **_: object) -> requests.Response:
+    response = requests.Response()
+    response.url = t.cast("str", request.url)
+    response.status_code = 200
+    response._content = json.dumps(  # noqa: SLF001
+        {"data": [{"id": "1", "updated_time": "2024-01-02T00:00:00+0000"}]},
+    ).encode()
+    return response
+
+
+def test_listings_record_their_timings():
+    stream = TapFacebook(config=CONFIG).streams["adlabels"]
+    with mock.patch.object(requests.Session, "send", side_effect=_send):
+        stream.sync()
+
+    timings = stream.stream_state[TIMINGS_KEY]
+    assert timings["units"] == 1
+    assert timings["requests"] == 1
+    assert stream.plan_sync() == {  # type: ignore[attr-defined]
+        "listings": 1,
+        "requests": 1,
+        "rate_limit_tokens": 1,
+        "seconds": timings["seconds"],
+    }
+
+
+def test_plans_are_scaled_from_the_timings_of_the_last_sync():
+    config = {
+        **CONFIG,
+        "sync_processes": 2,
+        "insight_reports_list": [
+            {"name": "breakdowns", "breakdowns": ["age"], "use_synchronous_requests": False},
+        ],
+    }
+    state = {
+        "bookmarks": {
+            "adlabels": {TIMINGS_KEY: {"units": 1, "requests": 4, "seconds": 2.0}},
+            "adsinsights_default": {TIMINGS_KEY: {"units": 5, "requests": 10, "seconds": 30.0}},
+        },
+    }
+    tap = TapFacebook(config=config, state=state)
+    for stream in tap.streams.values():
+        stream.selected = stream.name in {
+            "adlabels",
+            "adsinsights_default",
+            "adsinsights_breakdowns",
+        }
+
+    plan = SyncPlanner(tap).plan()
+
+    streams = {stream.pop("stream"): stream for stream in plan["streams"]}
+    assert streams == {
+        "adlabels": {"listings": 1, "requests": 4, "rate_limit_tokens": 4, "seconds": 2.0},
+        # The first ten days, synced from the synchronous endpoint, twice as fast as
+        # the five windows of the last sync.
+        "adsinsights_default": {
+            "windows": 10,
+            "jobs": 0,
+            "requests": 20,
+            "rate_limit_tokens": 20,
+            "seconds": 60.0,
+        },
+        # Without timings, each window is a job of three requests.
+        "adsinsights_breakdowns": {
+            "windows": 10,
+            "jobs": 10,
+            "requests": 30,
+            "rate_limit_tokens": 80,
+            "seconds": None,
+        },
+    }
+    assert plan["totals"] == {
+        "windows": 20,
+        "jobs": 10,
+        "requests": 54,
+        "rate_limit_tokens": 104,
+        "seconds": 62.0,
+        "wall_seconds": 31.0,
+        "streams_without_timings": ["adsinsights_breakdowns"],
+        "streams_without_job_counts": [],
+    }
+
+
+def test_wide_reports_plan_a_job_per_part_of_their_fields():
+    config = {
+        **CONFIG,
+        "insight_reports_list": [
+            {"name": "split", "use_synchronous_requests": False, "max_fields_per_job": 10},
+        ],
+    }
+    stream = TapFacebook(config=config).streams["adsinsights_split"]
+    # The ids of the row, which every part requests, and 25 more fields.
+    fields = ["account_id", "ad_id", *sorted(stream.schema["properties"])[:25]]
+    for field in fields:
+        stream.metadata["properties", field].selected = True
+
+    plan = stream.plan_sync()  # type: ignore[attr-defined]
+
+    assert plan["windows"] == 10
+    assert plan["jobs"] == 30
+    assert plan["requests"] == 90
+
+
+def test_campaign_shards_are_unknown_to_plans():
+    config = {
+        **CONFIG,
+        "insight_reports_list": [
+            {"name": "sharded", "use_synchronous_requests": False, "campaigns_per_job": 50},
+        ],
+    }
+    tap = TapFacebook(config=config)
+    for stream in tap.streams.values():
+        stream.selected = stream.name == "adsinsights_sharded"
+
+    plan = SyncPlanner(tap).plan()
+
+    assert plan["streams"] == [
+        {
+            "stream": "adsinsights_sharded",
+            "windows": 10,
+            "jobs": None,
+            "jobs_per_campaign_shard": 10,
+            "campaign_shards": None,
+            "requests": None,
+            "rate_limit_tokens": None,
+            "seconds": None,
+        },
+    ]
+    assert plan["totals"]["streams_without_job_counts"] == ["adsinsights_sharded"]
+
+
+def test_plan_option_prints_the_plan_without_syncing(tmp_path: Path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(CONFIG))
+
+    with mock.patch.object(TapFacebook, "sync_all", side_effect=AssertionError):
+        result = CliRunner().invoke(
+            TapFacebook.cli,
+            ["--config", str(config_path), "--plan"],
+        )
+
+    assert result.exit_code == 0, result.output
+    plan = json.loads(result.stdout)
+    assert "adsinsights_default" in [stream["stream"] for stream in plan["streams"]]
@@ -0,0 +1,67 @@
+"""Tests for the sync profiler."""
+
+from __future__ import annotations
+
+import json
+import time
+import typing as t
+from unittest import mock
+
+import requests
+from click.testing import CliRunner
+
+from tap_facebook.profiling import SyncProfiler
+from tap_facebook.tap import TapFacebook
+
+if t.TYPE_CHECKING:
+    from pathlib import Path
+
+CONFIG = {"access_token": "token", "account_id": "123", "start_date": "2024-01-01"}
+
+
+def _slow_send(request: requests.PreparedRequest, **_: object) -> requests.Response:
+    time.sleep(0.2)
+    response = requests.Response()
+    response.url = t.cast("str", request.url)
+    response.status_code = 200
+    response._content = json.dumps(  # noqa: SLF001
+        {"data": [{"id": "1", "updated_time": "2024-01-02T00:00:00+0000"}]},
+    ).encode()
+    return response
+
+
+def test_time_is_attributed_to_streams_and_phases(tmp_path: Path):
+    stream = TapFacebook(config=CONFIG).streams["adlabels"]
+
+    with (
+        mock.patch.object(requests.Session, "send", side_effect=_slow_send),
+        SyncProfiler(interval=0.001) as profiler,
+    ):
+        stream.sync()
+
+    assert max(profiler.wall, key=profiler.wall.__getitem__) == ("adlabels", "network")
+    assert profiler.wall["adlabels", "network"] >= 0.1
+
+    path = tmp_path / "profile.folded"
+    profiler.write_folded(path)
+    stacks = path.read_text().splitlines()
+    assert any(line.startswith("MainThread;") and "_slow_send" in line for line in stacks)
+
+
+def _sync_all() -> None:
+    time.sleep(0.1)
+
+
+def test_profile_option_writes_the_profile(tmp_path: Path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(CONFIG))
+    profile_path = tmp_path / "profile.folded"
+
+    with mock.patch.object(TapFacebook, "sync_all", side_effect=_sync_all):
+        result = CliRunner().invoke(
+            TapFacebook.cli,
+            ["--config", str(config_path), "--profile", str(profile_path)],
+        )
+
+    assert result.exit_code == 0, result.output
+    assert "_sync_all (test_profiling.py" in profile_path.read_text()
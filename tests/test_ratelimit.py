@@ -0,0 +1,60 @@
+"""Tests for the rate limit budget shared between tap processes."""
+
+from __future__ import annotations
+
+import json
+import typing as t
+from unittest import mock
+
+import requests
+
+from tap_facebook.ratelimit import BURST_SECONDS, SharedTokenBucket, get_rate_limiter
+from tap_facebook.tap import TapFacebook
+
+if t.TYPE_CHECKING:
+    from pathlib import Path
+
+CONFIG = {"access_token": "token", "account_id": "123", "start_date": "2024-01-01"}
+
+
+def test_buckets_of_the_same_file_share_their_tokens(tmp_path: Path):
+    # 100 calls per second, so the bucket holds 1000 tokens.
+    first = SharedTokenBucket(tmp_path / "app.bucket", calls_per_minute=6000)
+    second = SharedTokenBucket(tmp_path / "app.bucket", calls_per_minute=6000)
+    assert first.capacity == 100 * BURST_SECONDS
+
+    assert first.acquire(first.capacity) == 0
+    waited = second.acquire(10)
+    assert 0.05 < waited < 0.5
+
+    second.drain()
+    assert first.acquire(10) > 0.05
+
+
+def _send(request: requests.PreparedRequest, **_: object) -> requests.Response:
+    response = requests.Response()
+    response.url = t.cast("str", request.url)
+    response.status_code = 200
+    response._content = json.dumps(  # noqa: SLF001
+        {"data": [{"id": "1", "updated_time": "2024-01-02T00:00:00+0000"}]},
+    ).encode()
+    return response
+
+
+def test_requests_take_tokens_from_the_budget_of_their_key(tmp_path: Path):
+    config = {
+        **CONFIG,
+        "rate_limit_dir": str(tmp_path),
+        "rate_limit_key": "app-1",
+        "rate_limit_calls_per_minute": 60,
+    }
+    stream = TapFacebook(config=config).streams["adlabels"]
+    with mock.patch.object(requests.Session, "send", side_effect=_send):
+        stream.sync()
+
+    bucket = get_rate_limiter(config)
+    assert bucket is not None
+    assert bucket.path == get_rate_limiter({**config, "account_id": "456"}).path  # type: ignore[union-attr]
+    assert bucket.path != get_rate_limiter({**config, "rate_limit_key": "app-2"}).path  # type: ignore[union-attr]
+    state = json.loads(bucket.path.read_text())
+    assert bucket.capacity - 1.5 < state["tokens"] <= bucket.capacity - 1
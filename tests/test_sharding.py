@@ -0,0 +1,191 @@
+"""Tests for sharded syncs."""
+
+from __future__ import annotations
+
+import json
+import time
+import typing as t
+from unittest import mock
+
+import pendulum
+from click.testing import CliRunner
+
+from tap_facebook.profiling import SyncProfiler
+from tap_facebook.sharding import ShardedSync, ShardUnit, sync_unit
+from tap_facebook.streams import AdsetsStream
+from tap_facebook.tap import TapFacebook
+
+if t.TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+START_DATE = pendulum.today().subtract(days=20).date()
+
+CONFIG = {
+    "access_token": "token",
+    "account_id": "123",
+    "start_date": START_DATE.to_date_string(),
+    "end_date": START_DATE.add(days=9).to_date_string(),
+}
+
+ROWS = [
+    {"id": "1", "name": "adset", "updated_time": "2024-01-02T00:00:00+0000"},
+    {"id": "2", "name": "other", "updated_time": "2024-01-03T00:00:00+0000"},
+]
+
+
+class FakeConnection:
+    """Collects the messages a worker sends to the coordinator."""
+
+    def __init__(self) -> None:
+        """Initialize the fake connection."""
+        self.sent: list[tuple] = []
+
+    def send(self, message: tuple) -> None:
+        self.sent.append(message)
+
+
+def test_date_ranges_cover_the_report_windows():
+    stream = TapFacebook(config=CONFIG).streams["adsinsights_default"]
+
+    ranges = stream.partition_date_range(3)
+
+    assert ranges == [
+        (START_DATE, START_DATE.add(days=2)),
+        (START_DATE.add(days=3), START_DATE.add(days=5)),
+        (START_DATE.add(days=6), START_DATE.add(days=9)),
+    ]
+    assert len(stream.partition_date_range(20)) == 10
+
+
+def test_worker_sends_serialized_messages():
+    tap = TapFacebook(config=CONFIG)
+    connection = FakeConnection()
+
+    with mock.patch.object(AdsetsStream, "get_records", return_value=iter(ROWS)):
+        sync_unit(
+            TapFacebook,
+            CONFIG,
+            tap.catalog.to_dict(),
+            {},
+            ShardUnit("adsets"),
+            connection,  # type: ignore[arg-type]
+        )
+
+    kinds = [kind for kind, *_ in connection.sent]
+    assert kinds == ["schema", "lines", "state"]
+    _, stream_name, schema = connection.sent[0]
+    assert stream_name == "adsets"
+    assert json.loads(schema)["type"] == "SCHEMA"
+    lines = connection.sent[1][1].splitlines()
+    assert [json.loads(line)["record"]["id"] for line in lines] == ["1", "2"]
+    _, state = connection.sent[2]
+    assert state["bookmarks"]["adsets"]["replication_key_value"] == "2024-01-03T00:00:00+0000"
+
+
+def test_insights_bookmark_advances_once_all_ranges_complete(capsys: pytest.CaptureFixture[str]):
+    bookmark = {"replication_key": "date_start", "replication_key_value": "2024-01-01"}
+    state = {"bookmarks": {"adsinsights_default": bookmark}}
+    tap = TapFacebook(config=CONFIG, state=state)
+    sync = ShardedSync(tap, processes=2)
+    first, second = [unit for unit in sync.get_units() if unit.date_range]
+
+    def partition_state(value: str, report_runs: dict) -> dict:
+        stream_state = {**bookmark, "replication_key_value": value, "report_runs": report_runs}
+        return {"bookmarks": {"adsinsights_default": stream_state}}
+
+    sync.handle_message(second, ("state", partition_state("2024-01-10", {"b": {}})))
+    sync.handle_message(second, ("done",))
+    sync.handle_message(first, ("state", partition_state("2024-01-05", {"a": {}})))
+    assert tap.state["bookmarks"]["adsinsights_default"] == {
+        **bookmark,
+        "report_runs": {"a": {}, "b": {}},
+    }
+
+    sync.handle_message(first, ("state", partition_state("2024-01-05", {})))
+    sync.handle_message(first, ("done",))
+    assert tap.state["bookmarks"]["adsinsights_default"] == {
+        **bookmark,
+        "replication_key_value": "2024-01-10",
+        "report_runs": {"b": {}},
+    }
+
+    states = [json.loads(line)["value"] for line in capsys.readouterr().out.splitlines()]
+    assert states[-1] == tap.state
+
+
+def test_child_streams_are_synced_with_their_parent():
+    tap = TapFacebook(config={**CONFIG, "expand_creatives": True})
+
+    units = ShardedSync(tap, processes=2).get_units()
+
+    assert ShardUnit("ads", child_stream_names=("creatives",)) in units
+    assert "creatives" not in {unit.stream_name for unit in units}
+
+
+def test_child_stream_bookmarks_are_kept():
+    tap = TapFacebook(config={**CONFIG, "expand_creatives": True})
+    sync = ShardedSync(tap, processes=2)
+    unit = ShardUnit("ads", child_stream_names=("creatives",))
+    creatives = {"partitions": [{"context": {"ad_id": "1"}, "replication_key_value": "9"}]}
+    state = {
+        "bookmarks": {
+            "ads": {"replication_key_value": "2024-01-02T00:00:00+0000"},
+            "creatives": creatives,
+        },
+    }
+
+    sync.handle_message(unit, ("state", state))
+    sync.handle_message(unit, ("done",))
+
+    assert tap.state["bookmarks"]["creatives"] == creatives
+    assert tap.state["bookmarks"]["ads"] == state["bookmarks"]["ads"]
+
+
+def _slow_rows(*_: object) -> t.Iterator[dict]:
+    for row in ROWS:
+        time.sleep(0.05)
+        yield row
+
+
+def test_worker_profiles_are_merged_into_the_coordinator_profile():
+    tap = TapFacebook(config=CONFIG)
+    connection = FakeConnection()
+
+    with mock.patch.object(AdsetsStream, "get_records", side_effect=_slow_rows):
+        sync_unit(
+            TapFacebook,
+            CONFIG,
+            tap.catalog.to_dict(),
+            {},
+            ShardUnit("adsets"),
+            connection,  # type: ignore[arg-type]
+            profile=True,
+        )
+
+    message = connection.sent[-1]
+    assert message[0] == "profile"
+    wall, _, stacks, process = message[1:]
+    assert process == "MainProcess"
+    assert wall["adsets", "other"] > 0
+    with SyncProfiler(interval=60) as profiler:
+        ShardedSync(tap, processes=2).handle_message(ShardUnit("adsets"), message)
+
+    assert dict(profiler.wall) == wall
+    assert sum(profiler.stacks.values()) == sum(stacks.values())
+    assert all(stack.startswith("MainProcess;") for stack in profiler.stacks)
+
+
+def test_command_line_syncs_are_sharded(tmp_path: Path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({**CONFIG, "sync_processes": 2}))
+
+    with (
+        mock.patch.object(ShardedSync, "run") as run,
+        mock.patch.object(TapFacebook, "sync_all", side_effect=AssertionError),
+    ):
+        result = CliRunner().invoke(TapFacebook.cli, ["--config", str(config_path)])
+
+    assert result.exit_code == 0, result.output
+    run.assert_called_once_with()
@@ -0,0 +1,81 @@
+"""Tests for batched record transformations."""
+
+from __future__ import annotations
+
+import decimal
+
+from tap_facebook.tap import TapFacebook
+from tap_facebook.transform import RecordTransformer, iter_batches
+
+CONFIG = {
+    "access_token": "token",
+    "account_id": "123",
+    "start_date": "2024-01-01T00:00:00Z",
+}
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": ["string", "null"]},
+        "count": {"type": ["integer", "null"]},
+        "spend": {"anyOf": [{"type": "number"}, {"type": "null"}]},
+    },
+}
+
+
+def test_numeric_strings_are_coerced():
+    transformer = RecordTransformer(SCHEMA, fill_missing=["count"])
+    records = [
+        {"id": "1", "count": "3", "spend": "1.50"},
+        {"id": "2", "spend": 2},
+        {"id": "3", "count": "n/a", "spend": "n/a"},
+    ]
+
+    assert transformer.transform(records) == [
+        {"id": "1", "count": 3, "spend": decimal.Decimal("1.50")},
+        {"id": "2", "count": None, "spend": 2},
+        {"id": "3", "count": "n/a", "spend": "n/a"},
+    ]
+
+
+def test_iter_batches():
+    assert list(iter_batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_campaign_daily_budget():
+    stream = TapFacebook(config=CONFIG).streams["campaigns"]
+
+    assert stream.record_transformer.transform([{"daily_budget": "100"}, {}]) == [
+        {"daily_budget": 100},
+        {"daily_budget": None},
+    ]
+
+
+def test_entity_streams_only_coerce_numeric_string_fields():
+    streams = TapFacebook(config=CONFIG).streams
+
+    assert not streams["adsets"].record_transformer
+    assert [name for name, *_ in streams["adaccounts"].record_transformer.plan] == [
+        "amount_spent",
+        "balance",
+        "min_campaign_group_spend_cap",
+        "spend_cap",
+    ]
+
+
+def test_insights_metrics_stay_strings_by_default():
+    stream = TapFacebook(config=CONFIG).streams["adsinsights_default"]
+
+    assert stream.schema["properties"]["spend"]["type"] == ["string", "null"]
+    assert not stream.record_transformer
+
+
+def test_numeric_insights_fields():
+    tap = TapFacebook(config={**CONFIG, "numeric_insights_fields": True})
+    stream = tap.streams["adsinsights_default"]
+
+    assert stream.schema["properties"]["impressions"]["type"] == ["integer", "null"]
+    assert stream.schema["properties"]["spend"]["type"] == ["number", "null"]
+    assert stream.record_transformer.transform(
+        [{"impressions": "10", "spend": "1.23", "ad_id": "1"}],
+    ) == [{"impressions": 10, "spend": decimal.Decimal("1.23"), "ad_id": "1"}]